@@ -1,12 +1,10 @@
 import { NextResponse } from "next/server";
-import { pool } from "@/lib/db";
-
-const LEAGUE_ID = 8;
-const SEASON_ID = 23614; // 2024/2025 SportMonks season id
+import { pool, LEAGUE_ID, DEFAULT_SEASON_ID } from "@/lib/db";
 
 export async function GET(req: Request) {
   const { searchParams } = new URL(req.url);
   const stat = searchParams.get("stat"); // goals | assists
+  const seasonId = Number(searchParams.get("season_id") ?? DEFAULT_SEASON_ID);
 
   const col = stat === "assists" ? "assists" : stat === "goals" ? "goals" : null;
   if (!col) {
@@ -15,6 +13,9 @@ export async function GET(req: Request) {
       { status: 400 }
     );
   }
+  if (!Number.isInteger(seasonId)) {
+    return NextResponse.json({ error: "Invalid season_id" }, { status: 400 });
+  }
 
   const sql = `
     SELECT
@@ -28,15 +29,15 @@ export async function GET(req: Request) {
     LEFT JOIN leagues l ON l.league_id = s.league_id
     LEFT JOIN seasons se ON se.season_id = s.season_id
     WHERE s.league_id = $1 AND s.season_id = $2
-    ORDER BY total DESC, p.name ASC
+    ORDER BY s.${col}_rank ASC NULLS LAST, total DESC, p.name ASC
     LIMIT 10;
   `;
 
-  const result = await pool.query(sql, [LEAGUE_ID, SEASON_ID]);
+  const result = await pool.query(sql, [LEAGUE_ID, seasonId]);
 
   return NextResponse.json({
     league_id: LEAGUE_ID,
-    season_id: SEASON_ID,
+    season_id: seasonId,
     stat: col,
     rows: result.rows,
   });
@@ -0,0 +1,19 @@
+import { NextResponse } from "next/server";
+import { searchPlayers } from "@/lib/db";
+
+export async function GET(req: Request) {
+  const { searchParams } = new URL(req.url);
+  const q = (searchParams.get("q") ?? "").trim();
+  const limit = Math.min(Number(searchParams.get("limit") ?? 10), 50);
+
+  if (!Number.isInteger(limit) || limit < 1) {
+    return NextResponse.json({ error: "Invalid limit" }, { status: 400 });
+  }
+  if (q.length < 2) {
+    return NextResponse.json({ q, rows: [] });
+  }
+
+  const rows = await searchPlayers(q.slice(0, 100), limit);
+
+  return NextResponse.json({ q, rows });
+}
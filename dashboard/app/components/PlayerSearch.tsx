@@ -0,0 +1,81 @@
+"use client";
+
+import { useEffect, useState } from "react";
+
+interface PlayerSearchResult {
+  player_id: number;
+  name: string;
+  position: string | null;
+  goals: number;
+  assists: number;
+  seasons: number;
+}
+
+export default function PlayerSearch() {
+  const [query, setQuery] = useState("");
+  const [results, setResults] = useState<PlayerSearchResult[]>([]);
+
+  useEffect(() => {
+    const q = query.trim();
+    if (q.length < 2) {
+      setResults([]);
+      return;
+    }
+    // Debounce keystrokes and drop responses for queries that were superseded
+    const controller = new AbortController();
+    const timer = setTimeout(() => {
+      fetch(`/api/players/search?q=${encodeURIComponent(q)}`, { signal: controller.signal })
+        .then((res) => res.json())
+        .then((data) => setResults(data.rows ?? []))
+        .catch(() => {});
+    }, 150);
+    return () => {
+      clearTimeout(timer);
+      controller.abort();
+    };
+  }, [query]);
+
+  return (
+    <div className="flex-1 relative">
+      <svg
+        className="absolute left-4 top-1/2 -translate-y-1/2 w-5 h-5 text-[var(--muted)]"
+        fill="none"
+        viewBox="0 0 24 24"
+        stroke="currentColor"
+      >
+        <path
+          strokeLinecap="round"
+          strokeLinejoin="round"
+          strokeWidth={2}
+          d="M21 21l-6-6m2-5a7 7 0 11-14 0 7 7 0 0114 0z"
+        />
+      </svg>
+      <input
+        type="text"
+        value={query}
+        onChange={(e) => setQuery(e.target.value)}
+        placeholder="Search players by name..."
+        className="w-full pl-12 pr-4 py-3 rounded-xl bg-[var(--background-secondary)] border border-[var(--card-border)] text-[var(--foreground)] placeholder-[var(--muted)] focus:outline-none focus:border-[var(--accent)] transition-colors"
+      />
+
+      {results.length > 0 && (
+        <div className="card absolute left-0 right-0 top-full mt-2 z-10 divide-y divide-[var(--card-border)] max-h-96 overflow-y-auto">
+          {results.map((player) => (
+            <div key={player.player_id} className="flex items-center gap-4 px-4 py-3 hover:bg-white/5 transition-colors">
+              <div className="flex-1 min-w-0">
+                <p className="font-semibold text-[var(--foreground)] truncate">{player.name}</p>
+                <p className="text-xs text-[var(--muted)]">
+                  {player.position ?? "Unknown position"} · {player.seasons} seasons
+                </p>
+              </div>
+              <div className="flex gap-4 text-sm">
+                <span className="text-[var(--orange)] font-bold">{player.goals} G</span>
+                <span className="text-[var(--cyan)] font-bold">{player.assists} A</span>
+              </div>
+            </div>
+          ))}
+        </div>
+      )}
+    </div>
+  );
+}
@@ -0,0 +1,48 @@
+import { readFile } from "node:fs/promises";
+import path from "node:path";
+
+// Leaderboard artifacts written by etl/static_artifacts.py after each load.
+// They are read at request time: `next start` only serves public/ files that
+// existed at build time, and the ETL writes new ones after every load.
+// ETL_ARTIFACT_DIR must match the ETL's setting.
+const ARTIFACT_DIR = path.resolve(
+  process.env.ETL_ARTIFACT_DIR ?? path.join(process.cwd(), "artifacts", "leaderboards")
+);
+
+// File names carry the content hash; only the manifest changes in place.
+const IMMUTABLE = "public, max-age=31536000, immutable";
+const REVALIDATE = "public, max-age=0, must-revalidate";
+
+export const dynamic = "force-dynamic";
+
+export async function GET(req: Request, { params }: { params: Promise<{ path: string[] }> }) {
+  const parts = (await params).path;
+  const file = path.resolve(ARTIFACT_DIR, ...parts);
+  if (!file.startsWith(ARTIFACT_DIR + path.sep) || !file.endsWith(".json")) {
+    return Response.json({ error: "Not found" }, { status: 404 });
+  }
+
+  const headers: Record<string, string> = {
+    "Content-Type": "application/json",
+    "Cache-Control": file.endsWith(`${path.sep}manifest.json`) ? REVALIDATE : IMMUTABLE,
+    Vary: "Accept-Encoding",
+  };
+
+  // Precompressed siblings (.br, .gz) when the client accepts them
+  const accepted = req.headers.get("accept-encoding") ?? "";
+  for (const [encoding, suffix] of [["br", ".br"], ["gzip", ".gz"]]) {
+    if (!accepted.includes(encoding)) continue;
+    try {
+      const body = await readFile(file + suffix);
+      return new Response(body, { headers: { ...headers, "Content-Encoding": encoding } });
+    } catch {
+      // no sibling for this encoding
+    }
+  }
+
+  try {
+    return new Response(await readFile(file), { headers });
+  } catch {
+    return Response.json({ error: "Not found" }, { status: 404 });
+  }
+}
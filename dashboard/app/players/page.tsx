@@ -1,4 +1,5 @@
 import Link from "next/link";
+import PlayerSearch from "../components/PlayerSearch";
 
 // Placeholder player data
 const FEATURED_PLAYERS = [
@@ -48,30 +49,10 @@ export default function PlayersPage() {
             </p>
           </header>
 
-          {/* Search Bar (Placeholder) */}
+          {/* Search Bar */}
           <div className="card p-4 mb-8">
             <div className="flex flex-col md:flex-row gap-4">
-              <div className="flex-1 relative">
-                <svg
-                  className="absolute left-4 top-1/2 -translate-y-1/2 w-5 h-5 text-[var(--muted)]"
-                  fill="none"
-                  viewBox="0 0 24 24"
-                  stroke="currentColor"
-                >
-                  <path
-                    strokeLinecap="round"
-                    strokeLinejoin="round"
-                    strokeWidth={2}
-                    d="M21 21l-6-6m2-5a7 7 0 11-14 0 7 7 0 0114 0z"
-                  />
-                </svg>
-                <input
-                  type="text"
-                  placeholder="Search players by name, team, or nationality..."
-                  className="w-full pl-12 pr-4 py-3 rounded-xl bg-[var(--background-secondary)] border border-[var(--card-border)] text-[var(--foreground)] placeholder-[var(--muted)] focus:outline-none focus:border-[var(--accent)] transition-colors"
-                  disabled
-                />
-              </div>
+              <PlayerSearch />
               <div className="flex gap-2">
                 <select
                   className="season-dropdown"
@@ -91,7 +72,7 @@ export default function PlayersPage() {
               <svg className="w-4 h-4 text-[var(--accent)]" fill="none" viewBox="0 0 24 24" stroke="currentColor">
                 <path strokeLinecap="round" strokeLinejoin="round" strokeWidth={2} d="M13 16h-1v-4h-1m1-4h.01M21 12a9 9 0 11-18 0 9 9 0 0118 0z" />
               </svg>
-              Search functionality coming soon
+              Position and team filters coming soon
             </p>
           </div>
 
@@ -78,7 +78,7 @@ export async function getTopScorers(seasonId: number = DEFAULT_SEASON_ID, limit
     FROM players p
     JOIN player_season_stats s ON p.player_id = s.player_id
     WHERE s.league_id = $1 AND s.season_id = $2 AND s.goals > 0
-    ORDER BY s.goals DESC
+    ORDER BY s.goals_rank ASC NULLS LAST, s.goals DESC
     LIMIT $3`,
     [LEAGUE_ID, seasonId, limit]
   );
@@ -96,7 +96,7 @@ export async function getTopAssistProviders(seasonId: number = DEFAULT_SEASON_ID
     FROM players p
     JOIN player_season_stats s ON p.player_id = s.player_id
     WHERE s.league_id = $1 AND s.season_id = $2 AND s.assists > 0
-    ORDER BY s.assists DESC
+    ORDER BY s.assists_rank ASC NULLS LAST, s.assists DESC
     LIMIT $3`,
     [LEAGUE_ID, seasonId, limit]
   );
@@ -121,3 +121,48 @@ export async function getSeasonTotals(seasonId: number = DEFAULT_SEASON_ID): Pro
   };
 }
 
+
+export interface PlayerSearchResult {
+  player_id: number;
+  name: string;
+  position: string | null;
+  goals: number;
+  assists: number;
+  seasons: number;
+}
+
+// Name-as-you-type lookup on players.search_name (normalized by the ETL, see
+// etl/player_search.py). Full-name prefix matches rank first and use the
+// players_search_name_idx range scan; matches inside the name are only
+// looked up when the prefix matches don't fill the limit.
+export async function searchPlayers(query: string, limit = 10): Promise<PlayerSearchResult[]> {
+  const result = await pool.query<PlayerSearchResult>(
+    `SELECT
+      m.player_id,
+      p.name,
+      p.position,
+      COALESCE(c.total_goals, 0) as goals,
+      COALESCE(c.total_assists, 0) as assists,
+      COALESCE(c.seasons_played, 0) as seasons
+    FROM (
+      (SELECT player_id, 0 AS rank, search_name FROM players
+       WHERE player_search_name($1) <> ''
+         AND search_name LIKE player_search_name($1) || '%'
+       ORDER BY length(search_name), search_name
+       LIMIT $3)
+      UNION ALL
+      (SELECT player_id, 1 AS rank, search_name FROM players
+       WHERE player_search_name($1) <> ''
+         AND search_name LIKE '%' || player_search_name($1) || '%'
+         AND search_name NOT LIKE player_search_name($1) || '%'
+       ORDER BY length(search_name), search_name
+       LIMIT $3)
+      LIMIT $3
+    ) m
+    JOIN players p ON p.player_id = m.player_id
+    LEFT JOIN player_career_stats c ON c.player_id = m.player_id AND c.league_id = $2
+    ORDER BY m.rank, length(m.search_name), m.search_name`,
+    [query, LEAGUE_ID, limit]
+  );
+  return result.rows;
+}
@@ -0,0 +1,9 @@
+import os
+import sys
+
+# Scripts import each other as top-level modules; works for `python etl` and `python -m etl`
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from cli import main  # noqa: E402
+
+main()
@@ -0,0 +1,98 @@
+"""
+AIMD (additive increase, multiplicative decrease) concurrency limit for API calls.
+
+The limiter caps how many requests are in flight:
+  - after `limit` healthy responses in a row the limit grows by 1,
+  - a 429/5xx, a failed request, or a latency spike (slower than
+    LATENCY_SPIKE x the smoothed baseline) cuts it by DECREASE_FACTOR,
+    at most once per cooldown so one burst of errors counts once.
+
+Used by fetch_all_seasons.py (ETL_FETCH_CONCURRENCY initial limit,
+ETL_FETCH_MAX_CONCURRENCY ceiling).
+"""
+
+import time
+import threading
+from contextlib import contextmanager
+
+DECREASE_FACTOR = 0.5
+LATENCY_SPIKE = 2.0
+EWMA_ALPHA = 0.2
+
+
+class AimdLimiter:
+    def __init__(self, initial: int = 2, min_limit: int = 1, max_limit: int = 8):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.limit = max(min_limit, min(initial, max_limit))
+        self.peak_limit = self.limit
+        self.in_flight = 0
+        self.baseline = None  # smoothed latency of healthy responses (s)
+        self.latencies = []
+        self.requests = 0
+        self.backoffs = 0
+        self._healthy_streak = 0
+        self._cooldown_until = 0.0
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        with self._cond:
+            while self.in_flight >= self.limit:
+                self._cond.wait()
+            self.in_flight += 1
+
+    def release(self, latency: float, status: int | None):
+        """status None means the request failed without a response."""
+        with self._cond:
+            self.in_flight -= 1
+            self.requests += 1
+            self.latencies.append(latency)
+
+            overloaded = status is None or status == 429 or status >= 500
+            spike = self.baseline is not None and latency > self.baseline * LATENCY_SPIKE
+            if overloaded or spike:
+                self._decrease()
+            else:
+                self.baseline = latency if self.baseline is None else \
+                    (1 - EWMA_ALPHA) * self.baseline + EWMA_ALPHA * latency
+                self._healthy_streak += 1
+                if self._healthy_streak >= self.limit and self.limit < self.max_limit:
+                    self.limit += 1
+                    self.peak_limit = max(self.peak_limit, self.limit)
+                    self._healthy_streak = 0
+            self._cond.notify_all()
+
+    def _decrease(self):
+        self._healthy_streak = 0
+        now = time.monotonic()
+        if now < self._cooldown_until:
+            return
+        self.limit = max(self.min_limit, int(self.limit * DECREASE_FACTOR))
+        self.backoffs += 1
+        self._cooldown_until = now + (self.baseline or 1.0)
+
+    @contextmanager
+    def slot(self):
+        """
+        Hold one in-flight slot. Set outcome["status"] to the HTTP status;
+        leaving it None (or raising) counts as a failed request.
+        """
+        outcome = {"status": None}
+        self.acquire()
+        t0 = time.perf_counter()
+        try:
+            yield outcome
+        finally:
+            self.release(time.perf_counter() - t0, outcome["status"])
+
+    def percentile(self, p: float) -> float:
+        with self._cond:
+            ordered = sorted(self.latencies)
+        if not ordered:
+            return 0.0
+        return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+
+    def report(self) -> str:
+        return (f"limit={self.limit} (peak {self.peak_limit}, max {self.max_limit}) | "
+                f"requests={self.requests} backoffs={self.backoffs} | "
+                f"latency p50={self.percentile(50) * 1000:.0f}ms p95={self.percentile(95) * 1000:.0f}ms")
@@ -0,0 +1,252 @@
+"""
+SportMonks quota ledger and fetch planner.
+
+Every API call made through fetch_all_seasons.safe_get is counted in
+api_usage (one row per endpoint per hour, shared by all workers). Before a
+call, the budget is checked against the plan quota:
+  - the rate_limit block SportMonks returns with each response
+    (remaining calls, seconds until the window resets), when we have one,
+  - otherwise the ledger's call count for the current hour.
+When the window is spent, the fetcher sleeps until it resets and resumes.
+The check and the reservation of a call happen under one lock, so fetcher
+threads can't all pass the check on the last call of a window. The API
+window is timed on the monotonic clock; the ledger's hour and its reset
+both come from the database clock.
+
+plan_season_fetches() orders season fetches by priority (current season,
+recently finished, then history) and reports how many fit in the window.
+
+Env:
+  ETL_API_QUOTA_PER_HOUR   plan quota per hour (default 3000)
+  ETL_API_QUOTA_RESERVE    calls to leave unused in each window (default 10)
+
+Usage:
+  python etl/api_quota.py [hours]   # usage report for the last N hours (default 24)
+"""
+
+import os
+import re
+import sys
+import time
+import threading
+from datetime import date, datetime, timedelta
+import psycopg2
+from dotenv import load_dotenv
+
+HERE = os.path.dirname(__file__)
+load_dotenv(os.path.join(HERE, ".env"))
+
+QUOTA_PER_HOUR = int(os.getenv("ETL_API_QUOTA_PER_HOUR", "3000"))
+QUOTA_RESERVE = int(os.getenv("ETL_API_QUOTA_RESERVE", "10"))
+RECENT_DAYS = 400  # "recently finished" = ended within the last season or so
+
+USAGE_DDL = """
+CREATE TABLE IF NOT EXISTS api_usage (
+  endpoint        text        NOT NULL,
+  hour            timestamptz NOT NULL,
+  calls           int         NOT NULL DEFAULT 0,
+  errors          int         NOT NULL DEFAULT 0,
+  rate_limited    int         NOT NULL DEFAULT 0,
+  last_remaining  int,
+  updated_at      timestamptz NOT NULL DEFAULT now(),
+  PRIMARY KEY (endpoint, hour)
+);
+"""
+
+_conn = None
+# resets_at is on time.monotonic(); reserved = calls checked but not recorded yet
+_window = {"remaining": None, "resets_at": None, "reserved": 0}
+_lock = threading.RLock()
+
+
+def get_conn():
+    return psycopg2.connect(
+        host=os.getenv("DB_HOST"),
+        port=os.getenv("DB_PORT", "5432"),
+        dbname=os.getenv("DB_NAME"),
+        user=os.getenv("DB_USER"),
+        password=os.getenv("DB_PASS"),
+    )
+
+
+def ledger_conn():
+    """Autocommit connection used only for ledger writes (created on first use)."""
+    global _conn
+    with _lock:
+        if _conn is None or _conn.closed:
+            _conn = get_conn()
+            _conn.autocommit = True
+            with _conn.cursor() as cur:
+                cur.execute(USAGE_DDL)
+        return _conn
+
+
+def endpoint_key(url: str, base: str) -> str:
+    """'<base>/topscorers/seasons/23614' -> 'topscorers/seasons/{id}'."""
+    path = url[len(base):] if url.startswith(base) else url
+    return re.sub(r"/\d+(?=/|$)", "/{id}", path).strip("/")
+
+
+def record_call(endpoint: str, status: int, rate_limit: dict | None = None):
+    """
+    Count one call in the ledger, remember the window SportMonks reported
+    and release the call's reservation (see wait_for_budget).
+    """
+    remaining = None
+    with _lock:
+        if rate_limit:
+            remaining = rate_limit.get("remaining")
+            resets_in = rate_limit.get("resets_in_seconds")
+            if remaining is not None:
+                _window["remaining"] = int(remaining)
+            if resets_in is not None:
+                _window["resets_at"] = time.monotonic() + int(resets_in)
+        try:
+            _insert_call(endpoint, status, remaining)
+        finally:
+            release_call()
+
+
+def release_call():
+    """Drop a reservation whose call never got a response."""
+    with _lock:
+        _window["reserved"] = max(_window["reserved"] - 1, 0)
+
+
+def _insert_call(endpoint: str, status: int, remaining: int | None):
+    with ledger_conn().cursor() as cur:
+        cur.execute("""
+            INSERT INTO api_usage (endpoint, hour, calls, errors, rate_limited, last_remaining)
+            VALUES (%s, date_trunc('hour', now()), 1, %s, %s, %s)
+            ON CONFLICT (endpoint, hour) DO UPDATE SET
+              calls          = api_usage.calls + 1,
+              errors         = api_usage.errors + EXCLUDED.errors,
+              rate_limited   = api_usage.rate_limited + EXCLUDED.rate_limited,
+              last_remaining = COALESCE(EXCLUDED.last_remaining, api_usage.last_remaining),
+              updated_at     = now()
+        """, (endpoint, int(status >= 400), int(status == 429), remaining))
+
+
+def calls_this_hour() -> int:
+    with ledger_conn().cursor() as cur:
+        cur.execute("SELECT COALESCE(SUM(calls), 0) FROM api_usage WHERE hour = date_trunc('hour', now())")
+        return int(cur.fetchone()[0])
+
+
+def _api_window_open() -> bool:
+    return (_window["remaining"] is not None and _window["resets_at"] is not None
+            and time.monotonic() < _window["resets_at"])
+
+
+def remaining_budget() -> int:
+    """Calls left in the current window (minus reserved ones), preferring what the API last reported."""
+    with _lock:
+        if _api_window_open():
+            left = _window["remaining"]
+        else:
+            left = QUOTA_PER_HOUR - calls_this_hour()
+        return left - QUOTA_RESERVE - _window["reserved"]
+
+
+def seconds_until_reset() -> float:
+    with _lock:
+        if _api_window_open():
+            return _window["resets_at"] - time.monotonic()
+        with ledger_conn().cursor() as cur:
+            cur.execute("SELECT extract(epoch FROM date_trunc('hour', now()) + interval '1 hour' - now())")
+            return float(cur.fetchone()[0])
+
+
+def pause_until_reset(reason: str):
+    wait = seconds_until_reset() + 1
+    resume_at = (datetime.now() + timedelta(seconds=wait)).strftime("%H:%M:%S")
+    print(f"  ⏸️  {reason} - pausing {wait:.0f}s, resuming at {resume_at}")
+    time.sleep(wait)
+    with _lock:
+        if _window["resets_at"] is not None and time.monotonic() >= _window["resets_at"]:
+            _window["remaining"] = None
+            _window["resets_at"] = None
+    print("  ▶️  Quota window reset, resuming")
+
+
+def wait_for_budget():
+    """
+    Block until a call fits in the quota window, then reserve it. The
+    reservation is released by record_call (or release_call if the call
+    failed without a response).
+    """
+    while True:
+        with _lock:
+            if remaining_budget() > 0:
+                _window["reserved"] += 1
+                return
+        pause_until_reset("API quota window spent")
+
+
+def season_priority(season: dict, today: date | None = None) -> int:
+    """0 = current season, 1 = recently finished, 2 = history."""
+    today = today or date.today()
+    if not season.get("finished"):
+        return 0
+    ending_at = season.get("ending_at")
+    if ending_at and (today - ending_at).days <= RECENT_DAYS:
+        return 1
+    return 2
+
+
+def plan_season_fetches(conn, league_id: int, calls_per_season: int = 2) -> list[dict]:
+    """
+    Seasons to fetch, highest priority first: the running season, then
+    recently finished ones, then history (newest first within each group).
+    Prints how many fit in the current quota window; the rest run after
+    the fetcher pauses for a reset.
+    """
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT season_id, name, starting_at, ending_at, finished
+            FROM seasons
+            WHERE league_id = %s
+              AND (finished = true OR starting_at <= CURRENT_DATE)
+        """, (league_id,))
+        rows = cur.fetchall()
+
+    seasons = [
+        {"id": r[0], "name": r[1], "ending_at": r[3], "finished": bool(r[4])}
+        for r in rows
+    ]
+    for s in seasons:
+        s["priority"] = season_priority(s)
+    seasons.sort(key=lambda s: (s["priority"], -(s["ending_at"] or date.min).toordinal()))
+    for s in seasons:
+        s["ending_at"] = str(s["ending_at"]) if s["ending_at"] else None
+
+    budget = max(remaining_budget(), 0)
+    fit = min(len(seasons), budget // calls_per_season)
+    print(f"Quota plan: {budget} calls left this window, {fit}/{len(seasons)} seasons fit"
+          + ("" if fit == len(seasons) else ", the rest run after the window resets"))
+    return seasons
+
+
+def print_usage(hours: int = 24):
+    with ledger_conn().cursor() as cur:
+        cur.execute("""
+            SELECT hour, endpoint, calls, errors, rate_limited, last_remaining
+            FROM api_usage
+            WHERE hour >= date_trunc('hour', now()) - make_interval(hours => %s)
+            ORDER BY hour DESC, calls DESC
+        """, (hours,))
+        rows = cur.fetchall()
+
+    print(f"\n{'hour':<17} {'endpoint':<32} {'calls':>6} {'errors':>6} {'429s':>5} {'remaining':>9}")
+    for hour, endpoint, calls, errors, limited, remaining in rows:
+        rem = "" if remaining is None else remaining
+        print(f"{hour:%Y-%m-%d %H:%M} {endpoint:<32} {calls:>6} {errors:>6} {limited:>5} {rem:>9}")
+    print(f"\nThis hour: {calls_this_hour()}/{QUOTA_PER_HOUR} calls")
+
+
+def main():
+    print_usage(int(sys.argv[1]) if len(sys.argv) > 1 else 24)
+
+
+if __name__ == "__main__":
+    main()
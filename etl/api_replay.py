@@ -0,0 +1,276 @@
+"""
+Record/replay of SportMonks traffic for offline, deterministic reruns.
+
+ETL_API_MODE selects how fetchers reach the API (via api_replay.get):
+  live    (default) requests over a shared keep-alive session
+  record  live, and every request/response pair is appended to
+          the archive, with the api token stripped (flushed every
+          RECORD_FLUSH_ENTRIES responses or RECORD_FLUSH_SECONDS, and
+          at exit)
+  replay  responses are served from the archive in-process; no network
+
+The archive (ETL_API_ARCHIVE, default etl/replay/sportmonks.jsonl.gz) is
+gzipped JSON lines keyed by the path relative to SPORTMONKS_BASE_URL plus
+the sorted query params (api_token excluded). The last recording of a key
+wins. Requests missing from the archive replay as 404.
+
+Fault injection in replay (in-process and server):
+  ETL_REPLAY_LATENCY_MS   added latency per response (default 0)
+  ETL_REPLAY_ERROR_RATE   fraction answered 503 (default 0)
+  ETL_REPLAY_429_RATE     fraction answered 429 (default 0)
+  ETL_REPLAY_SEED         RNG seed, so injected faults repeat (default 0)
+
+Loopback server (point SPORTMONKS_BASE_URL at it, ETL_API_MODE=live):
+  python etl/api_replay.py serve [--port 8765] [--latency-ms 50] [--error-rate 0.05]
+  python etl/api_replay.py stats
+"""
+
+import os
+import re
+import sys
+import gzip
+import atexit
+import json
+import time
+import random
+import argparse
+import threading
+from urllib.parse import urlsplit, parse_qsl
+from dotenv import load_dotenv
+
+HERE = os.path.dirname(__file__)
+load_dotenv(os.path.join(HERE, ".env"))
+
+BASE = os.getenv("SPORTMONKS_BASE_URL", "https://api.sportmonks.com/v3/football").rstrip("/")
+ARCHIVE = os.getenv("ETL_API_ARCHIVE", os.path.join(HERE, "replay", "sportmonks.jsonl.gz"))
+
+TOKEN_RE = re.compile(r"(api_token=)[^&\"'\s]+")
+
+RECORD_FLUSH_ENTRIES = 200
+RECORD_FLUSH_SECONDS = 60.0
+
+_lock = threading.Lock()
+_flush_lock = threading.Lock()  # one writer appends to the archive at a time
+_archive = None
+_recorded = []
+_last_flush = time.monotonic()
+_flush_registered = False
+_injector = None
+_session = None
+
+
+def mode() -> str:
+    value = os.getenv("ETL_API_MODE", "live").lower()
+    if value not in ("live", "record", "replay"):
+        raise ValueError(f"Unknown ETL_API_MODE '{value}' (expected live, record or replay)")
+    return value
+
+
+def replaying() -> bool:
+    return mode() == "replay"
+
+
+def request_key(path: str, params: dict) -> str:
+    """'topscorers/seasons/23614?filters=...&include=...' (no token, params sorted)."""
+    query = "&".join(f"{k}={v}" for k, v in sorted(params.items()) if k != "api_token")
+    return f"{path.strip('/')}?{query}"
+
+
+def url_path(url: str) -> str:
+    """Path relative to the configured base URL."""
+    if url.startswith(BASE):
+        return url[len(BASE):]
+    return urlsplit(url).path
+
+
+def load_archive(path: str = ARCHIVE) -> dict[str, dict]:
+    entries = {}
+    if not os.path.exists(path):
+        return entries
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                entry = json.loads(line)
+                entries[entry["key"]] = entry
+    return entries
+
+
+def record(key: str, status: int, body: bytes, elapsed: float):
+    """
+    Buffer one exchange. The buffer is appended to the archive as one gzip
+    member once it is large or old enough, so long-running processes (the
+    daemon) don't hold every response until exit.
+    """
+    global _flush_registered
+    entry = {
+        "key": key,
+        "status": status,
+        "elapsed_ms": round(elapsed * 1000, 1),
+        "body": TOKEN_RE.sub(r"\1REDACTED", body.decode("utf-8", errors="replace")),
+    }
+    with _lock:
+        if not _flush_registered:
+            atexit.register(flush_recording)
+            _flush_registered = True
+        _recorded.append(entry)
+        due = (len(_recorded) >= RECORD_FLUSH_ENTRIES
+               or time.monotonic() - _last_flush >= RECORD_FLUSH_SECONDS)
+    if due:
+        flush_recording()
+
+
+def flush_recording(path: str = ARCHIVE):
+    global _last_flush
+    with _lock:
+        entries = list(_recorded)
+        _recorded.clear()
+        _last_flush = time.monotonic()
+    if not entries:
+        return
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    # Appending a gzip member keeps the file a valid gzip stream
+    with _flush_lock, gzip.open(path, "at", encoding="utf-8") as f:
+        for entry in entries:
+            f.write(json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n")
+    print(f"Recorded {len(entries)} responses to {path}")
+
+
+class FaultInjector:
+    """Seeded latency/error injection shared by in-process replay and the server."""
+
+    def __init__(self, latency_ms: float = 0.0, error_rate: float = 0.0, rate_limit_rate: float = 0.0,
+                 seed: int = 0):
+        self.latency_ms = latency_ms
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "FaultInjector":
+        return cls(
+            latency_ms=float(os.getenv("ETL_REPLAY_LATENCY_MS", "0")),
+            error_rate=float(os.getenv("ETL_REPLAY_ERROR_RATE", "0")),
+            rate_limit_rate=float(os.getenv("ETL_REPLAY_429_RATE", "0")),
+            seed=int(os.getenv("ETL_REPLAY_SEED", "0")),
+        )
+
+    def respond(self, entry: dict | None) -> tuple[int, bytes]:
+        with self._lock:
+            roll = self._rng.random()
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+        if roll < self.rate_limit_rate:
+            return 429, b'{"message":"Too Many Attempts. (injected)"}'
+        if roll < self.rate_limit_rate + self.error_rate:
+            return 503, b'{"message":"Service Unavailable (injected)"}'
+        if entry is None:
+            return 404, b'{"message":"Not in replay archive"}'
+        return entry["status"], entry["body"].encode("utf-8")
+
+
+def make_response(url: str, status: int, body: bytes):
+    import requests
+
+    r = requests.Response()
+    r.status_code = status
+    r._content = body
+    r.url = url
+    r.reason = {200: "OK", 404: "Not Found", 429: "Too Many Requests", 503: "Service Unavailable"}.get(status, "")
+    r.headers["Content-Type"] = "application/json"
+    return r
+
+
+def session():
+    """Process-wide requests.Session, so repeated calls reuse keep-alive connections."""
+    global _session
+    with _lock:
+        if _session is None:
+            import requests
+            _session = requests.Session()
+    return _session
+
+
+def get(url: str, params: dict, timeout: float = 30):
+    """Drop-in for requests.get(url, params=..., timeout=...) honouring ETL_API_MODE."""
+    global _archive, _injector
+    current = mode()
+    key = request_key(url_path(url), params)
+
+    if current == "replay":
+        with _lock:
+            if _archive is None:
+                _archive = load_archive()
+                _injector = FaultInjector.from_env()
+        status, body = _injector.respond(_archive.get(key))
+        return make_response(url, status, body)
+
+    t0 = time.perf_counter()
+    r = session().get(url, params=params, timeout=timeout)
+    if current == "record":
+        record(key, r.status_code, r.content, time.perf_counter() - t0)
+    return r
+
+
+def serve(port: int, injector: FaultInjector):
+    from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+    archive = load_archive()
+    print(f"Replaying {len(archive)} responses from {ARCHIVE} on http://127.0.0.1:{port}")
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, fmt, *args):
+            pass
+
+        def do_GET(self):
+            parts = urlsplit(self.path)
+            key = request_key(parts.path, dict(parse_qsl(parts.query)))
+            status, body = injector.respond(archive.get(key))
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    ThreadingHTTPServer(("127.0.0.1", port), Handler).serve_forever()
+
+
+def print_stats():
+    archive = load_archive()
+    if not archive:
+        print(f"No archive at {ARCHIVE}")
+        return
+    size = os.path.getsize(ARCHIVE)
+    raw = sum(len(e["body"].encode("utf-8")) for e in archive.values())
+    print(f"{ARCHIVE}: {len(archive)} responses, {raw / 1024:.0f} KB raw, {size / 1024:.0f} KB on disk")
+    by_path = {}
+    for key in archive:
+        endpoint = re.sub(r"/\d+(?=/|\?|$)", "/{id}", key.split("?")[0])
+        by_path[endpoint] = by_path.get(endpoint, 0) + 1
+    for endpoint, count in sorted(by_path.items()):
+        print(f"  {endpoint:<40} {count:>5}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SportMonks record/replay archive.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_serve = sub.add_parser("serve", help="Serve the archive on a loopback port")
+    p_serve.add_argument("--port", type=int, default=8765)
+    p_serve.add_argument("--latency-ms", type=float, default=float(os.getenv("ETL_REPLAY_LATENCY_MS", "0")))
+    p_serve.add_argument("--error-rate", type=float, default=float(os.getenv("ETL_REPLAY_ERROR_RATE", "0")))
+    p_serve.add_argument("--rate-limit-rate", type=float, default=float(os.getenv("ETL_REPLAY_429_RATE", "0")))
+    p_serve.add_argument("--seed", type=int, default=int(os.getenv("ETL_REPLAY_SEED", "0")))
+    sub.add_parser("stats", help="Summarise the archive")
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        serve(args.port, FaultInjector(args.latency_ms, args.error_rate, args.rate_limit_rate, args.seed))
+    else:
+        print_stats()
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        sys.exit(0)
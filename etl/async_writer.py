@@ -0,0 +1,161 @@
+"""
+asyncio/asyncpg database backend for the loaders.
+
+Same upsert semantics as load_all_seasons.upsert_players / upsert_stats, but:
+  - rows go over the wire with binary COPY into temp staging tables,
+  - many seasons are written concurrently over a small connection pool, so
+    parsing one season overlaps with network round-trips for others.
+
+Selected in load_all_seasons.py with ETL_DB_BACKEND=asyncpg
+(ETL_ASYNC_POOL_SIZE connections, default 4). Each season's files are
+written in one transaction on one pooled connection.
+"""
+
+import os
+import asyncio
+import asyncpg
+
+import json_codec
+import load_all_seasons as las
+import player_hashes
+import schema
+
+PLAYER_COLUMNS = list(las.PLAYER_COLUMNS)
+STATS_COLUMNS = list(las.STATS_COLUMNS)
+
+
+def pool_size() -> int:
+    return int(os.getenv("ETL_ASYNC_POOL_SIZE", "4"))
+
+
+async def create_pool(size: int | None = None) -> asyncpg.Pool:
+    size = size or pool_size()
+    return await asyncpg.create_pool(
+        host=os.getenv("DB_HOST"),
+        port=int(os.getenv("DB_PORT", "5432")),
+        database=os.getenv("DB_NAME"),
+        user=os.getenv("DB_USER"),
+        password=os.getenv("DB_PASS"),
+        min_size=size,
+        max_size=size,
+        init=_init_connection,
+    )
+
+
+async def _init_connection(conn: asyncpg.Connection):
+    await conn.execute(las.STAGE_DDL)
+
+
+async def upsert_players(conn: asyncpg.Connection, player_rows):
+    """Insert or update player records (binary COPY + INSERT ... SELECT)."""
+    if not player_rows:
+        return
+    await conn.execute("TRUNCATE stage_players")
+    await conn.copy_records_to_table("stage_players", records=player_rows, columns=PLAYER_COLUMNS)
+    await conn.execute("""
+        INSERT INTO players (player_id, name, nationality, position)
+        SELECT player_id, name, nationality, position FROM stage_players
+        ORDER BY player_id
+        ON CONFLICT (player_id) DO UPDATE SET
+          name = EXCLUDED.name
+        WHERE players.name IS DISTINCT FROM EXCLUDED.name
+    """)
+
+
+async def upsert_stats(conn: asyncpg.Connection, stat_rows, stat: str):
+    """Insert or update player season stats (binary COPY + INSERT ... SELECT)."""
+    if not stat_rows:
+        return
+    update_set = las.stats_update_set(stat)
+    await conn.execute("TRUNCATE stage_stats")
+    await conn.copy_records_to_table("stage_stats", records=stat_rows, columns=STATS_COLUMNS)
+    await conn.execute(f"""
+        INSERT INTO player_season_stats ({", ".join(STATS_COLUMNS)})
+        SELECT {", ".join(STATS_COLUMNS)} FROM stage_stats
+        ON CONFLICT (player_id, league_id, season) DO UPDATE SET
+          {update_set}
+    """)
+
+
+async def season_start_years(pool: asyncpg.Pool, season_ids) -> dict[int, int]:
+    rows = await pool.fetch(
+        "SELECT season_id, starting_at FROM seasons WHERE season_id = ANY($1::bigint[]) AND starting_at IS NOT NULL",
+        list(season_ids),
+    )
+    return {int(r["season_id"]): int(str(r["starting_at"])[:4]) for r in rows}
+
+
+async def load_season(pool: asyncpg.Pool, season_id: int, season_year: int, paths: list[str]) -> list[tuple]:
+    """
+    Parse and write one season's files in a single transaction.
+    Returns one (path, stat, players, rows) tuple per file.
+
+    All of the season's players go out in one statement in player_id order, so
+    concurrent seasons sharing players always lock rows in the same order
+    and can't deadlock each other.
+    """
+    parsed = []
+    season_players = {}
+    for path in paths:
+        _, stat = las.parse_filename(path)
+        rows = json_codec.load_topscorer_rows(path)
+        players, stats = las.build_rows(rows, stat, season_id, season_year)
+        parsed.append((path, stat, players, stats))
+        season_players.update((p[0], p) for p in players)
+        await asyncio.sleep(0)  # let other seasons' I/O progress between files
+
+    changed = player_hashes.CACHE.changed(list(season_players.values()), unit=season_id)
+    try:
+        async with pool.acquire() as conn:
+            async with conn.transaction():
+                await conn.execute(schema.league_lock_sql(las.LEAGUE_ID))
+                await upsert_players(conn, changed)
+                for _, stat, _, stats in parsed:
+                    await upsert_stats(conn, stats, stat)
+    except Exception:
+        player_hashes.CACHE.rollback(season_id)
+        raise
+    player_hashes.CACHE.commit(season_id)
+
+    return [(path, stat, len(players), len(stats)) for path, stat, players, stats in parsed]
+
+
+async def load_files(files: list[str], size: int | None = None) -> list[tuple]:
+    """
+    Load files grouped by season, up to `size` seasons in flight at once.
+    Returns (paths, season_id, result_or_exception) per season, in season order.
+    """
+    by_season: dict[int, list[str]] = {}
+    results = []
+    for path in files:
+        try:
+            season_id, _ = las.parse_filename(path)
+        except ValueError as e:
+            results.append(([path], None, e))
+            continue
+        by_season.setdefault(season_id, []).append(path)
+
+    pool = await create_pool(size)
+    try:
+        years = await season_start_years(pool, by_season)
+        if player_hashes.CACHE.known is None:
+            player_hashes.CACHE.seed(tuple(r) for r in await pool.fetch(player_hashes.HASH_SQL))
+
+        async def run(season_id: int, paths: list[str]):
+            if season_id not in years:
+                raise ValueError(f"Missing seasons.starting_at for season_id={season_id}. Run upsert_epl_seasons_from_2000.py first.")
+            return await load_season(pool, season_id, years[season_id], paths)
+
+        season_ids = sorted(by_season)
+        outcomes = await asyncio.gather(
+            *(run(sid, by_season[sid]) for sid in season_ids),
+            return_exceptions=True,
+        )
+        results += [(by_season[sid], sid, out) for sid, out in zip(season_ids, outcomes)]
+    finally:
+        await pool.close()
+    return results
+
+
+def run_load(files: list[str]) -> list[tuple]:
+    return asyncio.run(load_files(files))
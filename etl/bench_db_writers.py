@@ -0,0 +1,78 @@
+"""
+Throughput comparison of the psycopg2 and asyncpg loader backends.
+
+Loads the latest raw batch with each backend against the database in DB_*
+(point it at a local Postgres). The upserts are idempotent, so rerunning
+leaves the data as a normal load would.
+
+Usage:
+  python etl/bench_db_writers.py [--repeat 3] [--pool-sizes 1,2,4,8]
+"""
+
+import time
+import argparse
+
+import load_all_seasons as las
+import async_writer
+
+
+def run_psycopg2(files: list[str]) -> int:
+    conn = las.get_conn()
+    try:
+        rows = 0
+        for path in files:
+            _, _, _, s_count = las.load_one_file(conn, path)
+            conn.commit()
+            rows += s_count
+        return rows
+    finally:
+        conn.close()
+
+
+def run_asyncpg(files: list[str], pool_size: int) -> int:
+    import asyncio
+    rows = 0
+    for _, _, outcome in asyncio.run(async_writer.load_files(files, size=pool_size)):
+        if isinstance(outcome, Exception):
+            raise outcome
+        rows += sum(r[3] for r in outcome)
+    return rows
+
+
+def best_of(repeat: int, fn) -> tuple[float, int]:
+    best = float("inf")
+    rows = 0
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        rows = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare loader DB backends.")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--pool-sizes", default="1,2,4,8")
+    args = parser.parse_args()
+
+    files = las.list_batch_files(las.get_latest_batch())
+    if not files:
+        raise SystemExit("No raw files to load.")
+
+    print(f"\n{'='*60}")
+    print("  DB WRITER BENCHMARK")
+    print(f"{'='*60}")
+    print(f"  Files: {len(files)} | best of {args.repeat}\n")
+
+    base_s, rows = best_of(args.repeat, lambda: run_psycopg2(files))
+    print(f"  {'psycopg2 (serial)':<22} {base_s:>7.2f}s {rows / base_s:>9.0f} rows/s")
+
+    for size in (int(x) for x in args.pool_sizes.split(",")):
+        elapsed, rows = best_of(args.repeat, lambda: run_asyncpg(files, size))
+        print(f"  {f'asyncpg pool={size}':<22} {elapsed:>7.2f}s {rows / elapsed:>9.0f} rows/s  x{base_s / elapsed:.1f}")
+
+    print(f"{'='*60}\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Benchmark the JSON codecs in json_codec.py on the etl/raw corpus.
+
+For every installed backend it measures, over all raw files:
+  - decode     : bytes -> dicts
+  - rows       : bytes -> topscorer row tuples (typed decoding for msgspec)
+  - encode     : dicts -> bytes, indented and compact
+  - size       : bytes written per mode
+
+Usage:
+  python etl/bench_json_codecs.py [--repeat 5] [--raw-dir etl/raw]
+"""
+
+import os
+import glob
+import time
+import argparse
+
+import json_codec
+
+HERE = os.path.dirname(__file__)
+RAW_DIR = os.path.join(HERE, "raw")
+
+
+def read_corpus(raw_dir: str) -> list[bytes]:
+    files = sorted(glob.glob(os.path.join(raw_dir, "*.json")))
+    blobs = []
+    for path in files:
+        with open(path, "rb") as f:
+            blobs.append(f.read())
+    return blobs
+
+
+def best_of(repeat: int, fn) -> float:
+    """Run fn `repeat` times and return the fastest wall time in seconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def bench_codec(codec, blobs: list[bytes], payloads: list, repeat: int) -> dict:
+    decode_s = best_of(repeat, lambda: [codec.loads(b) for b in blobs])
+    rows_s = best_of(repeat, lambda: [json_codec.decode_topscorers(b, codec) for b in blobs])
+    indent_s = best_of(repeat, lambda: [codec.dumps(p) for p in payloads])
+    compact_s = best_of(repeat, lambda: [codec.dumps(p, compact=True) for p in payloads])
+
+    return {
+        "decode": decode_s,
+        "rows": rows_s,
+        "encode_indent": indent_s,
+        "encode_compact": compact_s,
+        "bytes_indent": sum(len(codec.dumps(p)) for p in payloads),
+        "bytes_compact": sum(len(codec.dumps(p, compact=True)) for p in payloads),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare JSON codecs on the raw corpus.")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--raw-dir", default=RAW_DIR)
+    args = parser.parse_args()
+
+    blobs = read_corpus(args.raw_dir)
+    if not blobs:
+        raise SystemExit(f"No raw files found in {args.raw_dir}")
+
+    payloads = [json_codec.StdlibCodec().loads(b) for b in blobs]
+    corpus_bytes = sum(len(b) for b in blobs)
+
+    print(f"\n{'='*60}")
+    print("  JSON CODEC BENCHMARK")
+    print(f"{'='*60}")
+    print(f"  Files: {len(blobs)} | Corpus: {corpus_bytes / 1024:.0f} KiB | Repeat: best of {args.repeat}\n")
+
+    results = {}
+    for name in json_codec.BACKENDS:
+        try:
+            codec = json_codec.make_codec(name)
+        except ImportError:
+            print(f"  (skipping {name}: not installed)")
+            continue
+        results[name] = bench_codec(codec, blobs, payloads, args.repeat)
+
+    baseline = results["json"]
+    header = f"  {'codec':<8} {'decode':>9} {'rows':>9} {'enc+ind':>9} {'enc+cmp':>9} {'KiB ind':>8} {'KiB cmp':>8}"
+    print(header)
+    print("  " + "-" * (len(header) - 2))
+    for name, r in results.items():
+        print(
+            f"  {name:<8} "
+            f"{r['decode'] * 1000:>7.1f}ms "
+            f"{r['rows'] * 1000:>7.1f}ms "
+            f"{r['encode_indent'] * 1000:>7.1f}ms "
+            f"{r['encode_compact'] * 1000:>7.1f}ms "
+            f"{r['bytes_indent'] / 1024:>8.0f} "
+            f"{r['bytes_compact'] / 1024:>8.0f}"
+        )
+
+    print("\n  Speed-up vs stdlib json:")
+    for name, r in results.items():
+        if name == "json":
+            continue
+        print(
+            f"  {name:<8} decode x{baseline['decode'] / r['decode']:.1f} | "
+            f"rows x{baseline['rows'] / r['rows']:.1f} | "
+            f"encode x{baseline['encode_indent'] / r['encode_indent']:.1f}"
+        )
+    saved = 1 - baseline["bytes_compact"] / baseline["bytes_indent"]
+    print(f"\n  Compact mode saves {saved:.0%} of raw file bytes.")
+    print(f"{'='*60}\n")
+
+
+if __name__ == "__main__":
+    main()
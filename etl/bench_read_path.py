@@ -0,0 +1,306 @@
+"""
+Load test and plan check for the dashboard's read queries.
+
+Replays the SQL from dashboard/lib/db.ts (getTopScorers, getTopAssistProviders,
+getSeasonTotals, getSeasons) from concurrent connections against the
+database in DB_* and reports p50/p95/p99 latency and QPS per query. Each
+query's EXPLAIN (ANALYZE, BUFFERS) is printed, and the run exits non-zero if
+any plan uses a sequential scan that filters rows out.
+
+--seed adds synthetic history under league ids from SYNTH_LEAGUE_BASE (and
+player ids from SYNTH_PLAYER_BASE) so the tables are big enough for the
+planner to behave as it would in production; --drop removes it again.
+Point DB_* at a local Postgres.
+
+Usage:
+  python etl/bench_read_path.py --seed [--leagues 20 --seasons 25 --players 600]
+  python etl/bench_read_path.py [--concurrency 8] [--duration 10]
+  python etl/bench_read_path.py --drop
+"""
+
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+
+import load_all_seasons as las
+import schema
+
+SYNTH_LEAGUE_BASE = 900_000
+SYNTH_PLAYER_BASE = 9_000_000_000
+SYNTH_SEASON_BASE = 900_000_000
+
+# Kept identical to dashboard/lib/db.ts ($n -> %s)
+QUERIES = {
+    "getTopScorers": """
+    SELECT
+      p.player_id,
+      p.name,
+      s.team_name,
+      COALESCE(s.goals, 0) as goals,
+      COALESCE(s.assists, 0) as assists
+    FROM players p
+    JOIN player_season_stats s ON p.player_id = s.player_id
+    WHERE s.league_id = %s AND s.season_id = %s AND s.goals > 0
+    ORDER BY s.goals_rank ASC NULLS LAST, s.goals DESC
+    LIMIT %s""",
+    "getTopAssistProviders": """
+    SELECT
+      p.player_id,
+      p.name,
+      s.team_name,
+      COALESCE(s.goals, 0) as goals,
+      COALESCE(s.assists, 0) as assists
+    FROM players p
+    JOIN player_season_stats s ON p.player_id = s.player_id
+    WHERE s.league_id = %s AND s.season_id = %s AND s.assists > 0
+    ORDER BY s.assists_rank ASC NULLS LAST, s.assists DESC
+    LIMIT %s""",
+    "getSeasonTotals": """
+    SELECT
+      COALESCE(SUM(goals), 0) as total_goals,
+      COALESCE(SUM(assists), 0) as total_assists
+    FROM player_season_stats
+    WHERE league_id = %s AND season_id = %s""",
+    "getSeasons": """
+    SELECT DISTINCT s.season_id::text
+    FROM player_season_stats s
+    WHERE s.league_id = %s""",
+}
+
+
+def query_params(name: str, league_id: int, season_id: int) -> tuple:
+    if name in ("getTopScorers", "getTopAssistProviders"):
+        return (league_id, season_id, 25)
+    if name == "getSeasonTotals":
+        return (league_id, season_id)
+    return (league_id,)
+
+
+def seed(conn, leagues: int, seasons: int, players: int):
+    """Synthetic leagues: `players` per season drawn from a per-league pool, with ranks."""
+    for league in range(leagues):
+        schema.ensure_league_partition(conn, SYNTH_LEAGUE_BASE + league)
+    with conn.cursor() as cur:
+        cur.execute("""
+            INSERT INTO players (player_id, name, nationality, position)
+            SELECT %(pbase)s + g, 'Synthetic Player ' || g, 'Nowhere', 'Forward'
+            FROM generate_series(0, %(leagues)s * %(players)s * 2 - 1) g
+            ON CONFLICT (player_id) DO NOTHING
+        """, {"pbase": SYNTH_PLAYER_BASE, "leagues": leagues, "players": players})
+        cur.execute("""
+            WITH rows AS (
+              SELECT %(lbase)s + l AS league_id, 2000 + y AS season,
+                     %(sbase)s + l * 1000 + y AS season_id,
+                     %(pbase)s + l * %(players)s * 2 + ((p + y * 37) %% (%(players)s * 2)) AS player_id,
+                     'Team ' || (p %% 20) AS team_name,
+                     CASE WHEN random() < 0.4 THEN (random() * 25)::int ELSE 0 END AS goals,
+                     CASE WHEN random() < 0.4 THEN (random() * 15)::int ELSE 0 END AS assists
+              FROM generate_series(0, %(leagues)s - 1) l,
+                   generate_series(0, %(seasons)s - 1) y,
+                   generate_series(0, %(players)s - 1) p
+            )
+            INSERT INTO player_season_stats
+              (player_id, league_id, season, season_id, team_name, goals, assists, minutes,
+               goals_rank, goals_dense_rank, assists_rank, assists_dense_rank)
+            SELECT player_id, league_id, season, season_id, team_name, goals, assists, 0,
+                   CASE WHEN goals > 0 THEN rank() OVER wg END,
+                   CASE WHEN goals > 0 THEN dense_rank() OVER wg END,
+                   CASE WHEN assists > 0 THEN rank() OVER wa END,
+                   CASE WHEN assists > 0 THEN dense_rank() OVER wa END
+            FROM rows
+            WINDOW wg AS (PARTITION BY league_id, season_id ORDER BY goals DESC),
+                   wa AS (PARTITION BY league_id, season_id ORDER BY assists DESC)
+            ON CONFLICT (player_id, league_id, season) DO NOTHING
+        """, {"lbase": SYNTH_LEAGUE_BASE, "sbase": SYNTH_SEASON_BASE, "pbase": SYNTH_PLAYER_BASE,
+              "leagues": leagues, "seasons": seasons, "players": players})
+        inserted = cur.rowcount
+    conn.commit()
+    analyze(conn)
+    print(f"✅ Seeded {inserted} stat rows ({leagues} leagues x {seasons} seasons x {players} players)")
+
+
+def drop(conn):
+    """Synthetic leagues' partitions are detached and dropped whole (no dead tuples elsewhere)."""
+    stats = 0
+    with conn.cursor() as cur:
+        for league_id in sorted(schema.partitions(conn) if schema.is_partitioned(conn) else []):
+            if league_id >= SYNTH_LEAGUE_BASE:
+                name = schema.detach_partition(conn, league_id)
+                cur.execute(f"SELECT COUNT(*) FROM {name}")
+                stats += cur.fetchone()[0]
+                cur.execute(f"DROP TABLE {name}")
+        cur.execute("DELETE FROM player_season_stats WHERE league_id >= %s", (SYNTH_LEAGUE_BASE,))
+        stats += cur.rowcount
+        cur.execute("DELETE FROM players WHERE player_id >= %s", (SYNTH_PLAYER_BASE,))
+    conn.commit()
+    analyze(conn)
+    print(f"✅ Removed {stats} synthetic stat rows")
+
+
+def analyze(conn):
+    conn.autocommit = True
+    with conn.cursor() as cur:
+        cur.execute("ANALYZE players")
+        cur.execute("ANALYZE player_season_stats")
+    conn.autocommit = False
+
+
+def targets(conn) -> list[tuple[int, int]]:
+    """Every (league_id, season_id) with data; the load mixes real and synthetic seasons."""
+    with conn.cursor() as cur:
+        cur.execute("SELECT DISTINCT league_id, season_id FROM player_season_stats WHERE season_id IS NOT NULL")
+        rows = cur.fetchall()
+    conn.rollback()
+    return rows
+
+
+def seq_scans(plan: dict) -> list[str]:
+    """
+    Relations read by a Seq Scan that discards rows. Reading a whole league
+    partition whose rows all qualify (e.g. getSeasons after pruning) is the
+    cheapest plan, not a regression.
+    """
+    found = []
+    if plan.get("Node Type") == "Seq Scan" and plan.get("Rows Removed by Filter", 1) > 0:
+        found.append(plan.get("Relation Name", "?"))
+    for child in plan.get("Plans", []):
+        found.extend(seq_scans(child))
+    return found
+
+
+def explain(conn, name: str, params: tuple) -> tuple[str, list[str]]:
+    """EXPLAIN (ANALYZE, BUFFERS) as text, plus relations read by a Seq Scan."""
+    with conn.cursor() as cur:
+        cur.execute("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + QUERIES[name], params)
+        plan = cur.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        cur.execute("EXPLAIN (ANALYZE, BUFFERS) " + QUERIES[name], params)
+        text = "\n".join(r[0] for r in cur.fetchall())
+    conn.rollback()
+    return text, seq_scans(plan[0]["Plan"])
+
+
+def worker(picks: list[tuple[int, int]], deadline: float, latencies: dict, lock, seed_value: int):
+    rng = random.Random(seed_value)
+    names = list(QUERIES)
+    local = {name: [] for name in names}
+    conn = las.get_conn()
+    conn.autocommit = True  # like node-postgres: each query is its own transaction
+    try:
+        with conn.cursor() as cur:
+            while time.perf_counter() < deadline:
+                name = rng.choice(names)
+                league_id, season_id = rng.choice(picks)
+                t0 = time.perf_counter()
+                cur.execute(QUERIES[name], query_params(name, league_id, season_id))
+                cur.fetchall()
+                local[name].append(time.perf_counter() - t0)
+    finally:
+        conn.close()
+    with lock:
+        for name, values in local.items():
+            latencies[name].extend(values)
+
+
+def percentile(ordered: list[float], p: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+
+
+def run_load(picks, concurrency: int, duration: float) -> dict:
+    latencies = {name: [] for name in QUERIES}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+    threads = [threading.Thread(target=worker, args=(picks, deadline, latencies, lock, i))
+               for i in range(concurrency)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    print(f"\n  {'query':<24} {'n':>7} {'QPS':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    total = 0
+    for name, values in latencies.items():
+        ordered = sorted(values)
+        total += len(ordered)
+        print(f"  {name:<24} {len(ordered):>7} {len(ordered) / elapsed:>8.0f} "
+              f"{percentile(ordered, 50) * 1000:>8.2f} {percentile(ordered, 95) * 1000:>8.2f} "
+              f"{percentile(ordered, 99) * 1000:>8.2f}")
+    print(f"  {'total':<24} {total:>7} {total / elapsed:>8.0f}")
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the dashboard read queries.")
+    parser.add_argument("--seed", action="store_true", help="Insert synthetic multi-league history first")
+    parser.add_argument("--drop", action="store_true", help="Remove the synthetic history and exit")
+    parser.add_argument("--leagues", type=int, default=20)
+    parser.add_argument("--seasons", type=int, default=25)
+    parser.add_argument("--players", type=int, default=600, help="Stat rows per league season")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds")
+    parser.add_argument("--quiet-plans", action="store_true", help="Only print plans that regress")
+    args = parser.parse_args()
+
+    conn = las.get_conn()
+    try:
+        if args.drop:
+            drop(conn)
+            return
+        if args.seed:
+            seed(conn, args.leagues, args.seasons, args.players)
+
+        picks = targets(conn)
+        if not picks:
+            raise SystemExit("No player_season_stats rows; load data or use --seed.")
+        with conn.cursor() as cur:
+            cur.execute("SELECT COUNT(*) FROM player_season_stats")
+            rows = cur.fetchone()[0]
+        conn.rollback()
+
+        print(f"\n{'='*60}")
+        print("  READ PATH BENCHMARK")
+        print(f"{'='*60}")
+        print(f"  {rows} stat rows | {len(picks)} league seasons | "
+              f"{args.concurrency} connections | {args.duration:g}s")
+
+        # Plans for the largest league season, where a bad plan costs the most
+        with conn.cursor() as cur:
+            cur.execute("""
+                SELECT league_id, season_id FROM player_season_stats
+                WHERE season_id IS NOT NULL
+                GROUP BY league_id, season_id ORDER BY COUNT(*) DESC LIMIT 1
+            """)
+            league_id, season_id = cur.fetchone()
+        conn.rollback()
+
+        regressions = []
+        for name in QUERIES:
+            text, scans = explain(conn, name, query_params(name, league_id, season_id))
+            if scans:
+                regressions.append((name, scans))
+            if scans or not args.quiet_plans:
+                print(f"\n  -- {name} (league_id={league_id}, season_id={season_id})")
+                print("\n".join(f"     {line}" for line in text.splitlines()))
+
+        run_load(picks, args.concurrency, args.duration)
+
+        print(f"{'='*60}")
+        if regressions:
+            for name, scans in regressions:
+                print(f"❌ {name}: sequential scan on {', '.join(scans)}")
+            sys.exit(1)
+        print("✅ No sequential scans in the read path")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
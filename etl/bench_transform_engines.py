@@ -0,0 +1,84 @@
+"""
+Compare transform CPU of the python (per-file) and columnar (per-season) engines.
+
+Only the transform runs (no database): raw files -> rows ready for the writer.
+The corpus is replayed --multiplier times to stand in for a multi-league backfill.
+
+Usage:
+  python etl/bench_transform_engines.py [--multiplier 20] [--repeat 3]
+"""
+
+import os
+import glob
+import time
+import argparse
+
+import json_codec
+import load_all_seasons as las
+import columnar_transform as ct
+
+HERE = os.path.dirname(__file__)
+RAW_DIR = os.path.join(HERE, "raw")
+FAKE_SEASON_YEAR = 2000
+
+
+def python_engine(files: list[str]) -> int:
+    rows = 0
+    for path in files:
+        season_id, stat = las.parse_filename(path)
+        _, stats = las.build_rows(json_codec.load_topscorer_rows(path), stat, season_id, FAKE_SEASON_YEAR)
+        rows += len(stats)
+    return rows
+
+
+def columnar_engine(files: list[str]) -> int:
+    rows = 0
+    for season_id, paths in ct.group_season_files(files).items():
+        season = ct.transform_season(season_id, FAKE_SEASON_YEAR, paths)
+        rows += len(ct.stat_rows(season, las.LEAGUE_ID))
+    return rows
+
+
+def timed(fn, files: list[str], multiplier: int, repeat: int) -> tuple[float, int]:
+    best = float("inf")
+    rows = 0
+    for _ in range(repeat):
+        t0 = time.process_time()
+        rows = sum(fn(files) for _ in range(multiplier))
+        best = min(best, time.process_time() - t0)
+    return best, rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark transform engines.")
+    parser.add_argument("--multiplier", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--raw-dir", default=RAW_DIR)
+    args = parser.parse_args()
+
+    files = []
+    for path in sorted(glob.glob(os.path.join(args.raw_dir, "epl_*_*_*.json"))):
+        try:
+            las.parse_filename(path)
+            files.append(path)
+        except ValueError:
+            continue
+    if not files:
+        raise SystemExit(f"No epl_* raw files found in {args.raw_dir}")
+
+    print(f"\n{'='*60}")
+    print("  TRANSFORM ENGINE BENCHMARK (CPU time)")
+    print(f"{'='*60}")
+    print(f"  Files: {len(files) * args.multiplier} | JSON codec: {json_codec.get_codec().name}\n")
+
+    py_s, py_rows = timed(python_engine, files, args.multiplier, args.repeat)
+    col_s, col_rows = timed(columnar_engine, files, args.multiplier, args.repeat)
+
+    print(f"  python   {py_s * 1000:>8.1f}ms  {py_rows:>8} stat rows (one per file row)")
+    print(f"  columnar {col_s * 1000:>8.1f}ms  {col_rows:>8} stat rows (goals + assists merged)")
+    print(f"\n  columnar speed-up: x{py_s / col_s:.1f}")
+    print(f"{'='*60}\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,320 @@
+"""
+Incrementally maintained career aggregates (player_career_stats).
+
+For every season a load touches, the loader snapshots that season's rows
+before writing and then applies only the differences to the career table:
+goal/assist deltas, +/-1 seasons played, and the best season when the touched
+season beats it. Only players whose best season was touched *and* got worse
+are recomputed from their own season rows.
+
+All-time leaderboards are then index reads of `limit` rows (see top_careers).
+
+Usage:
+  python etl/career_stats.py rebuild          # one-off full backfill
+  python etl/career_stats.py top goals [25]   # all-time leaderboard
+"""
+
+import os
+import sys
+import psycopg2
+from dotenv import load_dotenv
+
+HERE = os.path.dirname(__file__)
+load_dotenv(os.path.join(HERE, ".env"))
+
+LEAGUE_ID = 8  # Premier League
+
+CAREER_DDL = """
+CREATE TABLE IF NOT EXISTS player_career_stats (
+  player_id            bigint      NOT NULL,
+  league_id            int         NOT NULL,
+  total_goals          int         NOT NULL DEFAULT 0,
+  total_assists        int         NOT NULL DEFAULT 0,
+  seasons_played       int         NOT NULL DEFAULT 0,
+  best_season          int,
+  best_season_id       bigint,
+  best_season_goals    int,
+  best_season_assists  int,
+  updated_at           timestamptz NOT NULL DEFAULT now(),
+  PRIMARY KEY (player_id, league_id)
+);
+CREATE INDEX IF NOT EXISTS player_career_stats_goals_idx
+  ON player_career_stats (league_id, total_goals DESC)
+  INCLUDE (player_id, total_assists, seasons_played);
+CREATE INDEX IF NOT EXISTS player_career_stats_assists_idx
+  ON player_career_stats (league_id, total_assists DESC)
+  INCLUDE (player_id, total_goals, seasons_played);
+"""
+
+# Per-connection scratch table for "before" images of the seasons being loaded
+SNAPSHOT_DDL = """
+CREATE TEMP TABLE IF NOT EXISTS career_snapshot (
+  league_id int, season_id bigint, player_id bigint, goals int, assists int
+) ON COMMIT DELETE ROWS
+"""
+
+# Best season ordering: most goals, then most assists, then the latest season
+BEST_SEASON_ORDER = "goals DESC, assists DESC, season DESC"
+
+
+def get_conn():
+    return psycopg2.connect(
+        host=os.getenv("DB_HOST"),
+        port=os.getenv("DB_PORT", "5432"),
+        dbname=os.getenv("DB_NAME"),
+        user=os.getenv("DB_USER"),
+        password=os.getenv("DB_PASS"),
+    )
+
+
+def ensure_career_table(conn) -> bool:
+    """Create player_career_stats if missing. Returns True if it was just created."""
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT to_regclass('player_career_stats') IS NULL,
+                   to_regclass('player_career_stats_goals_idx') IS NULL
+                   OR to_regclass('player_career_stats_assists_idx') IS NULL
+        """)
+        missing, incomplete = cur.fetchone()
+        # CREATE INDEX IF NOT EXISTS takes a SHARE lock before it finds the index
+        if missing or incomplete:
+            cur.execute(CAREER_DDL)
+    return missing
+
+
+def rebuild_career_stats(conn, league_id: int = LEAGUE_ID, source: str = "player_season_stats"):
+    """
+    Full recompute for one league (initial backfill or repair). `source` is
+    the table holding the league's season rows, e.g. a shadow partition that
+    is not attached yet.
+    """
+    with conn.cursor() as cur:
+        cur.execute("DELETE FROM player_career_stats WHERE league_id = %s", (league_id,))
+        cur.execute(f"""
+            INSERT INTO player_career_stats
+              (player_id, league_id, total_goals, total_assists, seasons_played,
+               best_season, best_season_id, best_season_goals, best_season_assists)
+            SELECT t.player_id, %(league)s, t.goals, t.assists, t.seasons,
+                   b.season, b.season_id, b.goals, b.assists
+            FROM (
+              SELECT player_id, SUM(COALESCE(goals, 0)) AS goals,
+                     SUM(COALESCE(assists, 0)) AS assists, COUNT(*) AS seasons
+              FROM {source}
+              WHERE league_id = %(league)s
+              GROUP BY player_id
+            ) t
+            JOIN (
+              SELECT DISTINCT ON (player_id) player_id, season, season_id,
+                     COALESCE(goals, 0) AS goals, COALESCE(assists, 0) AS assists
+              FROM {source}
+              WHERE league_id = %(league)s
+              ORDER BY player_id, {BEST_SEASON_ORDER}
+            ) b USING (player_id)
+        """, {"league": league_id})
+
+
+def snapshot_seasons(conn, league_id: int, season_ids):
+    """Record the current rows of the given seasons; call before writing them."""
+    with conn.cursor() as cur:
+        cur.execute(SNAPSHOT_DDL)
+        cur.execute("""
+            INSERT INTO career_snapshot (league_id, season_id, player_id, goals, assists)
+            SELECT league_id, season_id, player_id, COALESCE(goals, 0), COALESCE(assists, 0)
+            FROM player_season_stats
+            WHERE league_id = %s AND season_id = ANY(%s)
+        """, (league_id, list(season_ids)))
+
+
+def apply_season_deltas(conn, league_id: int, season_ids) -> int:
+    """
+    Apply (after - snapshot) for the given seasons to player_career_stats.
+    Returns the number of players whose career row changed.
+    """
+    params = {"league": league_id, "seasons": list(season_ids)}
+    with conn.cursor() as cur:
+        cur.execute("""
+            CREATE TEMP TABLE IF NOT EXISTS career_delta (
+              player_id bigint, season int, season_id bigint, goals int, assists int,
+              d_goals int, d_assists int, d_seasons int, present boolean
+            ) ON COMMIT DELETE ROWS
+        """)
+        cur.execute("TRUNCATE career_delta")
+        cur.execute("""
+            INSERT INTO career_delta
+            SELECT COALESCE(a.player_id, b.player_id),
+                   a.season, COALESCE(a.season_id, b.season_id),
+                   COALESCE(a.goals, 0), COALESCE(a.assists, 0),
+                   COALESCE(a.goals, 0) - COALESCE(b.goals, 0),
+                   COALESCE(a.assists, 0) - COALESCE(b.assists, 0),
+                   (a.player_id IS NOT NULL)::int - (b.player_id IS NOT NULL)::int,
+                   a.player_id IS NOT NULL
+            FROM (
+              SELECT player_id, season, season_id, COALESCE(goals, 0) AS goals, COALESCE(assists, 0) AS assists
+              FROM player_season_stats
+              WHERE league_id = %(league)s AND season_id = ANY(%(seasons)s)
+            ) a
+            FULL JOIN (
+              SELECT player_id, season_id, goals, assists
+              FROM career_snapshot
+              WHERE league_id = %(league)s AND season_id = ANY(%(seasons)s)
+            ) b ON a.player_id = b.player_id AND a.season_id = b.season_id
+            WHERE a.player_id IS NULL OR b.player_id IS NULL
+               OR a.goals <> b.goals OR a.assists <> b.assists
+        """, params)
+
+        # Sum deltas per player (a player can appear in several touched seasons)
+        # and take their best touched season as the best-season candidate.
+        cur.execute(f"""
+            INSERT INTO player_career_stats AS c
+              (player_id, league_id, total_goals, total_assists, seasons_played,
+               best_season, best_season_id, best_season_goals, best_season_assists)
+            SELECT d.player_id, %(league)s, d.d_goals, d.d_assists, d.d_seasons,
+                   b.season, b.season_id, b.goals, b.assists
+            FROM (
+              SELECT player_id, SUM(d_goals) AS d_goals, SUM(d_assists) AS d_assists,
+                     SUM(d_seasons) AS d_seasons
+              FROM career_delta
+              GROUP BY player_id
+            ) d
+            LEFT JOIN (
+              SELECT DISTINCT ON (player_id) player_id, season, season_id, goals, assists
+              FROM career_delta
+              WHERE present
+              ORDER BY player_id, {BEST_SEASON_ORDER}
+            ) b USING (player_id)
+            ORDER BY d.player_id
+            ON CONFLICT (player_id, league_id) DO UPDATE SET
+              total_goals    = c.total_goals + EXCLUDED.total_goals,
+              total_assists  = c.total_assists + EXCLUDED.total_assists,
+              seasons_played = c.seasons_played + EXCLUDED.seasons_played,
+              (best_season, best_season_id, best_season_goals, best_season_assists) = (
+                SELECT v.season, v.season_id, v.goals, v.assists
+                FROM (VALUES
+                  (EXCLUDED.best_season, EXCLUDED.best_season_id, EXCLUDED.best_season_goals, EXCLUDED.best_season_assists),
+                  (c.best_season, c.best_season_id, c.best_season_goals, c.best_season_assists)
+                ) v(season, season_id, goals, assists)
+                ORDER BY v.season IS NULL, v.goals DESC, v.assists DESC, v.season DESC
+                LIMIT 1
+              ),
+              updated_at = now()
+        """, params)
+        changed = cur.rowcount
+
+        # Best season was touched and got worse (or vanished): recompute just those players
+        cur.execute(f"""
+            UPDATE player_career_stats c
+            SET best_season = b.season, best_season_id = b.season_id,
+                best_season_goals = b.goals, best_season_assists = b.assists
+            FROM (
+              SELECT DISTINCT ON (s.player_id) s.player_id, s.season, s.season_id,
+                     COALESCE(s.goals, 0) AS goals, COALESCE(s.assists, 0) AS assists
+              FROM player_season_stats s
+              WHERE s.league_id = %(league)s AND s.player_id IN (
+                SELECT c2.player_id
+                FROM player_career_stats c2
+                JOIN career_delta d ON d.player_id = c2.player_id AND d.season_id = c2.best_season_id
+                WHERE c2.league_id = %(league)s AND (NOT d.present OR d.d_goals < 0 OR d.d_assists < 0)
+              )
+              ORDER BY s.player_id, {BEST_SEASON_ORDER}
+            ) b
+            WHERE c.league_id = %(league)s AND c.player_id = b.player_id
+        """, params)
+
+        cur.execute(
+            "DELETE FROM player_career_stats WHERE league_id = %s AND seasons_played <= 0",
+            (league_id,),
+        )
+        cur.execute(
+            "DELETE FROM career_snapshot WHERE league_id = %(league)s AND season_id = ANY(%(seasons)s)",
+            params,
+        )
+    return changed
+
+
+def recompute_players(conn, league_id: int, season_ids):
+    """
+    Recompute careers of every player appearing in the given seasons from
+    their season rows. Used when no before-snapshot exists (async backend).
+    Only those players' rows are read (player_rank_idx), not the whole league.
+    """
+    params = {"league": league_id, "seasons": list(season_ids)}
+    with conn.cursor() as cur:
+        cur.execute(f"""
+            WITH players_touched AS MATERIALIZED (
+              SELECT DISTINCT player_id FROM player_season_stats
+              WHERE league_id = %(league)s AND season_id = ANY(%(seasons)s)
+            )
+            INSERT INTO player_career_stats AS c
+              (player_id, league_id, total_goals, total_assists, seasons_played,
+               best_season, best_season_id, best_season_goals, best_season_assists)
+            SELECT t.player_id, %(league)s, t.goals, t.assists, t.seasons,
+                   b.season, b.season_id, b.goals, b.assists
+            FROM (
+              SELECT player_id, SUM(COALESCE(goals, 0)) AS goals,
+                     SUM(COALESCE(assists, 0)) AS assists, COUNT(*) AS seasons
+              FROM player_season_stats
+              WHERE league_id = %(league)s AND player_id IN (SELECT player_id FROM players_touched)
+              GROUP BY player_id
+            ) t
+            JOIN (
+              SELECT DISTINCT ON (player_id) player_id, season, season_id,
+                     COALESCE(goals, 0) AS goals, COALESCE(assists, 0) AS assists
+              FROM player_season_stats
+              WHERE league_id = %(league)s AND player_id IN (SELECT player_id FROM players_touched)
+              ORDER BY player_id, {BEST_SEASON_ORDER}
+            ) b USING (player_id)
+            ORDER BY t.player_id
+            ON CONFLICT (player_id, league_id) DO UPDATE SET
+              total_goals = EXCLUDED.total_goals,
+              total_assists = EXCLUDED.total_assists,
+              seasons_played = EXCLUDED.seasons_played,
+              best_season = EXCLUDED.best_season,
+              best_season_id = EXCLUDED.best_season_id,
+              best_season_goals = EXCLUDED.best_season_goals,
+              best_season_assists = EXCLUDED.best_season_assists,
+              updated_at = now()
+        """, params)
+
+
+def top_careers(conn, stat: str = "goals", league_id: int = LEAGUE_ID, limit: int = 25) -> list[tuple]:
+    """All-time leaderboard: (player_id, name, total_goals, total_assists, seasons_played)."""
+    if stat not in ("goals", "assists"):
+        raise ValueError("stat must be 'goals' or 'assists'")
+    with conn.cursor() as cur:
+        cur.execute(f"""
+            SELECT c.player_id, p.name, c.total_goals, c.total_assists, c.seasons_played
+            FROM player_career_stats c
+            JOIN players p ON p.player_id = c.player_id
+            WHERE c.league_id = %s
+            ORDER BY c.total_{stat} DESC
+            LIMIT %s
+        """, (league_id, limit))
+        return cur.fetchall()
+
+
+def main():
+    args = sys.argv[1:]
+    command = args[0] if args else "top"
+
+    conn = get_conn()
+    try:
+        ensure_career_table(conn)
+        if command == "rebuild":
+            rebuild_career_stats(conn)
+            conn.commit()
+            print(f"✅ Rebuilt player_career_stats for league_id={LEAGUE_ID}")
+        elif command == "top":
+            stat = args[1] if len(args) > 1 else "goals"
+            limit = int(args[2]) if len(args) > 2 else 25
+            conn.commit()
+            print(f"\nAll-time top {stat} (league_id={LEAGUE_ID}):")
+            for i, (pid, name, goals, assists, seasons) in enumerate(top_careers(conn, stat, limit=limit), 1):
+                print(f"{i:>3}. {name} — goals={goals} assists={assists} seasons={seasons}")
+        else:
+            raise SystemExit("Usage: career_stats.py [rebuild | top <goals|assists> [limit]]")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
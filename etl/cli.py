@@ -0,0 +1,157 @@
+"""
+Single entry point for the ETL scripts.
+
+  python etl <command> [args...]
+
+Each command maps to an existing script's main(); only the chosen module
+(and its requests/psycopg2 imports) is loaded. Arguments after the command
+are passed to the script as its own argv.
+
+`daemon` stays resident with one keep-alive HTTP session and one warm DB
+connection and runs two schedules:
+  - matchday refresh of the current season every ETL_DAEMON_MATCHDAY_MINUTES
+    (default 5) on ETL_DAEMON_MATCHDAYS (default "sat,sun"),
+  - nightly refresh of all seasons at ETL_DAEMON_NIGHTLY_AT (default "03:00").
+  python etl daemon [--once matchday|nightly]
+"""
+
+import os
+import sys
+import time
+import argparse
+import importlib
+from datetime import datetime, timedelta
+
+COMMANDS = {
+    "seasons": ("upsert_epl_seasons_from_2000", "Upsert EPL seasons from SportMonks"),
+    "fetch": ("fetch_all_seasons", "Fetch goals/assists for all seasons"),
+    "load": ("load_all_seasons", "Load the latest raw batch"),
+    "validate": ("validate_raw", "Validate a raw batch before loading [batch]"),
+    "load-raw": ("load_from_raw", "Load the newest timestamped raw files"),
+    "career": ("career_stats", "Career aggregates: rebuild | top <stat> [limit]"),
+    "history": ("stat_history", "Stat history: asof <season_id> <stat> <date> | trend <player_id> <season_id>"),
+    "export": ("export_parquet", "Export the warehouse to Parquet"),
+    "queue": ("job_queue", "Distributed job queue: enqueue | work | status"),
+    "deadletters": ("dead_letters", "Failed fetch/load units: list | retry [--force]"),
+    "usage": ("api_quota", "API usage ledger report [hours]"),
+    "replay": ("api_replay", "Record/replay archive: serve | stats"),
+    "profiles": ("fetch_profiles", "Payload bytes per fetch profile"),
+    "serve": ("read_service", "Leaderboard read API with NOTIFY-invalidated cache"),
+    "schema": ("schema", "Schema: migrate | status | detach <league_id> | attach <table> <league_id>"),
+    "search": ("player_search", "Player name search: <query> [limit]"),
+    "events": ("match_events", "Fixture events: ingest [--season ID] [--all] [--discover] | load [batch] | check"),
+    "artifacts": ("static_artifacts", "Render static leaderboard artifacts [--all]"),
+}
+
+def run_script(command: str, argv: list[str]):
+    module_name, _ = COMMANDS[command]
+    module = importlib.import_module(module_name)
+    sys.argv = [f"etl {command}", *argv]
+    module.main()
+
+
+class Daemon:
+    """Keeps one DB connection and one HTTP session warm between scheduled refreshes."""
+
+    def __init__(self):
+        import fetch_all_seasons as fas
+        import load_all_seasons as las
+        import static_artifacts
+        from aimd import AimdLimiter
+
+        self.fas = fas
+        self.las = las
+        self.static_artifacts = static_artifacts
+        self.limiter = AimdLimiter(initial=fas.FETCH_CONCURRENCY, max_limit=fas.FETCH_MAX_CONCURRENCY)
+        self.conn = None
+
+        # Read after the imports above have loaded etl/.env
+        self.matchdays = {d.strip().lower()[:3]
+                          for d in os.getenv("ETL_DAEMON_MATCHDAYS", "sat,sun").split(",") if d.strip()}
+        self.matchday_minutes = float(os.getenv("ETL_DAEMON_MATCHDAY_MINUTES", "5"))
+        self.nightly_at = os.getenv("ETL_DAEMON_NIGHTLY_AT", "03:00")
+
+    def db(self):
+        if self.conn is None or self.conn.closed:
+            self.conn = self.las.get_conn()
+            self.las.prepare_schema(self.conn)
+        return self.conn
+
+    def refresh(self, label: str, current_only: bool):
+        started = time.perf_counter()
+        print(f"\n[{datetime.now():%Y-%m-%d %H:%M:%S}] {label} refresh")
+        try:
+            seasons = self.fas.api_quota.plan_season_fetches(self.db(), self.fas.LEAGUE_ID)
+            if current_only:
+                seasons = [s for s in seasons if s["priority"] == 0]
+            if not seasons:
+                print("  No seasons to refresh.")
+                return
+
+            batch = datetime.now().strftime("%Y%m%d_%H%M%S")
+            files, _, failed = self.fas.fetch_seasons(seasons, batch, self.limiter)
+            loaded, errors, _, rows, _, _ = self.las.run_load(self.db(), files)
+            self.static_artifacts.publish(self.db(), {s["id"] for s in seasons})
+            print(f"  {label}: {len(seasons) - len(failed)}/{len(seasons)} seasons fetched, "
+                  f"{loaded} files loaded ({rows} rows, {errors} errors) "
+                  f"in {time.perf_counter() - started:.1f}s")
+            print(f"  Concurrency: {self.limiter.report()}")
+        except Exception as e:
+            print(f"  ❌ {label} refresh failed | Error: {e}")
+            if self.conn is not None:
+                self.conn.close()  # reconnect on the next run
+
+    def run(self):
+        self.fas.ensure_token()
+        next_matchday = datetime.now()
+        next_nightly = next_nightly_run(datetime.now(), self.nightly_at)
+        print(f"Daemon started | matchdays={','.join(sorted(self.matchdays))} every {self.matchday_minutes:g}m | "
+              f"nightly at {self.nightly_at} (next {next_nightly:%Y-%m-%d %H:%M})")
+
+        while True:
+            now = datetime.now()
+            if now >= next_nightly:
+                self.refresh("nightly", current_only=False)
+                next_nightly = next_nightly_run(datetime.now(), self.nightly_at)
+            elif now >= next_matchday:
+                if now.strftime("%a").lower() in self.matchdays:
+                    self.refresh("matchday", current_only=True)
+                next_matchday = datetime.now() + timedelta(minutes=self.matchday_minutes)
+            wake = min(next_matchday, next_nightly)
+            time.sleep(max(1.0, (wake - datetime.now()).total_seconds()))
+
+
+def next_nightly_run(now: datetime, at: str) -> datetime:
+    hour, minute = (int(x) for x in at.split(":"))
+    run_at = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    return run_at if run_at > now else run_at + timedelta(days=1)
+
+
+def main(argv: list[str] | None = None):
+    argv = sys.argv[1:] if argv is None else argv
+    parser = argparse.ArgumentParser(prog="etl", description="Football data ETL.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    for name, (_, help_text) in COMMANDS.items():
+        sub.add_parser(name, help=help_text, add_help=False)
+    p_daemon = sub.add_parser("daemon", help="Stay resident and run refresh schedules")
+    p_daemon.add_argument("--once", choices=("matchday", "nightly"), help="Run one refresh and exit")
+
+    args, rest = parser.parse_known_args(argv)
+    if args.command in COMMANDS:
+        run_script(args.command, rest)
+        return
+    if rest:
+        parser.error(f"unrecognized arguments: {' '.join(rest)}")
+
+    daemon = Daemon()
+    try:
+        if args.once:
+            daemon.fas.ensure_token()
+            daemon.refresh(args.once, current_only=args.once == "matchday")
+        else:
+            daemon.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if daemon.conn is not None:
+            daemon.conn.close()
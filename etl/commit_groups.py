@@ -0,0 +1,80 @@
+"""
+Commit grouping for the file loaders.
+
+Committing after every file costs one WAL flush per file. A CommitGroup
+lets several load units share one transaction, each inside its own
+SAVEPOINT: a unit that fails is rolled back to its savepoint (database
+writes and pending player hashes), and the rest of the group still commits.
+The group commits once it holds ETL_COMMIT_FILES files (default 1, i.e.
+commit per file) or ETL_COMMIT_ROWS stat rows (default 0, no row limit),
+whichever comes first.
+
+Units that fail, and groups whose commit fails, are recorded in the
+dead-letter store; committed files resolve their open dead letters.
+"""
+
+import os
+from contextlib import contextmanager
+
+import dead_letters
+import player_hashes
+
+COMMIT_FILES = int(os.getenv("ETL_COMMIT_FILES", "1"))
+COMMIT_ROWS = int(os.getenv("ETL_COMMIT_ROWS", "0"))
+
+
+class CommitGroup:
+    def __init__(self, conn, max_files: int = COMMIT_FILES, max_rows: int = COMMIT_ROWS):
+        self.conn = conn
+        self.max_files = max(1, max_files)
+        self.max_rows = max_rows
+        self.paths: list[str] = []
+        self.rows = 0
+        self.commits = 0
+
+    @contextmanager
+    def unit(self):
+        """Run one unit inside a savepoint; on error roll back just the unit and re-raise."""
+        with self.conn.cursor() as cur:
+            cur.execute("SAVEPOINT load_unit")
+        player_hashes.CACHE.savepoint()
+        try:
+            yield
+        except Exception:
+            with self.conn.cursor() as cur:
+                cur.execute("ROLLBACK TO SAVEPOINT load_unit")
+            player_hashes.CACHE.rollback_to_savepoint()
+            raise
+        with self.conn.cursor() as cur:
+            cur.execute("RELEASE SAVEPOINT load_unit")
+
+    def add(self, paths: list[str], rows: int) -> int:
+        """Count a successful unit; commits when the group is full. Returns files lost (see commit)."""
+        self.paths.extend(paths)
+        self.rows += rows
+        if len(self.paths) >= self.max_files or (self.max_rows and self.rows >= self.max_rows):
+            return self.commit()
+        return 0
+
+    def commit(self) -> int:
+        """Commit the open group. Returns the number of files lost if the commit itself failed."""
+        paths = self.paths
+        self.paths = []
+        self.rows = 0
+        try:
+            self.conn.commit()
+        except Exception as e:
+            print(f"❌ Commit of {len(paths)} files failed | Error: {e}")
+            self.conn.rollback()
+            player_hashes.CACHE.rollback()
+            dead_letters.record_load(paths, e)
+            return len(paths)
+        player_hashes.CACHE.commit()
+        if paths:
+            self.commits += 1
+            dead_letters.resolve_load(paths)
+        return 0
+
+    def describe(self) -> str:
+        rows = f" / {self.max_rows} rows" if self.max_rows else ""
+        return f"{self.commits} commits (up to {self.max_files} files{rows} each)"
@@ -0,0 +1,293 @@
+"""
+Dead-letter store for failed fetch and load units (etl_dead_letters).
+
+The fetchers and loaders still print ❌ and move on, but each failed unit is
+also recorded here with its error class, attempt count and a payload
+reference:
+  fetch  unit_key "<season_id>"         payload {"name", "profile"}
+  load   unit_key "<season_id>:<stat>"  payload {"file": <name in etl/raw>}
+  events unit_key "<season_id>"         payload {"name"} or {"file"} (see match_events)
+Recording the same unit again bumps attempts and pushes next_retry_at out
+exponentially (ETL_DEAD_LETTER_RETRY_SECONDS * 2^(attempts-1)). After
+ETL_DEAD_LETTER_MAX_ATTEMPTS the entry is 'exhausted'. A later successful
+fetch/load of the same unit, from any run, marks it resolved.
+
+`retry` re-processes only the due entries: fetch entries are re-fetched and
+loaded, load entries reload their raw file; events entries with a {"file"}
+payload reload their saved file in etl/raw/events, the others re-ingest
+their season's fixture events. Writes go through their own
+autocommit connection, so a failure is recorded even when the loader's
+transaction rolls back.
+
+Usage:
+  python etl/dead_letters.py list [--all]
+  python etl/dead_letters.py retry [--force]   # --force: ignore backoff, include exhausted
+"""
+
+import os
+import argparse
+from datetime import datetime
+import psycopg2
+from psycopg2.extras import Json
+from dotenv import load_dotenv
+
+HERE = os.path.dirname(__file__)
+load_dotenv(os.path.join(HERE, ".env"))
+
+LEAGUE_ID = 8  # Premier League
+
+MAX_ATTEMPTS = int(os.getenv("ETL_DEAD_LETTER_MAX_ATTEMPTS", "5"))
+RETRY_BASE_SECONDS = int(os.getenv("ETL_DEAD_LETTER_RETRY_SECONDS", "300"))
+
+DEAD_LETTER_DDL = """
+CREATE TABLE IF NOT EXISTS etl_dead_letters (
+  id              bigserial   PRIMARY KEY,
+  kind            text        NOT NULL,
+  league_id       int         NOT NULL,
+  unit_key        text        NOT NULL,
+  season_id       bigint,
+  payload         jsonb       NOT NULL DEFAULT '{}',
+  error_class     text,
+  error           text,
+  attempts        int         NOT NULL DEFAULT 1,
+  status          text        NOT NULL DEFAULT 'pending',
+  first_failed_at timestamptz NOT NULL DEFAULT now(),
+  last_failed_at  timestamptz NOT NULL DEFAULT now(),
+  next_retry_at   timestamptz NOT NULL DEFAULT now(),
+  resolved_at     timestamptz
+);
+CREATE UNIQUE INDEX IF NOT EXISTS etl_dead_letters_open_uniq
+  ON etl_dead_letters (kind, league_id, unit_key) WHERE status IN ('pending', 'exhausted');
+CREATE INDEX IF NOT EXISTS etl_dead_letters_due_idx
+  ON etl_dead_letters (next_retry_at) WHERE status = 'pending';
+"""
+
+_conn = None
+_open: dict[str, set[str]] | None = None  # kind -> open unit keys, loaded on first use
+
+
+def get_conn():
+    return psycopg2.connect(
+        host=os.getenv("DB_HOST"),
+        port=os.getenv("DB_PORT", "5432"),
+        dbname=os.getenv("DB_NAME"),
+        user=os.getenv("DB_USER"),
+        password=os.getenv("DB_PASS"),
+    )
+
+
+def store_conn():
+    """Autocommit connection used only for dead-letter writes (created on first use)."""
+    global _conn
+    if _conn is None or _conn.closed:
+        _conn = get_conn()
+        _conn.autocommit = True
+        with _conn.cursor() as cur:
+            cur.execute(DEAD_LETTER_DDL)
+    return _conn
+
+
+def open_keys() -> dict[str, set[str]]:
+    global _open
+    if _open is None:
+        with store_conn().cursor() as cur:
+            cur.execute("""
+                SELECT kind, unit_key FROM etl_dead_letters
+                WHERE league_id = %s AND status IN ('pending', 'exhausted')
+            """, (LEAGUE_ID,))
+            _open = {}
+            for kind, key in cur.fetchall():
+                _open.setdefault(kind, set()).add(key)
+    return _open
+
+
+def record(kind: str, unit_key: str, season_id: int | None, payload: dict, error: BaseException | str):
+    """
+    Add or bump the open entry for this unit. `error` may be an exception or a
+    "<Class>: <message>" string (transform workers report errors that way).
+    Never raises: the caller is already handling a failure.
+    """
+    if isinstance(error, BaseException):
+        error_class, message = type(error).__name__, str(error)
+    else:
+        error_class, _, message = error.partition(": ")
+        if not message or " " in error_class:
+            error_class, message = "Error", error
+    try:
+        with store_conn().cursor() as cur:
+            cur.execute("""
+                INSERT INTO etl_dead_letters
+                  (kind, league_id, unit_key, season_id, payload, error_class, error, next_retry_at)
+                VALUES (%(kind)s, %(league)s, %(key)s, %(season)s, %(payload)s, %(cls)s, %(error)s,
+                        now() + make_interval(secs => %(base)s))
+                ON CONFLICT (kind, league_id, unit_key) WHERE status IN ('pending', 'exhausted')
+                DO UPDATE SET
+                  attempts       = etl_dead_letters.attempts + 1,
+                  payload        = EXCLUDED.payload,
+                  error_class    = EXCLUDED.error_class,
+                  error          = EXCLUDED.error,
+                  last_failed_at = now(),
+                  next_retry_at  = now() + make_interval(secs => %(base)s * power(2, etl_dead_letters.attempts)),
+                  status         = CASE WHEN etl_dead_letters.attempts + 1 >= %(max)s
+                                        THEN 'exhausted' ELSE 'pending' END
+            """, {"kind": kind, "league": LEAGUE_ID, "key": unit_key, "season": season_id,
+                  "payload": Json(payload), "cls": error_class, "error": message[:2000],
+                  "base": RETRY_BASE_SECONDS, "max": MAX_ATTEMPTS})
+        open_keys().setdefault(kind, set()).add(unit_key)
+    except Exception as e:
+        print(f"  ⚠️  Could not record dead letter {kind} {unit_key}: {e}")
+
+
+def resolve(kind: str, unit_keys):
+    """Mark open entries for these units resolved; no query unless one of them is open."""
+    try:
+        pending = open_keys().get(kind, set()) & set(unit_keys)
+        if not pending:
+            return
+        with store_conn().cursor() as cur:
+            cur.execute("""
+                UPDATE etl_dead_letters SET status = 'resolved', resolved_at = now()
+                WHERE kind = %s AND league_id = %s AND unit_key = ANY(%s)
+                  AND status IN ('pending', 'exhausted')
+            """, (kind, LEAGUE_ID, sorted(pending)))
+        open_keys()[kind] -= pending
+    except Exception as e:
+        print(f"  ⚠️  Could not resolve dead letters {kind}: {e}")
+
+
+def load_key(path: str) -> tuple[str, int | None]:
+    import load_all_seasons as las
+    try:
+        season_id, stat = las.parse_filename(path)
+    except ValueError:
+        return os.path.basename(path), None
+    return f"{season_id}:{stat}", season_id
+
+
+def record_load(paths: list[str], error: BaseException | str):
+    for path in paths:
+        key, season_id = load_key(path)
+        record("load", key, season_id, {"file": os.path.basename(path)}, error)
+
+
+def resolve_load(paths: list[str]):
+    resolve("load", [load_key(p)[0] for p in paths])
+
+
+def record_fetch(season: dict, profile: str | None, error: BaseException):
+    record("fetch", str(season["id"]), season["id"], {"name": season.get("name"), "profile": profile}, error)
+
+
+def resolve_fetch(season_ids):
+    resolve("fetch", [str(s) for s in season_ids])
+
+
+def due_entries(conn, force: bool = False) -> list[dict]:
+    status = "status IN ('pending', 'exhausted')" if force else "status = 'pending' AND next_retry_at <= now()"
+    with conn.cursor() as cur:
+        cur.execute(DEAD_LETTER_DDL)
+        cur.execute(f"""
+            SELECT id, kind, unit_key, season_id, payload, attempts
+            FROM etl_dead_letters
+            WHERE league_id = %s AND {status}
+            ORDER BY kind, next_retry_at
+        """, (LEAGUE_ID,))
+        rows = cur.fetchall()
+    conn.commit()
+    return [dict(zip(("id", "kind", "unit_key", "season_id", "payload", "attempts"), r)) for r in rows]
+
+
+def retry(force: bool = False):
+    import fetch_all_seasons as fas
+    import load_all_seasons as las
+    import static_artifacts
+    from aimd import AimdLimiter
+
+    conn = las.get_conn()
+    try:
+        entries = due_entries(conn, force)
+        if not entries:
+            print("No dead letters due for retry.")
+            return
+        fetches = [e for e in entries if e["kind"] == "fetch"]
+        loads = [e for e in entries if e["kind"] == "load"]
+        events = [e for e in entries if e["kind"] == "events"]
+        print(f"Retrying {len(fetches)} fetch, {len(loads)} load and {len(events)} events units\n")
+
+        if events:
+            import match_events
+            # {"file": ...} entries failed to load: reload the saved file; the rest re-fetch
+            saved = [os.path.join(match_events.RAW_DIR, e["payload"]["file"]) for e in events if "file" in e["payload"]]
+            if saved:
+                match_events.load_files(conn, sorted(set(saved)))
+            refetch = sorted({e["season_id"] for e in events if "file" not in e["payload"]})
+            if refetch:
+                match_events.ingest(conn, refetch, refetch_all=True)
+
+        files = [os.path.join(las.RAW_DIR, e["payload"]["file"]) for e in loads]
+        if fetches:
+            fas.ensure_token()
+            batch = datetime.now().strftime("%Y%m%d_%H%M%S")
+            limiter = AimdLimiter(initial=fas.FETCH_CONCURRENCY, max_limit=fas.FETCH_MAX_CONCURRENCY)
+            # Profiles can differ per entry; fetch each group with its own
+            by_profile: dict[str | None, list[dict]] = {}
+            for e in fetches:
+                season = {"id": e["season_id"], "name": e["payload"].get("name") or str(e["season_id"])}
+                by_profile.setdefault(e["payload"].get("profile"), []).append(season)
+            for profile, seasons in by_profile.items():
+                paths, _, _ = fas.fetch_seasons(seasons, batch, limiter, profile)
+                files.extend(paths)
+
+        loaded = errors = rows = 0
+        if fetches or loads:
+            las.prepare_schema(conn)
+            loaded, errors, _, rows, _, _ = las.run_load(conn, sorted(set(files)))
+            static_artifacts.publish(conn, las.unit_season_ids(files))
+
+        with conn.cursor() as cur:
+            cur.execute("SELECT COUNT(*) FROM etl_dead_letters WHERE id = ANY(%s) AND status = 'resolved'",
+                        ([e["id"] for e in entries],))
+            resolved = cur.fetchone()[0]
+        conn.commit()
+        print(f"\n✅ {resolved}/{len(entries)} dead letters resolved | {loaded} files loaded "
+              f"({rows} rows, {errors} errors)")
+    finally:
+        conn.close()
+
+
+def print_entries(show_all: bool = False):
+    where = "" if show_all else "WHERE status IN ('pending', 'exhausted')"
+    with store_conn().cursor() as cur:
+        cur.execute(f"""
+            SELECT kind, unit_key, status, attempts, error_class, error, payload, next_retry_at
+            FROM etl_dead_letters {where}
+            ORDER BY last_failed_at DESC
+        """)
+        rows = cur.fetchall()
+    print(f"\n{'='*60}")
+    print(f"  DEAD LETTERS ({len(rows)})")
+    print(f"{'='*60}")
+    for kind, key, status, attempts, cls, error, payload, next_retry in rows:
+        when = f"retry after {next_retry:%Y-%m-%d %H:%M}" if status == "pending" else status
+        print(f"  {kind:<6} {key:<18} x{attempts:<3} {when:<28} {cls}: {error[:60]}")
+        print(f"         {payload}")
+    print(f"{'='*60}\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Failed fetch/load units.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_list = sub.add_parser("list", help="Open dead letters")
+    p_list.add_argument("--all", action="store_true", help="Include resolved entries")
+    p_retry = sub.add_parser("retry", help="Re-process due entries")
+    p_retry.add_argument("--force", action="store_true", help="Ignore backoff and include exhausted entries")
+    args = parser.parse_args()
+
+    if args.command == "list":
+        print_entries(args.all)
+    else:
+        retry(args.force)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+"""
+Export player_season_stats (joined with players/seasons) to partitioned Parquet.
+
+Rows are streamed from a server-side (named) cursor in fixed-size fetches and
+written one row group per fetch, so client memory stays bounded no matter
+how large the warehouse gets.
+
+Layout: <out>/league_id=<id>/season_id=<id>/part-0.parquet
+
+By default the export is incremental: a fingerprint per league/season is kept
+in <out>/_export_state.json and only seasons whose fingerprint changed since
+the last export are rewritten. Use --full to rewrite everything.
+
+Usage:
+  python etl/export_parquet.py [--out etl/export] [--fetch-size 10000] [--full]
+"""
+
+import os
+import json
+import shutil
+import argparse
+import psycopg2
+import pyarrow as pa
+import pyarrow.parquet as pq
+from dotenv import load_dotenv
+
+HERE = os.path.dirname(__file__)
+load_dotenv(os.path.join(HERE, ".env"))
+
+OUT_DIR = os.path.join(HERE, "export")
+STATE_FILE = "_export_state.json"
+FETCH_SIZE = 10_000
+
+# league_id / season_id live in the partition path (hive style), not in the files
+SCHEMA = pa.schema([
+    ("season", pa.int32()),
+    ("season_name", pa.string()),
+    ("player_id", pa.int64()),
+    ("player_name", pa.string()),
+    ("team_name", pa.string()),
+    ("goals", pa.int32()),
+    ("assists", pa.int32()),
+    ("minutes", pa.int32()),
+])
+
+EXPORT_SQL = """
+    SELECT s.league_id, s.season_id, s.season, se.name, s.player_id, p.name,
+           s.team_name, s.goals, s.assists, s.minutes
+    FROM player_season_stats s
+    JOIN players p ON p.player_id = s.player_id
+    LEFT JOIN seasons se ON se.season_id = s.season_id
+    WHERE (s.league_id, s.season_id) IN (SELECT * FROM unnest(%s::int[], %s::bigint[]))
+    ORDER BY s.league_id, s.season_id, s.player_id
+"""
+
+# Covers every exported column over the same joins as EXPORT_SQL, so renamed
+# players/seasons re-export and seasons with no joined rows drop out
+FINGERPRINT_SQL = """
+    SELECT s.league_id, s.season_id,
+           md5(string_agg(
+             concat_ws(':', s.player_id, s.season, se.name, p.name, s.team_name, s.goals, s.assists, s.minutes),
+             ',' ORDER BY s.player_id
+           ))
+    FROM player_season_stats s
+    JOIN players p ON p.player_id = s.player_id
+    LEFT JOIN seasons se ON se.season_id = s.season_id
+    WHERE s.season_id IS NOT NULL
+    GROUP BY s.league_id, s.season_id
+"""
+
+
+def get_conn():
+    return psycopg2.connect(
+        host=os.getenv("DB_HOST"),
+        port=os.getenv("DB_PORT", "5432"),
+        dbname=os.getenv("DB_NAME"),
+        user=os.getenv("DB_USER"),
+        password=os.getenv("DB_PASS"),
+    )
+
+
+def partition_dir(out_dir: str, league_id: int, season_id: int) -> str:
+    return os.path.join(out_dir, f"league_id={league_id}", f"season_id={season_id}")
+
+
+def load_state(out_dir: str) -> dict[str, str]:
+    path = os.path.join(out_dir, STATE_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_state(out_dir: str, state: dict[str, str]):
+    path = os.path.join(out_dir, STATE_FILE)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def season_fingerprints(conn) -> dict[str, str]:
+    """{"<league_id>:<season_id>": md5 of the season's rows}, computed server-side."""
+    with conn.cursor() as cur:
+        cur.execute(FINGERPRINT_SQL)
+        return {f"{r[0]}:{r[1]}": r[2] for r in cur.fetchall()}
+
+
+class PartitionWriter:
+    """Writes rows for one league/season at a time; a new key closes the previous file."""
+
+    def __init__(self, out_dir: str):
+        self.out_dir = out_dir
+        self.key = None
+        self.writer = None
+        self.tmp_path = None
+        self.final_path = None
+
+    def write(self, key: tuple[int, int], rows: list[tuple]):
+        if key != self.key:
+            self.close()
+            self._open(key)
+        columns = list(zip(*rows))
+        table = pa.Table.from_arrays(
+            [pa.array(col, type=field.type) for col, field in zip(columns, SCHEMA)],
+            schema=SCHEMA,
+        )
+        self.writer.write_table(table)
+
+    def _open(self, key: tuple[int, int]):
+        directory = partition_dir(self.out_dir, *key)
+        os.makedirs(directory, exist_ok=True)
+        self.key = key
+        self.final_path = os.path.join(directory, "part-0.parquet")
+        self.tmp_path = self.final_path + ".tmp"
+        self.writer = pq.ParquetWriter(self.tmp_path, SCHEMA, compression="zstd")
+
+    def close(self):
+        if self.writer is None:
+            return
+        self.writer.close()
+        os.replace(self.tmp_path, self.final_path)
+        self.writer = None
+
+
+def export_seasons(conn, keys: list[tuple[int, int]], out_dir: str, fetch_size: int) -> dict[tuple[int, int], int]:
+    """Stream the given league/season partitions to Parquet. Returns rows written per partition."""
+    written: dict[tuple[int, int], int] = {}
+    if not keys:
+        return written
+
+    league_ids = [k[0] for k in keys]
+    season_ids = [k[1] for k in keys]
+    writer = PartitionWriter(out_dir)
+
+    # Named cursor => rows stay on the server until fetched
+    with conn.cursor(name="export_player_season_stats") as cur:
+        cur.itersize = fetch_size
+        cur.execute(EXPORT_SQL, (league_ids, season_ids))
+        while True:
+            chunk = cur.fetchmany(fetch_size)
+            if not chunk:
+                break
+            # A chunk can straddle partitions; split on (league_id, season_id)
+            start = 0
+            for i in range(1, len(chunk) + 1):
+                if i == len(chunk) or chunk[i][:2] != chunk[start][:2]:
+                    key = (chunk[start][0], chunk[start][1])
+                    writer.write(key, [row[2:] for row in chunk[start:i]])
+                    written[key] = written.get(key, 0) + (i - start)
+                    start = i
+    writer.close()
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the warehouse to partitioned Parquet.")
+    parser.add_argument("--out", default=OUT_DIR)
+    parser.add_argument("--fetch-size", type=int, default=FETCH_SIZE)
+    parser.add_argument("--full", action="store_true", help="Re-export every season, ignoring saved state.")
+    args = parser.parse_args()
+
+    print(f"\n{'='*60}")
+    print("  EXPORT PARQUET")
+    print(f"{'='*60}\n")
+
+    os.makedirs(args.out, exist_ok=True)
+    previous = {} if args.full else load_state(args.out)
+
+    conn = get_conn()
+    try:
+        current = season_fingerprints(conn)
+        changed = sorted(
+            tuple(int(x) for x in key.split(":"))
+            for key, fp in current.items()
+            if previous.get(key) != fp
+        )
+        removed = sorted(set(previous) - set(current))
+
+        print(f"Seasons in warehouse: {len(current)}")
+        print(f"Changed since last export: {len(changed)}")
+        print(f"Removed since last export: {len(removed)}\n")
+
+        written = export_seasons(conn, changed, args.out, args.fetch_size)
+        conn.commit()
+    finally:
+        conn.close()
+
+    for key in removed:
+        league_id, season_id = (int(x) for x in key.split(":"))
+        shutil.rmtree(partition_dir(args.out, league_id, season_id), ignore_errors=True)
+    # Changed seasons that came back empty (rows deleted since the fingerprint)
+    emptied = [k for k in changed if k not in written]
+    for league_id, season_id in emptied:
+        shutil.rmtree(partition_dir(args.out, league_id, season_id), ignore_errors=True)
+        current.pop(f"{league_id}:{season_id}", None)
+
+    for (league_id, season_id), rows in sorted(written.items()):
+        print(f"✅ league_id={league_id} season_id={season_id} | rows={rows}")
+
+    save_state(args.out, current)
+
+    print(f"\n{'='*60}")
+    print("  SUMMARY")
+    print(f"{'='*60}")
+    print(f"  Partitions written: {len(written)}")
+    print(f"  Partitions removed: {len(removed) + len(emptied)}")
+    print(f"  Rows exported: {sum(written.values())}")
+    print(f"  Output: {args.out}/")
+    print(f"{'='*60}\n")
+
+
+if __name__ == "__main__":
+    main()
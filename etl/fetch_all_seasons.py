@@ -1,18 +1,28 @@
 """
-Fetch goals and assists data for ALL finished seasons from the database.
+Fetch goals and assists data for ALL finished seasons from the database,
+plus the season in progress.
+
+Seasons are fetched in quota-priority order (current season, recently
+finished, then history); see api_quota.py.
 
 Output files: epl_<season_id>_<goals|assists>_<batch>.json
 Example: epl_23614_goals_001.json, epl_23614_assists_001.json
 """
 
 import os
-import json
-import time
 import glob
-import requests
+import time
+from concurrent.futures import ThreadPoolExecutor
 import psycopg2
 from dotenv import load_dotenv
 
+import api_quota
+import api_replay
+import dead_letters
+import fetch_profiles
+from aimd import AimdLimiter
+import json_codec
+
 HERE = os.path.dirname(__file__)
 load_dotenv(os.path.join(HERE, ".env"))
 
@@ -25,6 +35,13 @@ ASSISTS_TYPE_ID = 209
 
 OUT_DIR = os.path.join(HERE, "raw")
 
+FETCH_CONCURRENCY = int(os.getenv("ETL_FETCH_CONCURRENCY", "2"))
+FETCH_MAX_CONCURRENCY = int(os.getenv("ETL_FETCH_MAX_CONCURRENCY", "8"))
+
+# Replayed 429s have no quota window to wait for: back off and give up after a few tries
+REPLAY_429_ATTEMPTS = 5
+REPLAY_429_BACKOFF = 0.5  # seconds, doubled per retry
+
 
 def get_conn():
     return psycopg2.connect(
@@ -64,68 +81,134 @@ def get_next_batch_number() -> str:
     return f"{max_batch + 1:03d}"
 
 
-def safe_get(url: str, params: dict) -> dict:
-    """GET with basic error printing (no token leak)."""
-    r = requests.get(url, params=params, timeout=30)
-    print(f"  GET {url} -> {r.status_code}")
-    if r.status_code >= 400:
-        print("  Error body (truncated):", r.text[:500])
-    r.raise_for_status()
-    return r.json()
+def safe_get(url: str, params: dict, limiter: AimdLimiter | None = None) -> dict:
+    """
+    GET with basic error printing (no token leak).
+    Each call is counted in the API usage ledger; when the quota window is
+    spent (or the API answers 429) this waits for the reset and retries.
+    With a limiter, the call holds one of its in-flight slots and reports
+    its status/latency to it. Replayed traffic (ETL_API_MODE=replay) is not
+    metered; its injected 429s are retried with exponential backoff, at most
+    REPLAY_429_ATTEMPTS times.
+    """
+    endpoint = api_quota.endpoint_key(url, BASE)
+    metered = not api_replay.replaying()
+    attempt = 0
+    while True:
+        attempt += 1
+        if metered:
+            api_quota.wait_for_budget()
+        try:
+            if limiter is None:
+                r = api_replay.get(url, params=params, timeout=30)
+            else:
+                with limiter.slot() as outcome:
+                    r = api_replay.get(url, params=params, timeout=30)
+                    outcome["status"] = r.status_code
+            print(f"  GET {url} -> {r.status_code}")
+            payload = json_codec.loads(r.content) if r.status_code < 400 else None
+        except Exception:
+            if metered:
+                api_quota.release_call()
+            raise
+        if metered:
+            api_quota.record_call(endpoint, r.status_code, (payload or {}).get("rate_limit"))
+        if r.status_code == 429:
+            if metered:
+                api_quota.pause_until_reset("Rate limited (429)")
+                continue
+            if attempt < REPLAY_429_ATTEMPTS:
+                time.sleep(REPLAY_429_BACKOFF * 2 ** (attempt - 1))
+                continue
+        if r.status_code >= 400:
+            print("  Error body (truncated):", r.text[:500])
+        r.raise_for_status()
+        return payload
 
 
 def save_json(payload: dict, filename: str) -> str:
     os.makedirs(OUT_DIR, exist_ok=True)
     path = os.path.join(OUT_DIR, filename)
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(payload, f, ensure_ascii=False, indent=2)
-    return path
+    return json_codec.save_json(payload, path)
 
 
-def get_all_finished_seasons() -> list[dict]:
+def fetch_topscorers(season_id: int, type_id: int, limiter: AimdLimiter | None = None,
+                     profile: str | None = None) -> dict:
     """
-    Get all finished seasons from the database.
-    Returns list of dicts with id, name, ending_at keys.
+    Fetch top scorers for a season for a specific top-scorer type.
+    `profile` picks the include/field selection (see fetch_profiles.py).
     """
+    url = f"{BASE}/topscorers/seasons/{season_id}"
+    params = {
+        "api_token": TOKEN,
+        "include": fetch_profiles.include_for(profile),
+        "filters": f"seasonTopscorerTypes:{type_id}",
+    }
+    return safe_get(url, params, limiter)
+
+
+def get_planned_seasons() -> list[dict]:
+    """Current + finished seasons in quota-priority order."""
     conn = get_conn()
     try:
-        with conn.cursor() as cur:
-            cur.execute("""
-                SELECT season_id, name, ending_at
-                FROM seasons
-                WHERE league_id = %s AND finished = true
-                ORDER BY ending_at DESC
-            """, (LEAGUE_ID,))
-            rows = cur.fetchall()
-        return [
-            {"id": r[0], "name": r[1], "ending_at": str(r[2]) if r[2] else None}
-            for r in rows
-        ]
+        return api_quota.plan_season_fetches(conn, LEAGUE_ID)
     finally:
         conn.close()
 
 
-def fetch_topscorers(season_id: int, type_id: int) -> dict:
+def fetch_seasons(seasons: list[dict], batch: str, limiter: AimdLimiter,
+                  profile: str | None = None) -> tuple[list[str], dict, set]:
     """
-    Fetch top scorers for a season for a specific top-scorer type.
+    Fetch goals + assists for each season on a thread pool; the limiter
+    decides how many requests are actually in flight.
+    Returns (saved paths, totals per stat plus raw "bytes" written, failed season ids).
     """
-    url = f"{BASE}/topscorers/seasons/{season_id}"
-    params = {
-        "api_token": TOKEN,
-        "include": "type;player;participant",
-        "filters": f"seasonTopscorerTypes:{type_id}",
-    }
-    return safe_get(url, params)
+    stats = (("goals", GOALS_TYPE_ID), ("assists", ASSISTS_TYPE_ID))
+
+    def fetch_one(season_id: int, stat: str, type_id: int) -> tuple[str, int]:
+        payload = fetch_topscorers(season_id, type_id, limiter, profile)
+        filename = f"epl_{season_id}_{stat}_{batch}.json"
+        path = save_json(payload, filename)
+        rows = len(payload.get("data", []) or [])
+        print(f"  ✅ {stat.capitalize()}: {rows} rows -> {filename}")
+        return path, rows
+
+    with ThreadPoolExecutor(max_workers=limiter.max_limit) as pool:
+        futures = [
+            (s, stat, pool.submit(fetch_one, s["id"], stat, type_id))
+            for s in seasons
+            for stat, type_id in stats
+        ]
+
+    paths = []
+    totals = {"goals": 0, "assists": 0, "bytes": 0}
+    errors = {}
+    for s, stat, future in futures:
+        try:
+            path, rows = future.result()
+            paths.append(path)
+            totals[stat] += rows
+            totals["bytes"] += os.path.getsize(path)
+        except Exception as e:
+            print(f"  ❌ {s['name']} (season_id={s['id']}) {stat} | Error: {e}")
+            errors.setdefault(s["id"], (s, e))
+
+    # One dead letter per failed season; its retry re-fetches both stats
+    for s, e in errors.values():
+        dead_letters.record_fetch(s, profile, e)
+    failed = set(errors)
+    dead_letters.resolve_fetch(s["id"] for s in seasons if s["id"] not in failed)
+    return paths, totals, failed
 
 
 def main():
     ensure_token()
 
-    # Get all finished seasons from database
-    seasons = get_all_finished_seasons()
+    # Get seasons from database, highest priority first
+    seasons = get_planned_seasons()
     
     if not seasons:
-        print("No finished seasons found in database.")
+        print("No started or finished seasons found in database.")
         print("Run upsert_epl_seasons_from_2000.py first.")
         return
 
@@ -135,7 +218,7 @@ def main():
     print(f"\n{'='*60}")
     print(f"  FETCH ALL SEASONS - Batch {batch}")
     print(f"{'='*60}")
-    print(f"\nFound {len(seasons)} finished seasons in database.")
+    print(f"\nFound {len(seasons)} seasons to fetch in database.")
     print(f"Output format: epl_<season_id>_<goals|assists>_{batch}.json\n")
 
     for s in seasons:
@@ -143,45 +226,11 @@ def main():
 
     print(f"\n{'='*60}\n")
 
-    success_count = 0
-    error_count = 0
-    total_goals_rows = 0
-    total_assists_rows = 0
-
-    for i, s in enumerate(seasons, 1):
-        season_id = s["id"]
-        season_name = s["name"]
-
-        print(f"[{i:02d}/{len(seasons)}] {season_name} (season_id={season_id})")
-
-        try:
-            # GOALS
-            goals_payload = fetch_topscorers(season_id, GOALS_TYPE_ID)
-            goals_filename = f"epl_{season_id}_goals_{batch}.json"
-            goals_path = save_json(goals_payload, goals_filename)
-            goals_rows = len(goals_payload.get("data", []) or [])
-            total_goals_rows += goals_rows
-            print(f"  ✅ Goals: {goals_rows} rows -> {goals_filename}")
-
-            time.sleep(0.3)
-
-            # ASSISTS
-            assists_payload = fetch_topscorers(season_id, ASSISTS_TYPE_ID)
-            assists_filename = f"epl_{season_id}_assists_{batch}.json"
-            assists_path = save_json(assists_payload, assists_filename)
-            assists_rows = len(assists_payload.get("data", []) or [])
-            total_assists_rows += assists_rows
-            print(f"  ✅ Assists: {assists_rows} rows -> {assists_filename}")
-
-            success_count += 1
-            time.sleep(0.3)
-
-        except Exception as e:
-            print(f"  ❌ Error: {e}")
-            error_count += 1
-            continue
-
-        print()
+    limiter = AimdLimiter(initial=FETCH_CONCURRENCY, max_limit=FETCH_MAX_CONCURRENCY)
+    _, totals, failed = fetch_seasons(seasons, batch, limiter)
+    error_count = len(failed)
+    success_count = len(seasons) - error_count
+    print()
 
     # Summary
     print(f"{'='*60}")
@@ -189,9 +238,11 @@ def main():
     print(f"{'='*60}")
     print(f"  Seasons fetched: {success_count}/{len(seasons)}")
     print(f"  Errors: {error_count}")
-    print(f"  Total goals rows: {total_goals_rows}")
-    print(f"  Total assists rows: {total_assists_rows}")
+    print(f"  Total goals rows: {totals['goals']}")
+    print(f"  Total assists rows: {totals['assists']}")
     print(f"  Files saved to: {OUT_DIR}/")
+    print(f"  Raw written: {totals['bytes'] / 1024:.0f} KB (profile={fetch_profiles.current_profile()})")
+    print(f"  Concurrency: {limiter.report()}")
     print(f"{'='*60}\n")
 
 
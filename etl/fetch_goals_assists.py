@@ -1,11 +1,12 @@
 import os
-import json
 import time
 import requests
 import psycopg2
 from dotenv import load_dotenv
 from datetime import datetime
 
+import json_codec
+
 HERE = os.path.dirname(__file__)
 load_dotenv(os.path.join(HERE, ".env"))
 
@@ -42,15 +43,13 @@ def safe_get(url: str, params: dict) -> dict:
         # show useful info without dumping secrets
         print("Error body (truncated):", r.text[:1500])
     r.raise_for_status()
-    return r.json()
+    return json_codec.loads(r.content)
 
 
 def save_json(payload: dict, filename: str) -> str:
     os.makedirs(OUT_DIR, exist_ok=True)
     path = os.path.join(OUT_DIR, filename)
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(payload, f, ensure_ascii=False, indent=2)
-    return path
+    return json_codec.save_json(payload, path)
 
 
 def get_all_finished_seasons_from_db() -> list[dict]:
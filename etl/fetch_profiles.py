@@ -0,0 +1,120 @@
+"""
+Named include/field-selection profiles for topscorer fetches.
+
+Each profile requests only what its consumer reads:
+  load-minimal     player and team names; everything load_all_seasons uses
+  enrichment-full  full type/player/participant objects (images, venue ids,
+                   birth dates, ...) for enrichment work
+
+fetch_all_seasons uses ETL_FETCH_PROFILE (default "load-minimal"); queue
+jobs can set "profile" in their payload.
+
+Byte savings report:
+  python etl/fetch_profiles.py                 # project the etl/raw corpus onto each profile
+  python etl/fetch_profiles.py --live 23614    # fetch one season with each profile
+"""
+
+import os
+import glob
+import time
+import argparse
+
+import json_codec
+
+HERE = os.path.dirname(__file__)
+RAW_DIR = os.path.join(HERE, "raw")
+
+DEFAULT_PROFILE = "load-minimal"
+
+PROFILES = {
+    "load-minimal": "player:name;participant:name",
+    "enrichment-full": "type;player;participant",
+}
+
+
+def current_profile() -> str:
+    return os.getenv("ETL_FETCH_PROFILE", DEFAULT_PROFILE)
+
+
+def include_for(profile: str | None = None) -> str:
+    profile = profile or current_profile()
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown fetch profile '{profile}' (expected one of {', '.join(PROFILES)})")
+    return PROFILES[profile]
+
+
+def selected_fields(include: str) -> dict[str, set | None]:
+    """'player:name;type' -> {'player': {'id', 'name'}, 'type': None (all fields)}."""
+    fields = {}
+    for part in include.split(";"):
+        relation, _, names = part.partition(":")
+        fields[relation] = {"id", *names.split(",")} if names else None
+    return fields
+
+
+def project_payload(payload: dict, profile: str) -> dict:
+    """Cut a full topscorers payload down to what `profile` would have returned."""
+    fields = selected_fields(include_for(profile))
+    rows = []
+    for row in payload.get("data") or []:
+        out = {k: v for k, v in row.items() if not isinstance(v, dict)}
+        for relation, keep in fields.items():
+            obj = row.get(relation)
+            if isinstance(obj, dict):
+                out[relation] = obj if keep is None else {k: v for k, v in obj.items() if k in keep}
+        rows.append(out)
+    return {**payload, "data": rows}
+
+
+def report(results: dict[str, tuple[int, float]], files: int):
+    full = results.get("enrichment-full", (0, 0.0))[0]
+    print(f"\n{'profile':<18} {'bytes':>12} {'KB/file':>9} {'saved':>7} {'time':>8}")
+    for profile, (size, elapsed) in results.items():
+        saved = f"{(1 - size / full) * 100:.0f}%" if full else "-"
+        timing = f"{elapsed:.2f}s" if elapsed else "-"
+        print(f"{profile:<18} {size:>12,} {size / max(files, 1) / 1024:>9.1f} {saved:>7} {timing:>8}")
+
+
+def compare_corpus(raw_dir: str):
+    """Raw storage per profile, by projecting saved full payloads."""
+    files = sorted(glob.glob(os.path.join(raw_dir, "epl_*_*_*.json")))
+    payloads = [json_codec.load_json(path) for path in files]
+    results = {}
+    for profile in PROFILES:
+        size = sum(len(json_codec.dumps(project_payload(p, profile))) for p in payloads)
+        results[profile] = (size, 0.0)
+    print(f"Raw corpus: {len(files)} files in {raw_dir}")
+    report(results, len(files))
+
+
+def compare_live(season_id: int):
+    """Transfer bytes/time per profile for one season (goals + assists)."""
+    import fetch_all_seasons as fas
+
+    fas.ensure_token()
+    results = {}
+    for profile in PROFILES:
+        t0 = time.perf_counter()
+        size = 0
+        for type_id in (fas.GOALS_TYPE_ID, fas.ASSISTS_TYPE_ID):
+            payload = fas.fetch_topscorers(season_id, type_id, profile=profile)
+            size += len(json_codec.dumps(payload, compact=True))  # ~ bytes on the wire
+        results[profile] = (size, time.perf_counter() - t0)
+    print(f"Season {season_id}: goals + assists")
+    report(results, 2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare payload size per fetch profile.")
+    parser.add_argument("--raw-dir", default=RAW_DIR)
+    parser.add_argument("--live", type=int, metavar="SEASON_ID", help="Fetch this season with each profile")
+    args = parser.parse_args()
+
+    if args.live:
+        compare_live(args.live)
+    else:
+        compare_corpus(args.raw_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,10 @@
 import os
-import json
 import requests
 from dotenv import load_dotenv
 from datetime import datetime
 
+import json_codec
+
 HERE = os.path.dirname(__file__)
 load_dotenv(os.path.join(HERE, ".env"))
 
@@ -19,9 +20,7 @@ OUT_DIR = os.path.join(HERE, "raw")
 def save_json(payload, filename):
     os.makedirs(OUT_DIR, exist_ok=True)
     path = os.path.join(OUT_DIR, filename)
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(payload, f, ensure_ascii=False, indent=2)
-    return path
+    return json_codec.save_json(payload, path)
 
 
 def main():
@@ -42,7 +41,7 @@ def main():
         print("Error body:", r.text[:1500])
     r.raise_for_status()
 
-    payload = r.json()
+    payload = json_codec.loads(r.content)
 
     ts = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
     out_path = save_json(payload, f"top_assist_providers_league{LEAGUE_ID}_season{SEASON_ID}_{ts}.json")
@@ -0,0 +1,374 @@
+"""
+Postgres-backed job queue for running season fetch/load on many workers.
+
+The orchestrator enqueues one fetch_season job per season, in quota
+priority order (see api_quota.py). Any number of worker processes, on any
+number of nodes, claim jobs with
+SELECT ... FOR UPDATE SKIP LOCKED, hold a lease that a heartbeat thread keeps
+extending, and retry failures with exponential backoff. A finished
+fetch_season job enqueues the matching load_season job in the same
+transaction that marks it done.
+
+A partial unique index allows only one pending/running job per
+(kind, league, season), so a season is never fetched twice concurrently.
+Workers must share etl/raw (e.g. a network mount) for load jobs to find
+files fetched on another node.
+
+Usage:
+  python etl/job_queue.py enqueue            # fetch jobs for current + finished seasons
+  python etl/job_queue.py work [--once]      # run a worker
+  python etl/job_queue.py status
+"""
+
+import os
+import time
+import socket
+import argparse
+import threading
+from datetime import datetime
+import psycopg2
+from psycopg2.extras import Json
+from dotenv import load_dotenv
+
+import player_hashes
+
+HERE = os.path.dirname(__file__)
+load_dotenv(os.path.join(HERE, ".env"))
+
+LEAGUE_ID = 8  # Premier League
+
+LEASE_SECONDS = int(os.getenv("ETL_JOB_LEASE_SECONDS", "120"))
+POLL_SECONDS = float(os.getenv("ETL_JOB_POLL_SECONDS", "5"))
+MAX_ATTEMPTS = int(os.getenv("ETL_JOB_MAX_ATTEMPTS", "5"))
+RETRY_BASE_SECONDS = 30
+
+JOBS_DDL = """
+CREATE TABLE IF NOT EXISTS etl_jobs (
+  job_id        bigserial   PRIMARY KEY,
+  kind          text        NOT NULL,
+  league_id     int         NOT NULL,
+  season_id     bigint      NOT NULL,
+  payload       jsonb       NOT NULL DEFAULT '{}',
+  status        text        NOT NULL DEFAULT 'pending',
+  attempts      int         NOT NULL DEFAULT 0,
+  max_attempts  int         NOT NULL DEFAULT 5,
+  run_after     timestamptz NOT NULL DEFAULT now(),
+  lease_until   timestamptz,
+  worker_id     text,
+  heartbeat_at  timestamptz,
+  last_error    text,
+  created_at    timestamptz NOT NULL DEFAULT now(),
+  updated_at    timestamptz NOT NULL DEFAULT now()
+);
+CREATE UNIQUE INDEX IF NOT EXISTS etl_jobs_active_uniq
+  ON etl_jobs (kind, league_id, season_id) WHERE status IN ('pending', 'running');
+CREATE INDEX IF NOT EXISTS etl_jobs_pending_idx
+  ON etl_jobs (run_after, job_id) WHERE status = 'pending';
+CREATE INDEX IF NOT EXISTS etl_jobs_lease_idx
+  ON etl_jobs (lease_until) WHERE status = 'running';
+"""
+
+CLAIM_SQL = """
+UPDATE etl_jobs
+SET status = 'running', attempts = attempts + 1, worker_id = %(worker)s,
+    lease_until = now() + make_interval(secs => %(lease)s),
+    heartbeat_at = now(), updated_at = now()
+WHERE job_id = (
+  SELECT job_id FROM etl_jobs
+  WHERE (status = 'pending' AND run_after <= now())
+     OR (status = 'running' AND lease_until < now() AND attempts < max_attempts)
+  ORDER BY run_after, job_id
+  FOR UPDATE SKIP LOCKED
+  LIMIT 1
+)
+RETURNING job_id, kind, league_id, season_id, payload, attempts
+"""
+
+
+def get_conn():
+    return psycopg2.connect(
+        host=os.getenv("DB_HOST"),
+        port=os.getenv("DB_PORT", "5432"),
+        dbname=os.getenv("DB_NAME"),
+        user=os.getenv("DB_USER"),
+        password=os.getenv("DB_PASS"),
+    )
+
+
+def ensure_jobs_table(conn):
+    with conn.cursor() as cur:
+        cur.execute(JOBS_DDL)
+
+
+def enqueue(conn, kind: str, league_id: int, season_id: int, payload: dict | None = None,
+            max_attempts: int = MAX_ATTEMPTS, replace_pending: bool = False) -> bool:
+    """
+    Add a job unless an identical one is already pending/running. With
+    replace_pending, a pending one takes the new payload instead. Returns
+    True if a job was added (or its payload replaced).
+    """
+    on_conflict = ("DO UPDATE SET payload = EXCLUDED.payload, updated_at = now() "
+                   "WHERE etl_jobs.status = 'pending'") if replace_pending else "DO NOTHING"
+    with conn.cursor() as cur:
+        cur.execute(f"""
+            INSERT INTO etl_jobs (kind, league_id, season_id, payload, max_attempts)
+            VALUES (%s, %s, %s, %s, %s)
+            ON CONFLICT (kind, league_id, season_id) WHERE status IN ('pending', 'running')
+            {on_conflict}
+        """, (kind, league_id, season_id, Json(payload or {}), max_attempts))
+        return cur.rowcount == 1
+
+
+def claim(conn, worker_id: str):
+    """Claim the next runnable job (or an expired lease). Returns a dict or None."""
+    with conn.cursor() as cur:
+        cur.execute(CLAIM_SQL, {"worker": worker_id, "lease": LEASE_SECONDS})
+        row = cur.fetchone()
+    conn.commit()
+    if not row:
+        return None
+    return {
+        "job_id": row[0], "kind": row[1], "league_id": row[2],
+        "season_id": row[3], "payload": row[4], "attempts": row[5],
+    }
+
+
+def complete(conn, job: dict, worker_id: str) -> bool:
+    """Mark done if we still own the lease. Runs in the caller's transaction."""
+    with conn.cursor() as cur:
+        cur.execute("""
+            UPDATE etl_jobs
+            SET status = 'done', lease_until = NULL, last_error = NULL, updated_at = now()
+            WHERE job_id = %s AND worker_id = %s AND status = 'running'
+        """, (job["job_id"], worker_id))
+        return cur.rowcount == 1
+
+
+def fail(conn, job: dict, worker_id: str, error: Exception):
+    """Schedule a retry with exponential backoff, or mark failed after max_attempts."""
+    with conn.cursor() as cur:
+        cur.execute("""
+            UPDATE etl_jobs
+            SET status = CASE WHEN attempts >= max_attempts THEN 'failed' ELSE 'pending' END,
+                run_after = now() + make_interval(secs => %s * power(2, attempts - 1)),
+                lease_until = NULL,
+                last_error = %s,
+                updated_at = now()
+            WHERE job_id = %s AND worker_id = %s AND status = 'running'
+        """, (RETRY_BASE_SECONDS, f"{type(error).__name__}: {error}"[:2000], job["job_id"], worker_id))
+    conn.commit()
+
+
+def expire_exhausted(conn):
+    """Running jobs whose lease lapsed after their last allowed attempt become failed."""
+    with conn.cursor() as cur:
+        cur.execute("""
+            UPDATE etl_jobs
+            SET status = 'failed', last_error = COALESCE(last_error, 'lease expired'), updated_at = now()
+            WHERE status = 'running' AND lease_until < now() AND attempts >= max_attempts
+        """)
+    conn.commit()
+
+
+class Heartbeat(threading.Thread):
+    """Extends a job's lease on its own connection until stopped."""
+
+    def __init__(self, job_id: int, worker_id: str):
+        super().__init__(daemon=True)
+        self.job_id = job_id
+        self.worker_id = worker_id
+        self.stopped = threading.Event()
+        self.lost = False
+
+    def run(self):
+        conn = get_conn()
+        try:
+            while not self.stopped.wait(LEASE_SECONDS / 3):
+                with conn.cursor() as cur:
+                    cur.execute("""
+                        UPDATE etl_jobs
+                        SET heartbeat_at = now(), lease_until = now() + make_interval(secs => %s)
+                        WHERE job_id = %s AND worker_id = %s AND status = 'running'
+                    """, (LEASE_SECONDS, self.job_id, self.worker_id))
+                    self.lost = cur.rowcount == 0
+                conn.commit()
+                if self.lost:
+                    print(f"  ⚠️  Lost lease on job {self.job_id}")
+                    return
+        finally:
+            conn.close()
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+
+# ---------------------------------------------------------------- handlers
+
+def run_fetch_season(conn, job: dict):
+    """
+    Fetch goals + assists for one season, save raw files, enqueue the load.
+    A pending load of the season is pointed at the new files; a running one
+    makes this job fail and retry (files already saved are not fetched again).
+    """
+    import fetch_all_seasons as fas
+
+    fas.ensure_token()
+    season_id = job["season_id"]
+    batch = job["payload"].get("batch") or datetime.now().strftime("%Y%m%d_%H%M%S")
+
+    files = []
+    for stat, type_id in (("goals", fas.GOALS_TYPE_ID), ("assists", fas.ASSISTS_TYPE_ID)):
+        filename = f"epl_{season_id}_{stat}_{batch}.json"
+        if job["payload"].get("batch") and os.path.exists(os.path.join(fas.OUT_DIR, filename)):
+            files.append(filename)
+            continue
+        payload = fas.fetch_topscorers(season_id, type_id, profile=job["payload"].get("profile"))
+        files.append(fas.save_json(payload, filename))
+        time.sleep(0.3)
+
+    names = [os.path.basename(f) for f in files]
+    if not enqueue(conn, "load_season", job["league_id"], season_id, {"files": names}, replace_pending=True):
+        raise RuntimeError(f"load_season for season {season_id} is still running; "
+                           f"retrying to queue {', '.join(names)}")
+
+
+def run_load_season(conn, job: dict):
+    """
+    Load one season's raw files, in the same transaction that completes the
+    job. Returns the post-commit step (static artifacts).
+    """
+    import load_all_seasons as las
+
+    paths = [os.path.join(las.RAW_DIR, name) for name in job["payload"]["files"]]
+    # Same pre-load validation as las.run_load; rejected files become dead letters
+    paths, _ = las.validate_files(paths, conn)
+    season_ids = las.unit_season_ids(paths)
+    las.schema.lock_league(conn, las.LEAGUE_ID)
+    las.career_stats.snapshot_seasons(conn, las.LEAGUE_ID, season_ids)
+    for path in paths:
+        las.load_one_file(conn, path)
+    las.career_stats.apply_season_deltas(conn, las.LEAGUE_ID, season_ids)
+    las.stat_history.record_changes(conn, las.LEAGUE_ID, season_ids)
+    las.notify_seasons(conn, season_ids)
+
+    def publish():
+        import static_artifacts
+        static_artifacts.publish(conn, season_ids)
+    return publish
+
+
+HANDLERS = {
+    "fetch_season": run_fetch_season,
+    "load_season": run_load_season,
+}
+
+
+def run_job(conn, job: dict, worker_id: str):
+    handler = HANDLERS.get(job["kind"])
+    heartbeat = Heartbeat(job["job_id"], worker_id)
+    heartbeat.start()
+    try:
+        if handler is None:
+            raise ValueError(f"Unknown job kind '{job['kind']}'")
+        after_commit = handler(conn, job)
+        heartbeat.stop()
+        if heartbeat.lost or not complete(conn, job, worker_id):
+            # Someone else owns it now; drop our writes so they aren't applied twice
+            conn.rollback()
+            player_hashes.CACHE.rollback()
+            print(f"  ⚠️  Job {job['job_id']} lease lost, discarded result")
+            return
+        conn.commit()
+        player_hashes.CACHE.commit()
+        print(f"  ✅ job {job['job_id']} {job['kind']} season={job['season_id']}")
+        if after_commit is not None:
+            try:
+                after_commit()
+            except Exception as e:  # the job is done; don't turn it into a failure
+                conn.rollback()
+                print(f"  ⚠️  job {job['job_id']} post-commit step failed: {e}")
+    except Exception as e:
+        heartbeat.stop()
+        conn.rollback()
+        player_hashes.CACHE.rollback()
+        fail(conn, job, worker_id, e)
+        print(f"  ❌ job {job['job_id']} {job['kind']} season={job['season_id']} | Error: {e}")
+
+
+def work(worker_id: str, once: bool = False):
+    conn = get_conn()
+    try:
+        ensure_jobs_table(conn)
+        conn.commit()
+        import load_all_seasons as las
+        las.prepare_schema(conn)  # once per worker, not per job: it runs DDL and commits
+        print(f"Worker {worker_id} polling etl_jobs (lease={LEASE_SECONDS}s)")
+        while True:
+            expire_exhausted(conn)
+            job = claim(conn, worker_id)
+            if job is None:
+                if once:
+                    return
+                time.sleep(POLL_SECONDS)
+                continue
+            run_job(conn, job, worker_id)
+    finally:
+        conn.close()
+
+
+def enqueue_seasons(conn) -> tuple[int, int]:
+    """
+    Enqueue fetch_season for the current and every finished season, all under
+    one batch number. Jobs are claimed in insert order, so quota priority holds.
+    """
+    import fetch_all_seasons as fas
+
+    batch = fas.get_next_batch_number()
+    seasons = fas.get_planned_seasons()
+    added = sum(enqueue(conn, "fetch_season", LEAGUE_ID, s["id"], {"batch": batch}) for s in seasons)
+    return added, len(seasons)
+
+
+def print_status(conn):
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT kind, status, COUNT(*), MAX(attempts)
+            FROM etl_jobs GROUP BY kind, status ORDER BY kind, status
+        """)
+        rows = cur.fetchall()
+    print(f"\n{'kind':<14} {'status':<10} {'jobs':>6} {'max tries':>10}")
+    for kind, status, count, attempts in rows:
+        print(f"{kind:<14} {status:<10} {count:>6} {attempts:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ETL job queue.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("enqueue", help="Enqueue fetch jobs for current + finished seasons")
+    p_work = sub.add_parser("work", help="Run a worker")
+    p_work.add_argument("--worker-id", default=f"{socket.gethostname()}:{os.getpid()}")
+    p_work.add_argument("--once", action="store_true", help="Exit when the queue is empty")
+    sub.add_parser("status", help="Show job counts")
+    args = parser.parse_args()
+
+    if args.command == "work":
+        work(args.worker_id, once=args.once)
+        return
+
+    conn = get_conn()
+    try:
+        ensure_jobs_table(conn)
+        if args.command == "enqueue":
+            added, total = enqueue_seasons(conn)
+            conn.commit()
+            print(f"✅ Enqueued {added} fetch_season jobs ({total - added} already queued)")
+        else:
+            conn.commit()
+            print_status(conn)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+"""
+JSON codec shared by every raw save/load site in the ETL.
+
+Backends (selected with ETL_JSON_CODEC, default "auto"):
+  - orjson  : fastest encode + decode
+  - msgspec : fast decode, and typed decoding of topscorer rows
+  - json    : stdlib fallback, always available
+
+"auto" picks the first installed backend in the order above.
+ETL_JSON_COMPACT=1 writes raw files without indentation (smaller on disk).
+"""
+
+import os
+import json
+
+AUTO_ORDER = ("orjson", "msgspec", "json")
+
+
+class StdlibCodec:
+    name = "json"
+
+    def dumps(self, obj, compact: bool = False) -> bytes:
+        if compact:
+            text = json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+        else:
+            text = json.dumps(obj, ensure_ascii=False, indent=2)
+        return text.encode("utf-8")
+
+    def loads(self, data):
+        return json.loads(data)
+
+
+class OrjsonCodec:
+    name = "orjson"
+
+    def __init__(self):
+        import orjson
+        self._orjson = orjson
+
+    def dumps(self, obj, compact: bool = False) -> bytes:
+        option = 0 if compact else self._orjson.OPT_INDENT_2
+        return self._orjson.dumps(obj, option=option)
+
+    def loads(self, data):
+        return self._orjson.loads(data)
+
+
+class MsgspecCodec:
+    name = "msgspec"
+
+    def __init__(self):
+        import msgspec
+        self._msgspec = msgspec
+        self._payload_decoder = None
+
+    def dumps(self, obj, compact: bool = False) -> bytes:
+        buf = self._msgspec.json.encode(obj)
+        if compact:
+            return buf
+        return self._msgspec.json.format(buf, indent=2)
+
+    def loads(self, data):
+        return self._msgspec.json.decode(data)
+
+    def decode_topscorers(self, data) -> list[tuple]:
+        """
+        Decode a topscorers payload straight into row tuples (skips building dicts).
+        Lax mode accepts numeric strings and whole floats where ints are typed;
+        anything else it rejects goes through the untyped path, so callers see
+        the same values as with the stdlib codec.
+        """
+        if self._payload_decoder is None:
+            self._payload_decoder = topscorer_payload_decoder()
+        try:
+            payload = self._payload_decoder.decode(data)
+        except self._msgspec.ValidationError:
+            try:
+                return rows_from_payload(self.loads(data))
+            except self._msgspec.DecodeError as e:
+                raise ValueError(f"invalid JSON: {e}") from e
+        return [
+            (
+                r.player_id,
+                r.player.name if r.player else None,
+                r.participant_id,
+                r.participant.name if r.participant else None,
+                r.total,
+                r.position,
+            )
+            for r in payload.data
+        ]
+
+
+def _topscorer_payload_type(msgspec):
+    class Named(msgspec.Struct):
+        name: str | None = None
+
+    class Row(msgspec.Struct):
+        player_id: int | None = None
+        participant_id: int | None = None
+        total: int | None = None
+        position: int | None = None
+        player: Named | None = None
+        participant: Named | None = None
+
+    class Payload(msgspec.Struct):
+        data: list[Row] = []
+
+    return Payload
+
+
+_payload_decoder = None
+
+
+def topscorer_payload_decoder():
+    """
+    Lax typed msgspec decoder for topscorer payloads (payload.data is a list
+    of rows with only the fields the loaders read), or None without msgspec.
+    """
+    global _payload_decoder
+    if _payload_decoder is None:
+        try:
+            import msgspec
+        except ImportError:
+            return None
+        _payload_decoder = msgspec.json.Decoder(_topscorer_payload_type(msgspec), strict=False)
+    return _payload_decoder
+
+
+BACKENDS = {
+    "json": StdlibCodec,
+    "orjson": OrjsonCodec,
+    "msgspec": MsgspecCodec,
+}
+
+_codec = None
+
+
+def make_codec(name: str):
+    """Build a codec by name; raises ImportError if the backend isn't installed."""
+    name = name.lower()
+    if name == "auto":
+        for candidate in AUTO_ORDER:
+            try:
+                return BACKENDS[candidate]()
+            except ImportError:
+                continue
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown JSON codec '{name}'. Use one of: auto, {', '.join(BACKENDS)}")
+    return BACKENDS[name]()
+
+
+def get_codec():
+    """Return the process-wide codec (resolved lazily so etl/.env is already loaded)."""
+    global _codec
+    if _codec is None:
+        name = os.getenv("ETL_JSON_CODEC", "auto")
+        try:
+            _codec = make_codec(name)
+        except ImportError:
+            print(f"⚠️  JSON codec '{name}' not installed, falling back to stdlib json")
+            _codec = StdlibCodec()
+    return _codec
+
+
+def compact_default() -> bool:
+    return os.getenv("ETL_JSON_COMPACT", "0") == "1"
+
+
+def dumps(obj, compact: bool | None = None) -> bytes:
+    if compact is None:
+        compact = compact_default()
+    return get_codec().dumps(obj, compact=compact)
+
+
+def loads(data):
+    return get_codec().loads(data)
+
+
+def save_json(payload, path: str, compact: bool | None = None) -> str:
+    """Encode payload and write it to path. Returns the path."""
+    with open(path, "wb") as f:
+        f.write(dumps(payload, compact=compact))
+    return path
+
+
+def load_json(path: str):
+    with open(path, "rb") as f:
+        return loads(f.read())
+
+
+def rows_from_payload(payload) -> list[tuple]:
+    """
+    Flatten a decoded topscorers payload into row tuples:
+      (player_id, player_name, participant_id, team_name, total, position)
+    Values are passed through as-is; callers apply their own defaults.
+    """
+    data = payload.get("data", [])
+    if not isinstance(data, list):
+        raise ValueError("payload['data'] is not a list")
+
+    rows = []
+    for r in data:
+        player_obj = r.get("player") or {}
+        team_obj = r.get("participant") or {}
+        rows.append((
+            r.get("player_id"),
+            player_obj.get("name"),
+            r.get("participant_id"),
+            team_obj.get("name"),
+            r.get("total"),
+            r.get("position"),
+        ))
+    return rows
+
+
+def decode_topscorers(data, codec=None) -> list[tuple]:
+    """Decode raw topscorers bytes into row tuples, using typed decoding when available."""
+    codec = codec or get_codec()
+    if hasattr(codec, "decode_topscorers"):
+        return codec.decode_topscorers(data)
+    return rows_from_payload(codec.loads(data))
+
+
+def load_topscorer_rows(path: str) -> list[tuple]:
+    """Read a raw topscorers file and return its row tuples (see rows_from_payload)."""
+    with open(path, "rb") as f:
+        data = f.read()
+    try:
+        return decode_topscorers(data)
+    except ValueError as e:
+        raise ValueError(f"{os.path.basename(path)}: {e}") from e
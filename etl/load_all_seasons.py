@@ -7,18 +7,47 @@ Example: epl_23614_goals_001.json
 
 import os
 import re
-import json
 import glob
 import psycopg2
 from psycopg2.extras import execute_values
 from dotenv import load_dotenv
 
+import json_codec
+import career_stats
+import commit_groups
+import dead_letters
+import player_hashes
+import ranks
+import schema
+import stat_history
+
 HERE = os.path.dirname(__file__)
 load_dotenv(os.path.join(HERE, ".env"))
 
 RAW_DIR = os.path.join(HERE, "raw")
 LEAGUE_ID = 8  # Premier League
 
+# NOTIFY channel for read caches; payload "<league_id>:<season_id>", delivered on commit
+SEASON_CHANNEL = "etl_season_loaded"
+
+PLAYER_COLUMNS = ("player_id", "name", "nationality", "position")
+STATS_COLUMNS = (
+    "player_id", "league_id", "season", "season_id", "team_name", "goals", "assists", "minutes",
+    "goals_rank", "goals_dense_rank", "assists_rank", "assists_dense_rank",
+)
+
+# Temp tables the COPY-based writers (parallel_transform, async_writer) stage into
+STAGE_DDL = """
+CREATE TEMP TABLE IF NOT EXISTS stage_players (
+  player_id bigint, name text, nationality text, position text
+);
+CREATE TEMP TABLE IF NOT EXISTS stage_stats (
+  player_id bigint, league_id int, season int, season_id bigint,
+  team_name text, goals int, assists int, minutes int,
+  goals_rank int, goals_dense_rank int, assists_rank int, assists_dense_rank int
+);
+"""
+
 
 def get_conn():
     return psycopg2.connect(
@@ -40,6 +69,16 @@ def season_start_year(conn, season_id: int) -> int:
     return int(str(row[0])[:4])
 
 
+def season_start_years(conn, season_ids) -> dict[int, int]:
+    """Starting year for many seasons in one query. Seasons without starting_at are omitted."""
+    with conn.cursor() as cur:
+        cur.execute(
+            "SELECT season_id, starting_at FROM seasons WHERE season_id = ANY(%s) AND starting_at IS NOT NULL",
+            (list(season_ids),),
+        )
+        return {int(r[0]): int(str(r[1])[:4]) for r in cur.fetchall()}
+
+
 def get_latest_batch() -> str:
     """
     Find the latest batch number from existing files.
@@ -98,7 +137,8 @@ def parse_filename(path: str) -> tuple[int, str]:
 
 
 def upsert_players(conn, player_rows):
-    """Insert or update player records."""
+    """Insert or update player records; players whose content hash is unchanged aren't sent."""
+    player_rows = player_hashes.changed_players(conn, player_rows)
     if not player_rows:
         return
     sql = """
@@ -106,27 +146,44 @@ def upsert_players(conn, player_rows):
     VALUES %s
     ON CONFLICT (player_id) DO UPDATE SET
       name = EXCLUDED.name
+    WHERE players.name IS DISTINCT FROM EXCLUDED.name
     """
     with conn.cursor() as cur:
         execute_values(cur, sql, player_rows)
 
 
+def stats_update_set(*stats: str, ranked_only: bool = False) -> str:
+    """
+    SET clause for the stats upsert: only the loaded stat column(s) are overwritten.
+    ranked_only: rows carry several stats (columnar engine); a stat whose
+    rank is NULL (player not on that list) keeps its stored values, as it
+    would when loading file by file.
+    """
+    if not stats or any(stat not in ("goals", "assists") for stat in stats):
+        raise ValueError("stat must be 'goals' or 'assists'")
+
+    columns = ["team_name = EXCLUDED.team_name", "season_id = EXCLUDED.season_id"]
+    for stat in ("goals", "assists"):
+        if stat in stats:
+            for col in (stat, f"{stat}_rank", f"{stat}_dense_rank"):
+                if ranked_only:
+                    columns.append(f"{col} = CASE WHEN EXCLUDED.{stat}_rank IS NULL "
+                                   f"THEN player_season_stats.{col} ELSE EXCLUDED.{col} END")
+                else:
+                    columns.append(f"{col} = EXCLUDED.{col}")
+    return ", ".join(columns)
+
+
 def upsert_stats(conn, stat_rows, stat: str):
     """Insert or update player season stats."""
     if not stat_rows:
         return
         
-    if stat not in ("goals", "assists"):
-        raise ValueError("stat must be 'goals' or 'assists'")
-
-    if stat == "goals":
-        update_set = "team_name = EXCLUDED.team_name, season_id = EXCLUDED.season_id, goals = EXCLUDED.goals"
-    else:
-        update_set = "team_name = EXCLUDED.team_name, season_id = EXCLUDED.season_id, assists = EXCLUDED.assists"
+    update_set = stats_update_set(stat)
 
     sql = f"""
     INSERT INTO player_season_stats
-      (player_id, league_id, season, season_id, team_name, goals, assists, minutes)
+      ({", ".join(STATS_COLUMNS)})
     VALUES %s
     ON CONFLICT (player_id, league_id, season) DO UPDATE SET
       {update_set}
@@ -135,48 +192,378 @@ def upsert_stats(conn, stat_rows, stat: str):
         execute_values(cur, sql, stat_rows)
 
 
+def build_rows(rows, stat: str, season_id: int, season_year: int) -> tuple[list, list]:
+    """
+    Turn topscorer row tuples into (player_rows, stat_rows) ready for upsert.
+    Rows are de-duplicated by player id first (the first, best-placed
+    occurrence wins, as in the columnar engine); stat rows keep the API order
+    and carry the stat's competition and dense ranks over this list (see
+    STATS_COLUMNS).
+    """
+    players = []
+    stats = []
+
+    seen = set()
+    kept = []
+    for r in rows:
+        if r[0] and r[0] not in seen:
+            seen.add(r[0])
+            kept.append(r)
+    totals = [int(r[4] or 0) for r in kept]
+    rank = ranks.competition_ranks(totals)
+    dense = ranks.dense_ranks(totals)
+
+    for i, (player_id, player_name, _team_id, team_name, _total, _position) in enumerate(kept):
+        player_name = player_name or f"player_{player_id}"
+        total = totals[i]
+
+        players.append((player_id, player_name, None, None))
+
+        if stat == "goals":
+            stats.append((player_id, LEAGUE_ID, season_year, season_id, team_name, total, 0, 0,
+                          rank[i], dense[i], None, None))
+        else:
+            stats.append((player_id, LEAGUE_ID, season_year, season_id, team_name, 0, total, 0,
+                          None, None, rank[i], dense[i]))
+
+    return players, stats
+
+
 def load_one_file(conn, path: str) -> tuple[int, str, int, int]:
     """Load a single JSON file into the database."""
     season_id, stat = parse_filename(path)
     season_year = season_start_year(conn, season_id)
 
-    with open(path, "r", encoding="utf-8") as f:
-        payload = json.load(f)
+    rows = json_codec.load_topscorer_rows(path)
+    players, stats = build_rows(rows, stat, season_id, season_year)
+
+    upsert_players(conn, players)
+    upsert_stats(conn, stats, stat)
 
-    data = payload.get("data", [])
-    if not isinstance(data, list):
-        raise ValueError(f"{os.path.basename(path)}: payload['data'] is not a list")
+    return season_id, stat, len(players), len(stats)
 
-    players = []
-    stats = []
 
-    for r in data:
-        player_id = r.get("player_id")
-        if not player_id:
+def parallel_transform_workers() -> int:
+    import parallel_transform
+    return parallel_transform.default_workers()
+
+
+def transform_engine() -> str:
+    """ETL_TRANSFORM_ENGINE: 'python' (per-file, default) or 'columnar' (per-season, numpy)."""
+    engine = os.getenv("ETL_TRANSFORM_ENGINE", "python").lower()
+    if engine not in ("python", "columnar"):
+        raise SystemExit(f"Unknown ETL_TRANSFORM_ENGINE '{engine}'. Use 'python' or 'columnar'.")
+    return engine
+
+
+def _fail(message: str):
+    raise ValueError(message)
+
+
+def _batch_season_years(conn, files: list[str]) -> dict[int, int]:
+    season_ids = set()
+    for path in files:
+        try:
+            season_ids.add(parse_filename(path)[0])
+        except ValueError:
             continue
+    return season_start_years(conn, season_ids)
 
-        player_obj = r.get("player") or {}
-        team_obj = r.get("participant") or {}
 
-        player_name = player_obj.get("name") or f"player_{player_id}"
-        team_name = team_obj.get("name")
-        total = int(r.get("total") or 0)
+def iter_load_steps(conn, files: list[str], workers: int = 1, engine: str = "python"):
+    """
+    Yield (paths, load_step) per load unit, in file order. Calling load_step()
+    writes the unit to the database and returns (season_id, stat, players, rows).
 
-        players.append((player_id, player_name, None, None))
+    - python engine, 1 worker : one unit per file, parsed inline
+    - python engine, N workers: one unit per file, parsed ahead on a process pool,
+                                load_step only runs the COPY + upsert
+    - columnar engine         : one unit per season (goals + assists merged)
+    """
+    if engine == "columnar":
+        yield from _iter_columnar_steps(conn, files)
+        return
 
-        if stat == "goals":
-            stats.append((player_id, LEAGUE_ID, season_year, season_id, team_name, total, 0, 0))
-        else:
-            stats.append((player_id, LEAGUE_ID, season_year, season_id, team_name, 0, total, 0))
+    if workers <= 1:
+        for path in files:
+            yield [path], (lambda p=path: load_one_file(conn, p))
+        return
 
-    # Dedupe players by id
-    dedup = {p[0]: p for p in players}
-    players = list(dedup.values())
+    import parallel_transform
 
-    upsert_players(conn, players)
-    upsert_stats(conn, stats, stat)
+    tasks, skipped = parallel_transform.plan_tasks(files, _batch_season_years(conn, files))
+    skipped = dict(skipped)
+    batches = parallel_transform.transform_files(tasks, workers)  # task order = file order minus skipped
 
-    return season_id, stat, len(players), len(stats)
+    for path in files:
+        if path in skipped:
+            yield [path], (lambda r=skipped[path]: _fail(r))
+            continue
+        batch = next(batches)
+        if batch.error:
+            yield [batch.path], (lambda b=batch: _fail(b.error))
+            continue
+
+        def step(b=batch):
+            parallel_transform.write_batch(conn, b)
+            return b.season_id, b.stat, b.player_count, b.stat_count
+
+        yield [batch.path], step
+    batches.close()  # shuts the pool down now rather than at garbage collection
+
+
+def _iter_columnar_steps(conn, files: list[str]):
+    try:
+        import columnar_transform
+    except ImportError as e:
+        raise SystemExit(f"ETL_TRANSFORM_ENGINE=columnar needs numpy ({e}). Run: pip install numpy")
+
+    parseable = []
+    for path in files:
+        try:
+            parse_filename(path)
+            parseable.append(path)
+        except ValueError as e:
+            yield [path], (lambda m=str(e): _fail(m))
+
+    season_years = _batch_season_years(conn, parseable)
+
+    for season_id, paths in sorted(columnar_transform.group_season_files(parseable).items()):
+        unit = [paths[stat] for stat in columnar_transform.STATS if stat in paths]
+        year = season_years.get(season_id)
+        if year is None:
+            message = f"Missing seasons.starting_at for season_id={season_id}. Run upsert_epl_seasons_from_2000.py first."
+            yield unit, (lambda m=message: _fail(m))
+            continue
+
+        def step(sid=season_id, y=year, p=paths):
+            season = columnar_transform.transform_season(sid, y, p)
+            p_count, s_count = columnar_transform.write_season(conn, season)
+            return sid, "+".join(season.stats), p_count, s_count
+
+        yield unit, step
+
+
+def unit_season_ids(paths: list[str]) -> list[int]:
+    season_ids = set()
+    for path in paths:
+        try:
+            season_ids.add(parse_filename(path)[0])
+        except ValueError:
+            continue
+    return sorted(season_ids)
+
+
+def notify_seasons(conn, season_ids, league_id: int = LEAGUE_ID):
+    """Queue a change notification per season; Postgres sends them only if the transaction commits."""
+    with conn.cursor() as cur:
+        for season_id in sorted(season_ids):
+            cur.execute("SELECT pg_notify(%s, %s)", (SEASON_CHANNEL, f"{league_id}:{season_id}"))
+
+
+def prepare_schema(conn):
+    """
+    Create the core tables (and this league's partition) if missing, and
+    create player_career_stats and player_season_stats_history on first use
+    (backfilled from existing seasons).
+    """
+    schema.ensure_schema(conn, LEAGUE_ID)
+    if career_stats.ensure_career_table(conn):
+        career_stats.rebuild_career_stats(conn, LEAGUE_ID)
+        print("Created player_career_stats (backfilled from existing seasons)\n")
+    if stat_history.ensure_history_table(conn):
+        stat_history.record_changes(conn, LEAGUE_ID)
+        print("Created player_season_stats_history (seeded with current values)\n")
+    conn.commit()
+
+
+def load_mode() -> str:
+    """ETL_LOAD_MODE: 'upsert' (per unit, default) or 'swap' (shadow partition, see swap_load)."""
+    mode = os.getenv("ETL_LOAD_MODE", "upsert").lower()
+    if mode not in ("upsert", "swap"):
+        raise SystemExit(f"Unknown ETL_LOAD_MODE '{mode}'. Use 'upsert' or 'swap'.")
+    return mode
+
+
+def db_backend() -> str:
+    """ETL_DB_BACKEND: 'psycopg2' (default) or 'asyncpg'."""
+    backend = os.getenv("ETL_DB_BACKEND", "psycopg2").lower()
+    if backend not in ("psycopg2", "asyncpg"):
+        raise SystemExit(f"Unknown ETL_DB_BACKEND '{backend}'. Use 'psycopg2' or 'asyncpg'.")
+    return backend
+
+
+def load_with_asyncpg(files: list[str], file_count: int | None = None):
+    try:
+        import async_writer
+    except ImportError as e:
+        raise SystemExit(f"ETL_DB_BACKEND=asyncpg needs asyncpg ({e}). Run: pip install asyncpg")
+
+    file_count = file_count or len(files)
+    conn = get_conn()
+    try:
+        prepare_schema(conn)
+        files, rejected = validate_files(files, conn)
+    finally:
+        conn.close()
+
+    loaded = 0
+    errors = 0
+    total_players = 0
+    total_rows = 0
+
+    touched_seasons = set()
+    for paths, season_id, outcome in async_writer.run_load(files):
+        if isinstance(outcome, Exception):
+            errors += 1
+            filenames = ", ".join(os.path.basename(p) for p in paths)
+            print(f"❌ {filenames} | Error: {outcome}")
+            dead_letters.record_load(paths, outcome)
+            continue
+        touched_seasons.add(season_id)
+        dead_letters.resolve_load(paths)
+        for path, stat, p_count, s_count in outcome:
+            loaded += 1
+            total_players += p_count
+            total_rows += s_count
+            print(f"✅ {os.path.basename(path)} | season={season_id} {stat}={s_count}")
+
+    # No before-images on the async path: recompute careers of the touched players
+    conn = get_conn()
+    try:
+        if touched_seasons:
+            career_stats.recompute_players(conn, LEAGUE_ID, touched_seasons)
+            stat_history.record_changes(conn, LEAGUE_ID, touched_seasons)
+            notify_seasons(conn, touched_seasons)
+            conn.commit()
+
+        print_summary(loaded, file_count, errors + rejected, total_players, total_rows)
+
+        import static_artifacts
+        static_artifacts.publish(conn, touched_seasons)
+    finally:
+        conn.close()
+
+
+def print_summary(loaded: int, file_count: int, errors: int, total_players: int, total_rows: int,
+                  commits: str | None = None):
+    print(f"\n{'='*60}")
+    print("  SUMMARY")
+    print(f"{'='*60}")
+    print(f"  Files loaded: {loaded}/{file_count}")
+    print(f"  Errors: {errors}")
+    print(f"  Total player records: {total_players}")
+    print(f"  Total stat rows: {total_rows}")
+    print(f"  Player upserts: {player_hashes.CACHE.summary()}")
+    if commits:
+        print(f"  Transactions: {commits}")
+    print(f"{'='*60}\n")
+
+
+def load_files(conn, files: list[str], workers: int = 1, engine: str = "python",
+               group: "commit_groups.CommitGroup | None" = None) -> tuple[int, int, int, int]:
+    """
+    Load files on an open connection (schema already prepared). Each unit runs
+    in its own savepoint with its career-stat deltas; units are committed in
+    groups (see commit_groups, default one commit per unit). Stat history is
+    recorded once per season after all files are in, so a season whose goals
+    are loaded but assists are not yet doesn't get a version.
+    Returns (files loaded, errors, player rows, stat rows).
+    """
+    group = group or commit_groups.CommitGroup(conn)
+    loaded = 0
+    errors = 0
+    total_players = 0
+    total_rows = 0
+    loaded_seasons = set()
+
+    for paths, load_step in iter_load_steps(conn, files, workers, engine):
+        filename = ", ".join(os.path.basename(p) for p in paths)
+        season_ids = unit_season_ids(paths)
+        try:
+            with group.unit():
+                schema.lock_league(conn, LEAGUE_ID)
+                career_stats.snapshot_seasons(conn, LEAGUE_ID, season_ids)
+                season_id, stat, p_count, s_count = load_step()
+                career_stats.apply_season_deltas(conn, LEAGUE_ID, season_ids)
+                notify_seasons(conn, season_ids)
+        except Exception as e:
+            errors += 1
+            print(f"❌ {filename} | Error: {e}")
+            dead_letters.record_load(paths, e)
+            continue
+        loaded += len(paths)
+        loaded_seasons.update(season_ids)
+        total_players += p_count
+        total_rows += s_count
+        print(f"✅ {filename} | season={season_id} {stat}={s_count}")
+        lost = group.add(paths, s_count)
+        if lost:
+            loaded -= lost
+            errors += 1
+
+    lost = group.commit()
+    if lost:
+        loaded -= lost
+        errors += 1
+    record_history(conn, loaded_seasons)
+    return loaded, errors, total_players, total_rows
+
+
+def record_history(conn, season_ids: set[int]):
+    """Version the loaded seasons' rows in one transaction (see stat_history)."""
+    if not season_ids:
+        return
+    try:
+        versions = stat_history.record_changes(conn, LEAGUE_ID, season_ids)
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        # Versions compare against the current rows, so the next load catches up
+        print(f"⚠️  Stat history not recorded | Error: {e}")
+        return
+    print(f"✅ Stat history: {versions} new versions across {len(season_ids)} seasons")
+
+
+def run_load(conn, files: list[str], workers: int = 1, engine: str = "python",
+             mode: str = "upsert") -> tuple[int, int, int, int, list[int], str | None]:
+    """
+    Validate, then load a batch on an open connection (schema already
+    prepared): the entry point for `load`, the daemon's refreshes and
+    dead-letter retries. mode is "upsert" (load_files) or "swap" (swap_load).
+    Returns (files loaded, errors including rejected files, player rows,
+    stat rows, season ids, commit summary or None).
+    """
+    files, rejected = validate_files(files, conn)
+    if mode == "swap":
+        import swap_load
+        loaded, errors, total_players, total_rows, season_ids = swap_load.reload_league(conn, files, workers)
+        commits = None
+    else:
+        group = commit_groups.CommitGroup(conn)
+        loaded, errors, total_players, total_rows = load_files(conn, files, workers, engine, group)
+        season_ids = unit_season_ids(files)
+        commits = group.describe()
+    return loaded, errors + rejected, total_players, total_rows, season_ids, commits
+
+
+def validate_files(files: list[str], conn=None) -> tuple[list[str], int]:
+    """
+    Pre-load validation (see validate_raw); call before writing, it ends the
+    connection's transaction. Returns (files to load, files rejected).
+    """
+    import validate_raw
+    if not validate_raw.enabled():
+        return files, 0
+    report = validate_raw.validate(files, conn)
+    report.print()
+    first_error = {}
+    for issue in report.issues:
+        if issue.severity == "error":
+            first_error.setdefault(issue.path, issue.message)
+    for path, message in first_error.items():
+        dead_letters.record_load([path], f"ValidationError: {message}")
+    return [f for f in files if f not in first_error], len(first_error)
 
 
 def main():
@@ -201,35 +588,34 @@ def main():
         print("❌ No files to load.")
         return
 
+    file_count = len(files)
+    backend = db_backend()
+    if backend == "asyncpg":
+        print("DB backend: asyncpg (one transaction per season)\n")
+        load_with_asyncpg(files, file_count)
+        return
+
+    engine = transform_engine()
+    workers = parallel_transform_workers()
+    if engine == "columnar":
+        print("Transform engine: columnar (one unit per season)\n")
+    elif workers > 1:
+        print(f"Transform workers: {workers}\n")
+
+    mode = load_mode()
+    if mode == "swap":
+        print("Load mode: swap (shadow partition, one transaction)\n")
+
     conn = get_conn()
     try:
-        loaded = 0
-        errors = 0
-        total_players = 0
-        total_rows = 0
-
-        for path in files:
-            filename = os.path.basename(path)
-            try:
-                season_id, stat, p_count, s_count = load_one_file(conn, path)
-                conn.commit()
-                loaded += 1
-                total_players += p_count
-                total_rows += s_count
-                print(f"✅ {filename} | season={season_id} {stat}={s_count}")
-            except Exception as e:
-                errors += 1
-                print(f"❌ {filename} | Error: {e}")
-                conn.rollback()
-
-        print(f"\n{'='*60}")
-        print("  SUMMARY")
-        print(f"{'='*60}")
-        print(f"  Files loaded: {loaded}/{len(files)}")
-        print(f"  Errors: {errors}")
-        print(f"  Total player records: {total_players}")
-        print(f"  Total stat rows: {total_rows}")
-        print(f"{'='*60}\n")
+        # Schema first: validation looks up the batch's seasons
+        prepare_schema(conn)
+        loaded, errors, total_players, total_rows, season_ids, commits = run_load(
+            conn, files, workers, engine, mode)
+        print_summary(loaded, file_count, errors, total_players, total_rows, commits)
+
+        import static_artifacts
+        static_artifacts.publish(conn, season_ids)
 
     finally:
         conn.close()
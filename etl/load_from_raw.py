@@ -1,11 +1,15 @@
 import os
 import re
-import json
 import glob
 import psycopg2
 from psycopg2.extras import execute_values
 from dotenv import load_dotenv
 
+import commit_groups
+import dead_letters
+import json_codec
+import player_hashes
+
 HERE = os.path.dirname(__file__)
 load_dotenv(os.path.join(HERE, ".env"))
 
@@ -68,12 +72,16 @@ def parse_filename(path: str):
 def upsert_players(conn, player_rows):
     # players schema: (player_id, name, nationality, position)
     # You said: don't include nationality -> keep NULL
+    player_rows = player_hashes.changed_players(conn, player_rows)
+    if not player_rows:
+        return
     sql = """
     INSERT INTO players (player_id, name, nationality, position)
     VALUES %s
     ON CONFLICT (player_id) DO UPDATE SET
       name = EXCLUDED.name,
       nationality = NULL
+    WHERE players.name IS DISTINCT FROM EXCLUDED.name OR players.nationality IS NOT NULL
     """
     with conn.cursor() as cur:
         execute_values(cur, sql, player_rows)
@@ -108,27 +116,17 @@ def load_one_file(conn, path: str):
     season_id, stat = parse_filename(path)
     season_year = season_start_year(conn, season_id)
 
-    with open(path, "r", encoding="utf-8") as f:
-        payload = json.load(f)
-
-    data = payload.get("data", [])
-    if not isinstance(data, list):
-        raise ValueError(f"{os.path.basename(path)}: payload['data'] is not a list")
+    rows = json_codec.load_topscorer_rows(path)
 
     players = []
     stats = []
 
-    for r in data:
-        player_id = r.get("player_id")
+    for player_id, player_name, _team_id, team_name, total, _position in rows:
         if not player_id:
             continue
 
-        player_obj = r.get("player") or {}
-        team_obj = r.get("participant") or {}
-
-        player_name = player_obj.get("name") or f"player_{player_id}"
-        team_name = team_obj.get("name")
-        total = int(r.get("total") or 0)
+        player_name = player_name or f"player_{player_id}"
+        total = int(total or 0)
 
         players.append((player_id, player_name, None, None))
 
@@ -161,14 +159,28 @@ def main():
 
     conn = get_conn()
     try:
+        # One savepoint per file: a bad file is skipped, the rest of its group still commits
+        group = commit_groups.CommitGroup(conn)
         loaded = 0
+        failed = []
         for path in files:
-            season_id, stat, p_count, s_count = load_one_file(conn, path)
-            conn.commit()
-            loaded += 1
+            try:
+                with group.unit():
+                    season_id, stat, p_count, s_count = load_one_file(conn, path)
+            except Exception as e:
+                failed.append(path)
+                print(f"❌ {os.path.basename(path)} | Error: {e}")
+                dead_letters.record_load([path], e)
+                continue
+            loaded += 1 - group.add([path], s_count)
             print(f"✅ Loaded {os.path.basename(path)} | season_id={season_id} stat={stat} players={p_count} rows={s_count}")
+        loaded -= group.commit()
 
-        print(f"\n🎉 Done. Loaded {loaded} files from batch {ts}.")
+        print(f"\n🎉 Done. Loaded {loaded}/{len(files)} files from batch {ts}.")
+        print(f"Player upserts: {player_hashes.CACHE.summary()}")
+        print(f"Transactions: {group.describe()}")
+        if failed:
+            print(f"❌ {len(failed)} files failed: {', '.join(os.path.basename(p) for p in failed)}")
 
     finally:
         conn.close()
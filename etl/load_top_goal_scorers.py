@@ -1,10 +1,11 @@
 import os
-import json
 import glob
 import psycopg2
 from psycopg2.extras import execute_values
 from dotenv import load_dotenv
 
+import json_codec
+
 HERE = os.path.dirname(__file__)
 load_dotenv(os.path.join(HERE, ".env"))
 
@@ -35,8 +36,7 @@ def main():
     path = latest_file("top_goal_scorers_league8_season23614_*.json")
     print("Using raw file:", path)
 
-    with open(path, "r", encoding="utf-8") as f:
-        payload = json.load(f)
+    payload = json_codec.load_json(path)
 
     rows = payload.get("data", [])
     if not isinstance(rows, list) or not rows:
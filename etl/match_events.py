@@ -0,0 +1,467 @@
+"""
+Per-fixture goal and assist events in a season-partitioned fact table.
+
+Seasons come from the `seasons` table filled by upsert_epl_seasons_from_2000.py
+(--discover runs that discovery first). `ingest` fetches, per season:
+  1. GET /seasons/{id}?include=fixtures  (fixture ids; 1 call)
+  2. GET /fixtures/multiple/{ids}?include=events;participants for the fixtures
+     that have kicked off, ETL_EVENTS_CHUNK ids per call (default 50, so
+     about 8 calls for a 380-fixture season)
+All calls go through fetch_all_seasons.safe_get: same quota ledger, 429
+handling, record/replay and AIMD-limited thread pool as the topscorer
+fetch. Each season is saved as one raw file,
+raw/events/epl_<season_id>_events_<batch>.json, and then loaded.
+
+fixture_events is LIST-partitioned by season_id (fixture_events_s<season_id>,
+created on first load). Loading a season replaces its partition in one
+transaction: fixtures are upserted, the partition is TRUNCATEd and refilled
+by a single COPY. A reload rewrites only that season, and per-season
+aggregates scan a single partition.
+
+The player_season_event_totals view derives per-player season totals from
+the events:
+  goals    goal (14) and penalty (16) events; own goals (15) are not credited
+  assists  related_player_id of those goal events
+`check` compares them with player_season_stats for the players on each
+topscorer list (goals where goals_rank is set, assists where assists_rank
+is set).
+
+By default `ingest` fetches the running season and finished seasons that
+have no partition yet. Failed seasons are recorded as dead letters (kind
+"events") and are re-ingested by `python etl deadletters retry`.
+
+Usage:
+  python etl/match_events.py ingest [--season ID ...] [--all] [--discover]
+  python etl/match_events.py load [batch]
+  python etl/match_events.py check [--season ID ...]   # exits 1 on mismatches
+"""
+
+import io
+import os
+import re
+import glob
+import math
+import argparse
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+from psycopg2.extras import execute_values
+
+import api_quota
+import dead_letters
+import fetch_all_seasons as fas
+import json_codec
+import load_all_seasons as las
+import parallel_transform as pt
+from aimd import AimdLimiter
+
+LEAGUE_ID = 8  # Premier League
+
+RAW_DIR = os.path.join(las.RAW_DIR, "events")
+FILE_RE = re.compile(r"^epl_(\d+)_events_")
+CHUNK = int(os.getenv("ETL_EVENTS_CHUNK", "50"))
+FIXTURES_PER_SEASON = 380
+
+EVENTS_TABLE = "fixture_events"
+EVENT_COLUMNS = ("event_id", "season_id", "league_id", "fixture_id", "type_id", "team_id",
+                 "player_id", "player_name", "related_player_id", "related_player_name",
+                 "minute", "extra_minute", "result")
+
+EVENTS_DDL = """
+CREATE TABLE IF NOT EXISTS fixtures (
+  fixture_id   bigint PRIMARY KEY,
+  league_id    int    NOT NULL,
+  season_id    bigint NOT NULL,
+  name         text,
+  starting_at  timestamp,
+  state_id     int,
+  result_info  text,
+  home_team_id bigint,
+  home_team    text,
+  away_team_id bigint,
+  away_team    text
+);
+CREATE INDEX IF NOT EXISTS fixtures_season_idx ON fixtures (season_id, starting_at);
+
+CREATE TABLE IF NOT EXISTS fixture_events (
+  event_id            bigint NOT NULL,
+  season_id           bigint NOT NULL,
+  league_id           int    NOT NULL,
+  fixture_id          bigint NOT NULL,
+  type_id             int    NOT NULL,
+  team_id             bigint,
+  player_id           bigint,
+  player_name         text,
+  related_player_id   bigint,
+  related_player_name text,
+  minute              int,
+  extra_minute        int,
+  result              text,
+  PRIMARY KEY (season_id, event_id)
+) PARTITION BY LIST (season_id);
+CREATE INDEX IF NOT EXISTS fixture_events_fixture_idx ON fixture_events (fixture_id);
+CREATE INDEX IF NOT EXISTS fixture_events_scorer_idx
+  ON fixture_events (player_id, season_id) WHERE type_id IN (14, 15, 16);
+CREATE INDEX IF NOT EXISTS fixture_events_assist_idx
+  ON fixture_events (related_player_id, season_id) WHERE type_id IN (14, 16);
+
+CREATE OR REPLACE VIEW player_season_event_totals AS
+SELECT league_id, season_id, player_id,
+       SUM(goals)::int AS goals, SUM(penalty_goals)::int AS penalty_goals, SUM(assists)::int AS assists
+FROM (
+  SELECT league_id, season_id, player_id, 1 AS goals, (type_id = 16)::int AS penalty_goals, 0 AS assists
+  FROM fixture_events WHERE type_id IN (14, 16) AND player_id IS NOT NULL
+  UNION ALL
+  SELECT league_id, season_id, related_player_id, 0, 0, 1
+  FROM fixture_events WHERE type_id IN (14, 16) AND related_player_id IS NOT NULL
+) e
+GROUP BY league_id, season_id, player_id;
+"""
+
+# Topscorer totals that disagree with the events, per player on each list
+CHECK_SQL = """
+WITH e AS (
+  SELECT player_id, season_id, goals, assists
+  FROM player_season_event_totals
+  WHERE league_id = %(league)s AND season_id = ANY(%(seasons)s)
+)
+SELECT s.season_id, 'goals', s.player_id, p.name, s.goals, COALESCE(e.goals, 0)
+FROM player_season_stats s
+JOIN players p ON p.player_id = s.player_id
+LEFT JOIN e ON e.player_id = s.player_id AND e.season_id = s.season_id
+WHERE s.league_id = %(league)s AND s.season_id = ANY(%(seasons)s) AND s.goals_rank IS NOT NULL
+  AND s.goals IS DISTINCT FROM COALESCE(e.goals, 0)
+UNION ALL
+SELECT s.season_id, 'assists', s.player_id, p.name, s.assists, COALESCE(e.assists, 0)
+FROM player_season_stats s
+JOIN players p ON p.player_id = s.player_id
+LEFT JOIN e ON e.player_id = s.player_id AND e.season_id = s.season_id
+WHERE s.league_id = %(league)s AND s.season_id = ANY(%(seasons)s) AND s.assists_rank IS NOT NULL
+  AND s.assists IS DISTINCT FROM COALESCE(e.assists, 0)
+ORDER BY 1, 2, 3
+"""
+
+
+def ensure_events_tables(conn):
+    with conn.cursor() as cur:
+        cur.execute(EVENTS_DDL)
+
+
+def partition_name(season_id: int) -> str:
+    return f"{EVENTS_TABLE}_s{int(season_id)}"
+
+
+def loaded_seasons(conn) -> set[int]:
+    """Season ids that have an events partition."""
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = to_regclass(%s)
+        """, (EVENTS_TABLE,))
+        return {int(name.rsplit("_s", 1)[1]) for (name,) in cur.fetchall()}
+
+
+def ensure_season_partition(conn, season_id: int):
+    with conn.cursor() as cur:
+        cur.execute(f"CREATE TABLE IF NOT EXISTS {partition_name(season_id)} "
+                    f"PARTITION OF {EVENTS_TABLE} FOR VALUES IN ({int(season_id)})")
+
+
+# ---------------------------------------------------------------------------
+# Fetch
+# ---------------------------------------------------------------------------
+
+def fetch_fixture_ids(season_id: int, limiter: AimdLimiter) -> list[int]:
+    """Ids of the season's fixtures that have kicked off."""
+    payload = fas.safe_get(f"{fas.BASE}/seasons/{season_id}",
+                           {"api_token": fas.TOKEN, "include": "fixtures"}, limiter)
+    now = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+    fixtures = (payload.get("data") or {}).get("fixtures") or []
+    return sorted(f["id"] for f in fixtures if f.get("starting_at") and f["starting_at"] <= now)
+
+
+def fetch_fixture_chunk(fixture_ids: list[int], limiter: AimdLimiter) -> list[dict]:
+    payload = fas.safe_get(f"{fas.BASE}/fixtures/multiple/{','.join(map(str, fixture_ids))}",
+                           {"api_token": fas.TOKEN, "include": "events;participants"}, limiter)
+    return payload.get("data") or []
+
+
+def fetch_seasons(seasons: list[dict], batch: str, limiter: AimdLimiter) -> tuple[list[str], set]:
+    """
+    Fetch fixtures + events for each season: fixture lists first, then every
+    season's fixture chunks on one pool. A season is saved only if all its
+    chunks succeeded. Returns (saved paths, failed season ids).
+    """
+    errors = {}
+    with ThreadPoolExecutor(max_workers=limiter.max_limit) as pool:
+        listed = [(s, pool.submit(fetch_fixture_ids, s["id"], limiter)) for s in seasons]
+        chunks = []
+        for s, future in listed:
+            try:
+                ids = future.result()
+            except Exception as e:
+                print(f"  ❌ {s['name']} (season_id={s['id']}) fixtures | Error: {e}")
+                errors[s["id"]] = (s, e)
+                continue
+            print(f"  {s['name']}: {len(ids)} fixtures played")
+            for i in range(0, len(ids), CHUNK):
+                chunks.append((s, pool.submit(fetch_fixture_chunk, ids[i:i + CHUNK], limiter)))
+
+    fixtures: dict[int, list[dict]] = {s["id"]: [] for s in seasons}
+    for s, future in chunks:
+        try:
+            fixtures[s["id"]].extend(future.result())
+        except Exception as e:
+            print(f"  ❌ {s['name']} (season_id={s['id']}) events | Error: {e}")
+            errors.setdefault(s["id"], (s, e))
+
+    paths = []
+    for s in seasons:
+        if s["id"] in errors:
+            continue
+        os.makedirs(RAW_DIR, exist_ok=True)
+        filename = f"epl_{s['id']}_events_{batch}.json"
+        data = fixtures[s["id"]]
+        paths.append(json_codec.save_json({"season_id": s["id"], "data": data}, os.path.join(RAW_DIR, filename)))
+        events = sum(len(f.get("events") or []) for f in data)
+        print(f"  ✅ {s['name']}: {len(data)} fixtures, {events} events -> events/{filename}")
+
+    for s, e in errors.values():
+        dead_letters.record("events", str(s["id"]), s["id"], {"name": s.get("name")}, e)
+    return paths, set(errors)
+
+
+# ---------------------------------------------------------------------------
+# Load
+# ---------------------------------------------------------------------------
+
+def transform(payload: dict, league_id: int = LEAGUE_ID) -> tuple[int, list[tuple], list[tuple]]:
+    """Raw season payload -> (season_id, fixture rows, event rows); events deduplicated by id."""
+    season_id = payload["season_id"]
+    fixture_rows = []
+    events: dict[int, tuple] = {}
+    for f in payload.get("data") or []:
+        teams = {(p.get("meta") or {}).get("location"): p for p in f.get("participants") or []}
+        home, away = teams.get("home") or {}, teams.get("away") or {}
+        fixture_rows.append((
+            f["id"], league_id, season_id, f.get("name"), f.get("starting_at"), f.get("state_id"),
+            f.get("result_info"), home.get("id"), home.get("name"), away.get("id"), away.get("name"),
+        ))
+        for e in f.get("events") or []:
+            if e.get("id") is None or e.get("type_id") is None:
+                continue
+            events[e["id"]] = (
+                e["id"], season_id, league_id, f["id"], e["type_id"], e.get("participant_id"),
+                e.get("player_id"), e.get("player_name"), e.get("related_player_id"),
+                e.get("related_player_name"), e.get("minute"), e.get("extra_minute"), e.get("result"),
+            )
+    return season_id, fixture_rows, list(events.values())
+
+
+def load_season(conn, payload: dict, league_id: int = LEAGUE_ID) -> tuple[int, int, int]:
+    """Replace one season's fixtures and events (caller commits). Returns (season_id, fixtures, events)."""
+    season_id, fixture_rows, event_rows = transform(payload, league_id)
+    ensure_season_partition(conn, season_id)
+    with conn.cursor() as cur:
+        if fixture_rows:
+            execute_values(cur, """
+                INSERT INTO fixtures (fixture_id, league_id, season_id, name, starting_at, state_id,
+                                      result_info, home_team_id, home_team, away_team_id, away_team)
+                VALUES %s
+                ON CONFLICT (fixture_id) DO UPDATE SET
+                  league_id    = EXCLUDED.league_id,
+                  season_id    = EXCLUDED.season_id,
+                  name         = EXCLUDED.name,
+                  starting_at  = EXCLUDED.starting_at,
+                  state_id     = EXCLUDED.state_id,
+                  result_info  = EXCLUDED.result_info,
+                  home_team_id = EXCLUDED.home_team_id,
+                  home_team    = EXCLUDED.home_team,
+                  away_team_id = EXCLUDED.away_team_id,
+                  away_team    = EXCLUDED.away_team
+            """, fixture_rows)
+        partition = partition_name(season_id)
+        cur.execute(f"TRUNCATE {partition}")
+        if event_rows:
+            cur.copy_expert(f"COPY {partition} ({', '.join(EVENT_COLUMNS)}) FROM STDIN",
+                            io.BytesIO(pt.encode_copy_rows(event_rows)))
+        cur.execute(f"ANALYZE {partition}")
+    return season_id, len(fixture_rows), len(event_rows)
+
+
+def file_season_id(name: str) -> int | None:
+    """'epl_23614_events_<batch>.json' -> 23614 (None for other names)."""
+    m = FILE_RE.match(name)
+    return int(m.group(1)) if m else None
+
+
+def load_files(conn, files: list[str]) -> tuple[int, int, list[int]]:
+    """
+    Load season files, one transaction each. A failed file becomes an events
+    dead letter with payload {"file": name}, which a retry reloads as is.
+    Returns (events loaded, errors, season ids loaded).
+    """
+    ensure_events_tables(conn)
+    conn.commit()
+    total_events = errors = 0
+    seasons = []
+    keys = []
+    for path in files:
+        name = os.path.basename(path)
+        # Dead-letter key: the season from the file name, else the name itself
+        file_season = file_season_id(name)
+        key = name if file_season is None else str(file_season)
+        try:
+            season_id, fixture_count, event_count = load_season(conn, json_codec.load_json(path))
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            errors += 1
+            print(f"❌ {name} | Error: {e}")
+            dead_letters.record("events", key, file_season, {"file": name}, e)
+            continue
+        total_events += event_count
+        seasons.append(season_id)
+        keys += [key, str(season_id)]
+        print(f"✅ {name} | season={season_id} fixtures={fixture_count} events={event_count}")
+    dead_letters.resolve("events", sorted(set(keys)))
+    return total_events, errors, seasons
+
+
+def list_batch_files(batch: str | None = None) -> list[str]:
+    """Event files of `batch` (default: the newest batch in raw/events)."""
+    files = glob.glob(os.path.join(RAW_DIR, "epl_*_events_*.json"))
+    if batch is None and files:
+        newest = os.path.basename(max(files, key=os.path.getmtime))
+        batch = newest.replace(".json", "").split("_events_", 1)[1]
+    return sorted(f for f in files if f.endswith(f"_events_{batch}.json"))
+
+
+# ---------------------------------------------------------------------------
+# Cross-check
+# ---------------------------------------------------------------------------
+
+def crosscheck(conn, season_ids: list[int] | None = None, league_id: int = LEAGUE_ID) -> int:
+    """Print event-derived vs topscorer totals per season. Returns the number of mismatches."""
+    if season_ids is None:
+        season_ids = sorted(loaded_seasons(conn))
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT se.season_id, se.name,
+                   (SELECT COUNT(*) FROM fixtures f WHERE f.season_id = se.season_id),
+                   (SELECT COUNT(*) FILTER (WHERE type_id IN (14, 16)) FROM fixture_events e
+                    WHERE e.season_id = se.season_id AND e.league_id = %(league)s),
+                   (SELECT COUNT(*) FILTER (WHERE goals_rank IS NOT NULL) FROM player_season_stats s
+                    WHERE s.league_id = %(league)s AND s.season_id = se.season_id),
+                   (SELECT COUNT(*) FILTER (WHERE assists_rank IS NOT NULL) FROM player_season_stats s
+                    WHERE s.league_id = %(league)s AND s.season_id = se.season_id)
+            FROM seasons se
+            WHERE se.season_id = ANY(%(seasons)s)
+            ORDER BY se.starting_at DESC
+        """, {"league": league_id, "seasons": season_ids})
+        summary = cur.fetchall()
+        cur.execute(CHECK_SQL, {"league": league_id, "seasons": season_ids})
+        mismatches = cur.fetchall()
+    conn.rollback()
+
+    by_season: dict[int, list[tuple]] = {}
+    for row in mismatches:
+        by_season.setdefault(row[0], []).append(row)
+
+    print(f"\n{'='*60}")
+    print("  EVENTS vs TOPSCORERS")
+    print(f"{'='*60}")
+    for season_id, name, fixtures, goals, scorers, assisters in summary:
+        bad = by_season.get(season_id, [])
+        icon = "❌" if bad else "✅"
+        print(f"  {icon} {name} (season_id={season_id}): {fixtures} fixtures, {goals} goals | "
+              f"checked {scorers} scorers, {assisters} assist providers, {len(bad)} mismatches")
+        for _, stat, player_id, player, listed, derived in bad[:10]:
+            print(f"       {stat:<8} {player or player_id:<32} topscorers={listed} events={derived}")
+        if len(bad) > 10:
+            print(f"       ... {len(bad) - 10} more")
+    print(f"{'='*60}\n")
+    return len(mismatches)
+
+
+# ---------------------------------------------------------------------------
+# Commands
+# ---------------------------------------------------------------------------
+
+def discover_seasons(conn, league_id: int = LEAGUE_ID):
+    import upsert_epl_seasons_from_2000 as seasons_api
+    league_name, seasons = seasons_api.fetch_league_seasons(league_id)
+    rows = seasons_api.upsert_seasons(conn, league_id, league_name or f"League {league_id}", seasons)
+    conn.commit()
+    print(f"✅ Discovered {len(rows)} seasons for league {league_id}\n")
+
+
+def planned_seasons(conn, season_ids: list[int] | None, refetch_all: bool) -> list[dict]:
+    """Seasons to ingest in quota-priority order (see api_quota.plan_season_fetches)."""
+    calls = 1 + math.ceil(FIXTURES_PER_SEASON / CHUNK)
+    seasons = api_quota.plan_season_fetches(conn, LEAGUE_ID, calls_per_season=calls)
+    if season_ids:
+        return [s for s in seasons if s["id"] in set(season_ids)]
+    if refetch_all:
+        return seasons
+    loaded = loaded_seasons(conn)
+    return [s for s in seasons if not s["finished"] or s["id"] not in loaded]
+
+
+def ingest(conn, season_ids: list[int] | None = None, refetch_all: bool = False) -> tuple[int, int]:
+    """Fetch and load events. Returns (events loaded, seasons failed)."""
+    fas.ensure_token()
+    ensure_events_tables(conn)
+    conn.commit()
+    seasons = planned_seasons(conn, season_ids, refetch_all)
+    if not seasons:
+        print("No seasons to ingest. Finished seasons already loaded are skipped (use --all); "
+              "if the seasons table is empty run upsert_epl_seasons_from_2000.py first (or pass --discover).")
+        return 0, 0
+
+    batch = datetime.now().strftime("%Y%m%d_%H%M%S")
+    print(f"Ingesting events for {len(seasons)} seasons (batch {batch})\n")
+    limiter = AimdLimiter(initial=fas.FETCH_CONCURRENCY, max_limit=fas.FETCH_MAX_CONCURRENCY)
+    paths, failed = fetch_seasons(seasons, batch, limiter)
+    print()
+    events, errors, _ = load_files(conn, paths)
+    print(f"\nConcurrency: {limiter.report()}")
+    return events, len(failed) + errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fixture events: ingest, load and cross-check.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_ingest = sub.add_parser("ingest", help="Fetch and load fixture events")
+    p_ingest.add_argument("--season", type=int, action="append", help="Season id (repeatable)")
+    p_ingest.add_argument("--all", action="store_true", help="Refetch finished seasons already loaded")
+    p_ingest.add_argument("--discover", action="store_true", help="Refresh the seasons table first")
+    p_load = sub.add_parser("load", help="Load a raw events batch")
+    p_load.add_argument("batch", nargs="?")
+    p_check = sub.add_parser("check", help="Compare event totals with topscorer totals")
+    p_check.add_argument("--season", type=int, action="append", help="Season id (repeatable)")
+    args = parser.parse_args()
+
+    conn = las.get_conn()
+    try:
+        if args.command == "ingest":
+            if args.discover:
+                discover_seasons(conn)
+            events, failed = ingest(conn, args.season, args.all)
+            print(f"{'❌' if failed else '✅'} {events} events loaded, {failed} seasons failed")
+        elif args.command == "load":
+            files = list_batch_files(args.batch)
+            if not files:
+                raise SystemExit(f"No event files in {RAW_DIR}")
+            events, errors, _ = load_files(conn, files)
+            print(f"\n✅ {events} events loaded from {len(files) - errors}/{len(files)} files")
+        else:
+            ensure_events_tables(conn)
+            conn.commit()
+            if crosscheck(conn, args.season):
+                raise SystemExit(1)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""
+Process-pool transform stage for loading many raw files at once.
+
+Workers parse and normalize files in parallel and hand back the row tuples;
+a single writer on the parent connection encodes them as COPY text, COPYs
+them into a temp staging table and upserts from there. A file's rows pickle
+to ~1.5 KB, no more than the COPY text would (bench_parallel_transform.py),
+and the parent keeps at most two chunks per worker in flight, so memory
+stays flat on any backfill size.
+
+Opt-in: used by load_all_seasons.py when ETL_WORKERS > 1 (default 1). On
+a corpus the size of etl/raw the process pool costs more than it saves;
+it pays off only on large multi-league backfills.
+"""
+
+import os
+import io
+from collections import deque
+from typing import NamedTuple
+from concurrent.futures import ProcessPoolExecutor
+
+import json_codec
+import load_all_seasons as las
+import player_hashes
+
+PLAYER_COLUMNS = ", ".join(las.PLAYER_COLUMNS)
+STATS_COLUMNS = ", ".join(las.STATS_COLUMNS)
+
+
+class FileBatch(NamedTuple):
+    path: str
+    season_id: int
+    stat: str
+    players: list[tuple]
+    stats: list[tuple]
+    error: str | None = None
+
+    @property
+    def player_count(self) -> int:
+        return len(self.players)
+
+    @property
+    def stat_count(self) -> int:
+        return len(self.stats)
+
+
+def _copy_field(value) -> str:
+    if value is None:
+        return "\\N"
+    text = str(value)
+    if "\\" in text or "\t" in text or "\n" in text or "\r" in text:
+        text = (
+            text.replace("\\", "\\\\")
+                .replace("\t", "\\t")
+                .replace("\n", "\\n")
+                .replace("\r", "\\r")
+        )
+    return text
+
+
+def encode_copy_rows(rows) -> bytes:
+    """Encode row tuples as a COPY ... FROM STDIN (text format) buffer."""
+    lines = ["\t".join(_copy_field(v) for v in row) for row in rows]
+    if not lines:
+        return b""
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def transform_file(task: tuple[str, int, str, int]) -> FileBatch:
+    """
+    Worker entry point: parse one raw file and return its player/stat rows.
+    Errors are returned on the batch rather than raised, so one bad file
+    doesn't tear down the pool.
+    """
+    path, season_id, stat, season_year = task
+    try:
+        rows = json_codec.load_topscorer_rows(path)
+        players, stats = las.build_rows(rows, stat, season_id, season_year)
+        return FileBatch(path, season_id, stat, players, stats)
+    except Exception as e:
+        return FileBatch(path, season_id, stat, [], [], f"{type(e).__name__}: {e}")
+
+
+def transform_chunk(tasks: list[tuple]) -> list[FileBatch]:
+    return [transform_file(task) for task in tasks]
+
+
+def plan_tasks(files: list[str], season_years: dict[int, int]) -> tuple[list[tuple], list[tuple[str, str]]]:
+    """
+    Build worker tasks for files whose season year is known.
+    Returns (tasks, skipped) where skipped is a list of (path, reason).
+    """
+    tasks = []
+    skipped = []
+    for path in files:
+        try:
+            season_id, stat = las.parse_filename(path)
+        except ValueError as e:
+            skipped.append((path, str(e)))
+            continue
+        year = season_years.get(season_id)
+        if year is None:
+            skipped.append((path, f"Missing seasons.starting_at for season_id={season_id}. Run upsert_epl_seasons_from_2000.py first."))
+            continue
+        tasks.append((path, season_id, stat, year))
+    return tasks, skipped
+
+
+def transform_files(tasks: list[tuple], workers: int, chunksize: int = 0):
+    """
+    Yield a FileBatch per task, in task order, parsing on `workers` processes.
+    Tasks are sent in chunks and at most 2 chunks per worker are in flight;
+    the next chunk is only submitted once the oldest one has been consumed.
+    """
+    if workers <= 1:
+        for task in tasks:
+            yield transform_file(task)
+        return
+
+    chunksize = chunksize or max(1, min(32, len(tasks) // (workers * 4)))
+    in_flight = deque()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for i in range(0, len(tasks), chunksize):
+            in_flight.append(pool.submit(transform_chunk, tasks[i:i + chunksize]))
+            if len(in_flight) >= workers * 2:
+                yield from in_flight.popleft().result()
+        while in_flight:
+            yield from in_flight.popleft().result()
+
+
+def ensure_staging(conn):
+    """Per-connection temp tables the writer COPYs into."""
+    with conn.cursor() as cur:
+        cur.execute(las.STAGE_DDL)
+
+
+def write_players(conn, batch: FileBatch):
+    """COPY the batch's new or changed players into staging and upsert them."""
+    ensure_staging(conn)
+    players = player_hashes.changed_players(conn, batch.players)
+    with conn.cursor() as cur:
+        cur.execute("TRUNCATE stage_players")
+        if players:
+            cur.copy_expert(f"COPY stage_players ({PLAYER_COLUMNS}) FROM STDIN", io.BytesIO(encode_copy_rows(players)))
+            cur.execute(f"""
+                INSERT INTO players ({PLAYER_COLUMNS})
+                SELECT {PLAYER_COLUMNS} FROM stage_players
+                ON CONFLICT (player_id) DO UPDATE SET
+                  name = EXCLUDED.name
+                WHERE players.name IS DISTINCT FROM EXCLUDED.name
+            """)
+
+
+def write_batch(conn, batch: FileBatch, stats: tuple[str, ...] | None = None, ranked_only: bool = False):
+    """
+    COPY one batch into staging and upsert it, same semantics as upsert_players/upsert_stats.
+    `stats` lists the stat columns to overwrite (defaults to the batch's own stat);
+    see las.stats_update_set for `ranked_only`.
+    """
+    update_set = las.stats_update_set(*(stats or (batch.stat,)), ranked_only=ranked_only)
+    write_players(conn, batch)
+
+    with conn.cursor() as cur:
+        cur.execute("TRUNCATE stage_stats")
+        if batch.stats:
+            cur.copy_expert(f"COPY stage_stats ({STATS_COLUMNS}) FROM STDIN", io.BytesIO(encode_copy_rows(batch.stats)))
+            cur.execute(f"""
+                INSERT INTO player_season_stats ({STATS_COLUMNS})
+                SELECT {STATS_COLUMNS} FROM stage_stats
+                ON CONFLICT (player_id, league_id, season) DO UPDATE SET
+                  {update_set}
+            """)
+
+
+def default_workers() -> int:
+    return int(os.getenv("ETL_WORKERS", "1"))
@@ -0,0 +1,87 @@
+"""
+Skip-unchanged player upserts.
+
+A player appears in every season/stat file they're listed in, and each
+upsert used to rewrite their row (one dead tuple per file). The loader
+keeps a content hash per player, seeded from the players table on first
+use, and only sends players that are new or whose (name, nationality,
+position) changed.
+
+Hashes written in a transaction are held as pending until the caller
+confirms the commit, so a rolled-back file doesn't poison the cache.
+Pending hashes are kept per unit (e.g. per season on the async path); a
+unit only skips players already committed or seen earlier in that unit.
+savepoint()/rollback_to_savepoint() mirror a SQL savepoint, for loaders
+that share one transaction across files.
+"""
+
+import hashlib
+
+HASH_SQL = "SELECT player_id, md5(concat_ws('|', name, nationality, position)) FROM players"
+
+
+def player_hash(row) -> str:
+    """md5 of the non-null fields after player_id; matches HASH_SQL (concat_ws skips NULLs)."""
+    text = "|".join(str(v) for v in row[1:] if v is not None)
+    return hashlib.md5(text.encode("utf-8")).hexdigest()
+
+
+class PlayerHashCache:
+    def __init__(self):
+        self.known: dict[int, str] | None = None
+        self.pending: dict[object, dict[int, str]] = {}
+        self.saved: dict[object, dict[int, str]] = {}
+        self.sent = 0
+        self.skipped = 0
+
+    def seed(self, pairs):
+        self.known = {int(pid): h for pid, h in pairs}
+
+    def changed(self, rows, unit=None, hashes=None) -> list:
+        """Rows (player_id first) that need writing; `hashes` may be precomputed per row."""
+        pending = self.pending.setdefault(unit, {})
+        out = []
+        for i, row in enumerate(rows):
+            h = hashes[i] if hashes is not None else player_hash(row)
+            pid = row[0]
+            if self.known.get(pid) == h or pending.get(pid) == h:
+                self.skipped += 1
+                continue
+            pending[pid] = h
+            out.append(row)
+            self.sent += 1
+        return out
+
+    def commit(self, unit=None):
+        pending = self.pending.pop(unit, {})
+        if self.known is not None:
+            self.known.update(pending)
+
+    def rollback(self, unit=None):
+        self.pending.pop(unit, None)
+
+    def savepoint(self, unit=None):
+        self.saved[unit] = dict(self.pending.get(unit, {}))
+
+    def rollback_to_savepoint(self, unit=None):
+        self.pending[unit] = self.saved.pop(unit, {})
+
+    def summary(self) -> str:
+        total = self.sent + self.skipped
+        pct = f" ({self.skipped / total * 100:.0f}%)" if total else ""
+        return f"{self.sent} written, {self.skipped} unchanged skipped{pct}"
+
+
+CACHE = PlayerHashCache()
+
+
+def ensure_seeded(conn):
+    if CACHE.known is None:
+        with conn.cursor() as cur:
+            cur.execute(HASH_SQL)
+            CACHE.seed(cur.fetchall())
+
+
+def changed_players(conn, player_rows) -> list:
+    ensure_seeded(conn)
+    return CACHE.changed(player_rows)
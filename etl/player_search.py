@@ -0,0 +1,158 @@
+"""
+Name search over `players`.
+
+players.search_name is a stored generated column:
+player_search_name(name) lowercases, folds accents ("Ødegaard" ->
+"odegaard", "Gündoğan" -> "gundogan") and collapses punctuation/whitespace
+to single spaces. Postgres computes it only for rows the loaders insert or
+update. The player upserts already skip unchanged players (player_hashes),
+so each load maintains the column and its indexes for new or renamed
+players only.
+
+Indexes (declared in schema):
+  players_search_name_idx  btree (search_name text_pattern_ops)
+      prefix of the full name: "erl" -> Erling Haaland
+  players_search_trgm_idx  GIN (search_name gin_trgm_ops), needs pg_trgm
+      any substring, so word prefixes too: "haal" -> Erling Haaland
+`schema migrate` installs pg_trgm when the server has it. Without it,
+matches inside the name fall back to a scan of players. That branch only
+runs when the prefix matches don't fill the limit.
+
+Accent folding is done with translate() rather than the unaccent
+extension, so the function stays IMMUTABLE and needs no extension.
+
+Usage:
+  python etl/player_search.py <query> [limit]
+"""
+
+import os
+import sys
+import time
+import psycopg2
+from dotenv import load_dotenv
+
+HERE = os.path.dirname(__file__)
+load_dotenv(os.path.join(HERE, ".env"))
+
+LEAGUE_ID = 8  # Premier League
+
+# base letter -> accented lowercase forms (uppercase forms are derived)
+ACCENTS = {
+    "a": "àáâãäåāăą", "c": "çćĉċč", "d": "ďđð", "e": "èéêëēĕėęě", "g": "ĝğġģ",
+    "h": "ĥħ", "i": "ìíîïĩīĭįı", "j": "ĵ", "k": "ķ", "l": "ĺļľŀł", "n": "ñńņňŉ",
+    "o": "òóôõöøōŏő", "r": "ŕŗř", "s": "śŝşšș", "t": "ţťŧț", "u": "ùúûüũūŭůűų",
+    "w": "ŵ", "y": "ýÿŷ", "z": "źżž",
+}
+LIGATURES = {"ß": "ss", "æ": "ae", "Æ": "ae", "œ": "oe", "Œ": "oe", "þ": "th", "Þ": "th"}
+
+
+def _translate_args() -> tuple[str, str]:
+    src, dst = [], []
+    for base, forms in ACCENTS.items():
+        for ch in forms:
+            for variant in {ch, ch.upper()}:
+                if len(variant) == 1 and not variant.isascii() and variant not in src:
+                    src.append(variant)
+                    dst.append(base)
+    return "".join(src), "".join(dst)
+
+
+def _normalize_sql() -> str:
+    expr = "name"
+    for ch, repl in LIGATURES.items():
+        expr = f"replace({expr}, '{ch}', '{repl}')"
+    src, dst = _translate_args()
+    return f"btrim(regexp_replace(lower(translate({expr}, '{src}', '{dst}')), '[^[:alnum:]]+', ' ', 'g'))"
+
+
+SEARCH_DDL = f"""
+CREATE OR REPLACE FUNCTION player_search_name(name text) RETURNS text
+  LANGUAGE sql IMMUTABLE PARALLEL SAFE RETURNS NULL ON NULL INPUT
+  AS $$ SELECT {_normalize_sql()} $$;
+ALTER TABLE players
+  ADD COLUMN IF NOT EXISTS search_name text GENERATED ALWAYS AS (player_search_name(name)) STORED;
+"""
+
+# Full-name prefix matches first, then matches inside the name; shorter names
+# first within each group. player_search_name() of the query is folded to a
+# constant at plan time, so the prefix branch is a range scan on
+# players_search_name_idx. The substring branch only runs if the prefix
+# branch returns fewer than `limit` rows. The normalized query has no LIKE
+# wildcards left.
+SEARCH_SQL = """
+SELECT m.player_id, p.name, p.position,
+       COALESCE(c.total_goals, 0), COALESCE(c.total_assists, 0), COALESCE(c.seasons_played, 0)
+FROM (
+  (SELECT player_id, 0 AS rank, search_name FROM players
+   WHERE player_search_name(%(query)s) <> ''
+     AND search_name LIKE player_search_name(%(query)s) || '%%'
+   ORDER BY length(search_name), search_name
+   LIMIT %(limit)s)
+  UNION ALL
+  (SELECT player_id, 1 AS rank, search_name FROM players
+   WHERE player_search_name(%(query)s) <> ''
+     AND search_name LIKE '%%' || player_search_name(%(query)s) || '%%'
+     AND search_name NOT LIKE player_search_name(%(query)s) || '%%'
+   ORDER BY length(search_name), search_name
+   LIMIT %(limit)s)
+  LIMIT %(limit)s
+) m
+JOIN players p ON p.player_id = m.player_id
+LEFT JOIN player_career_stats c ON c.player_id = m.player_id AND c.league_id = %(league)s
+ORDER BY m.rank, length(m.search_name), m.search_name
+"""
+
+
+def get_conn():
+    return psycopg2.connect(
+        host=os.getenv("DB_HOST"),
+        port=os.getenv("DB_PORT", "5432"),
+        dbname=os.getenv("DB_NAME"),
+        user=os.getenv("DB_USER"),
+        password=os.getenv("DB_PASS"),
+    )
+
+
+def ensure_search_column(conn):
+    """Create the normalizer and players.search_name (the first run computes it for every player)."""
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT EXISTS (
+              SELECT 1 FROM information_schema.columns
+              WHERE table_schema = current_schema() AND table_name = 'players' AND column_name = 'search_name')
+        """)
+        if cur.fetchone()[0]:
+            return
+        cur.execute(SEARCH_DDL)
+
+
+def search(conn, query: str, limit: int = 10, league_id: int = LEAGUE_ID) -> list[dict]:
+    with conn.cursor() as cur:
+        cur.execute(SEARCH_SQL, {"query": query, "limit": limit, "league": league_id})
+        rows = cur.fetchall()
+    return [dict(zip(("player_id", "name", "position", "goals", "assists", "seasons"), r)) for r in rows]
+
+
+def main():
+    if len(sys.argv) < 2:
+        raise SystemExit("Usage: python etl/player_search.py <query> [limit]")
+    query = sys.argv[1]
+    limit = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+
+    conn = get_conn()
+    try:
+        started = time.perf_counter()
+        results = search(conn, query, limit)
+        elapsed = (time.perf_counter() - started) * 1000
+    finally:
+        conn.close()
+
+    print(f"\n{len(results)} players matching {query!r} ({elapsed:.1f} ms)\n")
+    for r in results:
+        print(f"  {r['player_id']:>10}  {r['name']:<32} {r['position'] or '':<12} "
+              f"{r['goals']:>4} G {r['assists']:>4} A  {r['seasons']} seasons")
+    print()
+
+
+if __name__ == "__main__":
+    main()
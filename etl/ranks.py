@@ -0,0 +1,48 @@
+"""
+Leaderboard ranks stored on player_season_stats at load time.
+
+Per league/season/stat the loader stores:
+  <stat>_rank        competition rank ("1224": ties share a rank, next rank skips)
+  <stat>_dense_rank  dense rank ("1223": ties share a rank, no gaps)
+
+Ranks are computed in the transform over the rows of the stat's topscorer
+list; players not on that list keep NULL for the stat. Covering indexes on
+the rank columns (declared in schema.INDEXES) let "top N" and "rank of
+player X" be index-only lookups instead of sorts.
+"""
+
+RANK_COLUMNS = ("goals_rank", "goals_dense_rank", "assists_rank", "assists_dense_rank")
+
+
+def ensure_rank_columns(conn) -> list[str]:
+    """
+    Add rank columns missing from player_season_stats (tables created before
+    ranks existed). The catalog is checked first: ALTER TABLE locks the
+    parent and every partition ACCESS EXCLUSIVE even when there is nothing
+    to add. Returns the columns added.
+    """
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT column_name FROM information_schema.columns
+            WHERE table_schema = current_schema() AND table_name = 'player_season_stats'
+        """)
+        present = {r[0] for r in cur.fetchall()}
+        missing = [c for c in RANK_COLUMNS if c not in present]
+        if missing:
+            cur.execute("ALTER TABLE player_season_stats "
+                        + ", ".join(f"ADD COLUMN IF NOT EXISTS {c} int" for c in missing))
+    return missing
+
+
+def competition_ranks(values: list[int]) -> list[int]:
+    """1 + number of strictly greater values, for each value."""
+    first_at = {}
+    for i, v in enumerate(sorted(values, reverse=True), 1):
+        first_at.setdefault(v, i)
+    return [first_at[v] for v in values]
+
+
+def dense_ranks(values: list[int]) -> list[int]:
+    """1 + number of distinct greater values, for each value."""
+    rank_of = {v: i for i, v in enumerate(sorted(set(values), reverse=True), 1)}
+    return [rank_of[v] for v in values]
@@ -0,0 +1,278 @@
+"""
+Leaderboard read API with an in-process LRU cache.
+
+Serves the dashboard's queries for any league/season/stat. Responses are
+cached as encoded JSON, so a hot read is a dict lookup with no database
+round-trip. The loaders NOTIFY load_all_seasons.SEASON_CHANNEL with
+"<league_id>:<season_id>" in each load transaction, which Postgres delivers on
+commit. A listener thread then drops only that season's keys (plus the
+league's season list). If the listener connection drops, the whole cache is
+cleared, since notifications may have been missed.
+
+Endpoints (JSON):
+  /leaderboard?season_id=23614&stat=goals[&league_id=8&limit=25]
+  /totals?season_id=23614[&league_id=8]
+  /seasons[?league_id=8]
+  /health
+
+Requests share ETL_READ_POOL_SIZE database connections; a request that
+can't get one within POOL_WAIT_SECONDS, or whose query fails, gets a 503.
+
+Env: ETL_READ_HOST (default 127.0.0.1), ETL_READ_PORT (default 8787),
+     ETL_READ_CACHE_SIZE (default 512 entries), ETL_READ_POOL_SIZE (default 4)
+
+Usage:
+  python etl/read_service.py
+"""
+
+import os
+import time
+import select
+import threading
+from collections import OrderedDict
+from urllib.parse import urlsplit, parse_qsl
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import psycopg2
+from psycopg2.pool import ThreadedConnectionPool, PoolError
+
+import json_codec
+import load_all_seasons as las
+
+HOST = os.getenv("ETL_READ_HOST", "127.0.0.1")
+PORT = int(os.getenv("ETL_READ_PORT", "8787"))
+CACHE_SIZE = int(os.getenv("ETL_READ_CACHE_SIZE", "512"))
+POOL_SIZE = int(os.getenv("ETL_READ_POOL_SIZE", "4"))
+POOL_WAIT_SECONDS = 10
+MAX_LIMIT = 100
+
+LEADERBOARD_SQL = """
+SELECT p.player_id, p.name, s.team_name,
+       COALESCE(s.goals, 0) AS goals, COALESCE(s.assists, 0) AS assists,
+       s.{stat}_rank AS rank
+FROM player_season_stats s
+JOIN players p ON p.player_id = s.player_id
+WHERE s.league_id = %s AND s.season_id = %s AND s.{stat} > 0
+ORDER BY s.{stat}_rank ASC NULLS LAST, s.{stat} DESC, p.name ASC
+LIMIT %s
+"""
+
+
+class LRUCache:
+    """Thread-safe LRU of key -> encoded response bytes."""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.epoch = 0  # bumped on every invalidation
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value, epoch: int):
+        """Store unless an invalidation happened since `epoch` (the value may predate it)."""
+        with self._lock:
+            if epoch != self.epoch:
+                return
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.capacity:
+                self._data.popitem(last=False)
+
+    def invalidate_season(self, league_id: int, season_id: int) -> int:
+        """Keys are (kind, league_id, season_id, ...); also drops the league's season list."""
+        with self._lock:
+            stale = [k for k in self._data
+                     if k[1] == league_id and (k[0] == "seasons" or k[2] == season_id)]
+            for k in stale:
+                del self._data[k]
+            self.invalidations += len(stale)
+            self.epoch += 1
+            return len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.epoch += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            size = len(self._data)
+        return {"entries": size, "capacity": self.capacity, "hits": self.hits,
+                "misses": self.misses, "invalidated": self.invalidations}
+
+
+def db_kwargs() -> dict:
+    return dict(
+        host=os.getenv("DB_HOST"),
+        port=os.getenv("DB_PORT", "5432"),
+        dbname=os.getenv("DB_NAME"),
+        user=os.getenv("DB_USER"),
+        password=os.getenv("DB_PASS"),
+    )
+
+
+class ReadService:
+    def __init__(self, cache_size: int = CACHE_SIZE, pool_size: int = POOL_SIZE):
+        self.cache = LRUCache(cache_size)
+        self.pool = ThreadedConnectionPool(1, pool_size, **db_kwargs())
+        # The HTTP server starts a thread per request; only pool_size of them query at once
+        self.slots = threading.BoundedSemaphore(pool_size)
+
+    def query(self, sql: str, params) -> list[tuple]:
+        if not self.slots.acquire(timeout=POOL_WAIT_SECONDS):
+            raise PoolError("no database connection free")
+        try:
+            conn = self.pool.getconn()
+            try:
+                with conn.cursor() as cur:
+                    cur.execute(sql, params)
+                    rows = cur.fetchall()
+                conn.rollback()
+                return rows
+            finally:
+                self.pool.putconn(conn, close=bool(conn.closed))
+        finally:
+            self.slots.release()
+
+    def cached(self, key, build) -> bytes:
+        body = self.cache.get(key)
+        if body is None:
+            epoch = self.cache.epoch
+            body = json_codec.dumps(build(), compact=True)
+            self.cache.put(key, body, epoch)
+        return body
+
+    def leaderboard(self, league_id: int, season_id: int, stat: str, limit: int) -> bytes:
+        if stat not in ("goals", "assists"):
+            raise ValueError("Invalid stat. Use ?stat=goals or ?stat=assists")
+
+        def build():
+            rows = self.query(LEADERBOARD_SQL.format(stat=stat), (league_id, season_id, limit))
+            return {
+                "league_id": league_id, "season_id": season_id, "stat": stat,
+                "rows": [
+                    {"player_id": pid, "name": name, "team_name": team,
+                     "goals": goals, "assists": assists, "rank": rank}
+                    for pid, name, team, goals, assists, rank in rows
+                ],
+            }
+        return self.cached(("leaderboard", league_id, season_id, stat, limit), build)
+
+    def totals(self, league_id: int, season_id: int) -> bytes:
+        def build():
+            goals, assists = self.query("""
+                SELECT COALESCE(SUM(goals), 0), COALESCE(SUM(assists), 0)
+                FROM player_season_stats WHERE league_id = %s AND season_id = %s
+            """, (league_id, season_id))[0]
+            return {"league_id": league_id, "season_id": season_id,
+                    "totalGoals": int(goals), "totalAssists": int(assists)}
+        return self.cached(("totals", league_id, season_id), build)
+
+    def seasons(self, league_id: int) -> bytes:
+        def build():
+            rows = self.query("""
+                SELECT se.season_id, se.name, EXISTS (
+                  SELECT 1 FROM player_season_stats s
+                  WHERE s.league_id = se.league_id AND s.season_id = se.season_id
+                )
+                FROM seasons se WHERE se.league_id = %s
+                ORDER BY se.starting_at DESC NULLS LAST
+            """, (league_id,))
+            return [{"season_id": sid, "name": name, "hasData": has} for sid, name, has in rows]
+        return self.cached(("seasons", league_id, None), build)
+
+    def listen(self):
+        """Invalidate on loader notifications; reconnects (and clears the cache) on failure."""
+        while True:
+            conn = None
+            try:
+                conn = psycopg2.connect(**db_kwargs())
+                conn.autocommit = True
+                with conn.cursor() as cur:
+                    cur.execute(f"LISTEN {las.SEASON_CHANNEL}")
+                self.cache.clear()
+                print(f"Listening on {las.SEASON_CHANNEL}")
+                while True:
+                    if select.select([conn], [], [], 60) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        note = conn.notifies.pop(0)
+                        league_id, season_id = (int(x) for x in note.payload.split(":"))
+                        dropped = self.cache.invalidate_season(league_id, season_id)
+                        print(f"  ♻️  season {league_id}:{season_id} changed, dropped {dropped} cached responses")
+            except Exception as e:
+                print(f"  ⚠️  Listener error: {e}; reconnecting in 5s")
+                self.cache.clear()
+            finally:
+                # Drops the old LISTEN session before the next one is opened
+                if conn is not None:
+                    conn.close()
+            time.sleep(5)
+
+
+def make_handler(service: ReadService):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, fmt, *args):
+            pass
+
+        def send_json(self, status: int, body: bytes):
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            parts = urlsplit(self.path)
+            q = dict(parse_qsl(parts.query))
+            try:
+                league_id = int(q.get("league_id", las.LEAGUE_ID))
+                if parts.path == "/leaderboard":
+                    limit = max(1, min(int(q.get("limit", 25)), MAX_LIMIT))
+                    body = service.leaderboard(league_id, int(q["season_id"]), q.get("stat", ""), limit)
+                elif parts.path == "/totals":
+                    body = service.totals(league_id, int(q["season_id"]))
+                elif parts.path == "/seasons":
+                    body = service.seasons(league_id)
+                elif parts.path == "/health":
+                    body = json_codec.dumps({"cache": service.cache.stats()}, compact=True)
+                else:
+                    self.send_json(404, b'{"error":"Not found"}')
+                    return
+            except (KeyError, ValueError) as e:
+                message = f"Missing parameter {e}" if isinstance(e, KeyError) else str(e)
+                self.send_json(400, json_codec.dumps({"error": message}, compact=True))
+                return
+            except psycopg2.Error as e:  # includes PoolError
+                print(f"  ⚠️  {parts.path} failed: {e}")
+                self.send_json(503, b'{"error":"Database unavailable"}')
+                return
+            self.send_json(200, body)
+
+    return Handler
+
+
+def main():
+    service = ReadService()
+    threading.Thread(target=service.listen, daemon=True).start()
+    print(f"Read service on http://{HOST}:{PORT} (cache {service.cache.capacity} entries)")
+    try:
+        ThreadingHTTPServer((HOST, PORT), make_handler(service)).serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,419 @@
+"""
+Core warehouse schema: leagues, seasons, players and player_season_stats.
+
+player_season_stats is LIST-partitioned by league_id, one partition per league
+(player_season_stats_l<league_id>). A bulk reload of one league only writes
+(and bloats) that league's partition. A partition can be detached, rebuilt
+and re-attached without holding locks on the other leagues. There is no
+default partition (it would rule out DETACH ... CONCURRENTLY), so a league's
+partition must exist before its rows are written; the loaders call
+ensure_league_partition() for the league they load.
+
+Indexes are declared once in INDEXES (or EXTENSION_INDEXES, for ones that
+need an extension such as pg_trgm) and created only when missing.
+Indexes declared on the partitioned parent cascade to every partition,
+including ones attached later. `status` reports missing declared indexes
+and any undeclared ones.
+
+Every loader that writes a league's stat rows first takes that league's
+advisory lock (lock_league) in its transaction: upsert loaders share it,
+a swap reload (swap_load.py) takes it exclusively before copying the live
+partition, so no upsert can commit rows the swap would then discard.
+
+An existing unpartitioned player_season_stats is converted by `migrate`
+(one transaction, rows copied into per-league partitions).
+
+Usage:
+  python etl/schema.py migrate                  # create/convert everything the ETL uses
+  python etl/schema.py status
+  python etl/schema.py detach <league_id> [--concurrently]
+  python etl/schema.py attach <table> <league_id>
+"""
+
+import os
+import argparse
+import psycopg2
+from dotenv import load_dotenv
+
+import player_search
+import ranks
+
+HERE = os.path.dirname(__file__)
+load_dotenv(os.path.join(HERE, ".env"))
+
+LEAGUE_ID = 8  # Premier League
+STATS_TABLE = "player_season_stats"
+
+CORE_DDL = """
+CREATE TABLE IF NOT EXISTS leagues (
+  league_id int PRIMARY KEY,
+  name      text
+);
+CREATE TABLE IF NOT EXISTS seasons (
+  season_id   bigint PRIMARY KEY,
+  league_id   int,
+  name        text,
+  starting_at date,
+  ending_at   date,
+  finished    boolean
+);
+CREATE TABLE IF NOT EXISTS players (
+  player_id   bigint PRIMARY KEY,
+  name        text,
+  nationality text,
+  position    text
+);
+"""
+
+STATS_DDL = """
+CREATE TABLE IF NOT EXISTS player_season_stats (
+  player_id          bigint NOT NULL,
+  league_id          int    NOT NULL,
+  season             int    NOT NULL,
+  season_id          bigint,
+  team_name          text,
+  goals              int,
+  assists            int,
+  minutes            int,
+  goals_rank         int,
+  goals_dense_rank   int,
+  assists_rank       int,
+  assists_dense_rank int,
+  PRIMARY KEY (player_id, league_id, season)
+) PARTITION BY LIST (league_id)
+"""
+
+# name -> (table, definition). Read path: leaderboards are ordered by rank
+# (rank order is goals/assists DESC), season lists and totals filter on
+# (league_id, season_id); all are index-only on the rank indexes.
+INDEXES = {
+    "player_season_stats_goals_rank_idx": (
+        "player_season_stats",
+        "(league_id, season_id, goals_rank) INCLUDE (player_id, team_name, goals, assists)"),
+    "player_season_stats_assists_rank_idx": (
+        "player_season_stats",
+        "(league_id, season_id, assists_rank) INCLUDE (player_id, team_name, goals, assists)"),
+    "player_season_stats_player_rank_idx": (
+        "player_season_stats",
+        "(player_id, league_id, season_id) "
+        "INCLUDE (goals_rank, goals_dense_rank, assists_rank, assists_dense_rank)"),
+    "seasons_league_idx": (
+        "seasons",
+        "(league_id, starting_at DESC)"),
+    # Player search (see player_search): full-name prefix
+    "players_search_name_idx": (
+        "players",
+        "(search_name text_pattern_ops)"),
+}
+
+# name -> (extension, table, definition); created only where the extension is
+# installed (`migrate` installs it when the server has it available).
+EXTENSION_INDEXES = {
+    "players_search_trgm_idx": ("pg_trgm", "players", "USING gin (search_name gin_trgm_ops)"),
+}
+
+MANAGED_TABLES = ("leagues", "seasons", "players", STATS_TABLE)
+
+# First key of the (class, league_id) advisory lock pair taken by lock_league
+LEAGUE_LOCK_CLASS = 8241
+
+
+def get_conn():
+    return psycopg2.connect(
+        host=os.getenv("DB_HOST"),
+        port=os.getenv("DB_PORT", "5432"),
+        dbname=os.getenv("DB_NAME"),
+        user=os.getenv("DB_USER"),
+        password=os.getenv("DB_PASS"),
+    )
+
+
+def partition_name(league_id: int) -> str:
+    return f"{STATS_TABLE}_l{int(league_id)}"
+
+
+def conn_has_table(conn, table: str) -> bool:
+    with conn.cursor() as cur:
+        cur.execute("SELECT to_regclass(%s) IS NOT NULL", (table,))
+        return cur.fetchone()[0]
+
+
+def is_partitioned(conn) -> bool:
+    with conn.cursor() as cur:
+        cur.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", (STATS_TABLE,))
+        row = cur.fetchone()
+    return row is not None and row[0] == "p"
+
+
+def partitions(conn) -> dict[int, str]:
+    """league_id -> attached partition table name."""
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT c.relname, pg_get_expr(c.relpartbound, c.oid)
+            FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = to_regclass(%s)
+        """, (STATS_TABLE,))
+        rows = cur.fetchall()
+    # bound is "FOR VALUES IN (8)"
+    return {int(bound.split("(")[1].rstrip(")")): name for name, bound in rows}
+
+
+def league_lock_sql(league_id: int, exclusive: bool = False) -> str:
+    """SQL taking the league's load lock until the end of the transaction (psycopg2 or asyncpg)."""
+    fn = "pg_advisory_xact_lock" if exclusive else "pg_advisory_xact_lock_shared"
+    return f"SELECT {fn}({LEAGUE_LOCK_CLASS}, {int(league_id)})"
+
+
+def lock_league(conn, league_id: int, exclusive: bool = False):
+    """Block until this transaction holds the league's load lock (shared by upserts)."""
+    with conn.cursor() as cur:
+        cur.execute(league_lock_sql(league_id, exclusive))
+
+
+def ensure_league_partition(conn, league_id: int) -> bool:
+    """Create the league's partition if missing. Returns True if created; no-op when unpartitioned."""
+    if not is_partitioned(conn) or int(league_id) in partitions(conn):
+        return False
+    with conn.cursor() as cur:
+        cur.execute(f"CREATE TABLE {partition_name(league_id)} PARTITION OF {STATS_TABLE} "
+                    f"FOR VALUES IN ({int(league_id)})")
+    return True
+
+
+def installed_extensions(conn) -> set[str]:
+    with conn.cursor() as cur:
+        cur.execute("SELECT extname FROM pg_extension")
+        return {r[0] for r in cur.fetchall()}
+
+
+def ensure_indexes(conn) -> list[str]:
+    """Create missing declared indexes (extension ones if installed). Returns the names created."""
+    extensions = installed_extensions(conn)
+    declared = dict(INDEXES)
+    for name, (extension, table, definition) in EXTENSION_INDEXES.items():
+        if extension in extensions:
+            declared[name] = (table, definition)
+    with conn.cursor() as cur:
+        cur.execute("SELECT indexname FROM pg_indexes WHERE schemaname = current_schema()")
+        present = {r[0] for r in cur.fetchall()}
+        created = []
+        for name, (table, definition) in declared.items():
+            if name not in present:
+                cur.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} {definition}")
+                created.append(name)
+    return created
+
+
+def ensure_extensions(conn):
+    """Install the extensions EXTENSION_INDEXES use, where available and permitted."""
+    with conn.cursor() as cur:
+        cur.execute("SELECT name FROM pg_available_extensions WHERE installed_version IS NULL AND name = ANY(%s)",
+                    (sorted({ext for ext, _, _ in EXTENSION_INDEXES.values()}),))
+        for (extension,) in cur.fetchall():
+            cur.execute("SAVEPOINT ensure_extension")
+            try:
+                cur.execute(f"CREATE EXTENSION IF NOT EXISTS {extension}")
+                cur.execute("RELEASE SAVEPOINT ensure_extension")
+                print(f"✅ Installed extension {extension}")
+            except psycopg2.Error as e:
+                cur.execute("ROLLBACK TO SAVEPOINT ensure_extension")
+                print(f"⚠️  Could not install extension {extension}: {e.pgerror or e}".rstrip())
+
+
+def ensure_schema(conn, league_id: int = LEAGUE_ID):
+    """Idempotent setup run by the loaders (caller commits)."""
+    with conn.cursor() as cur:
+        cur.execute(CORE_DDL)
+        cur.execute(STATS_DDL)
+    ranks.ensure_rank_columns(conn)  # tables created before ranks existed
+    player_search.ensure_search_column(conn)
+    ensure_league_partition(conn, league_id)
+    ensure_indexes(conn)
+
+
+def partition_existing(conn) -> int:
+    """Convert an unpartitioned player_season_stats in place. Returns the rows moved."""
+    old = f"{STATS_TABLE}_unpartitioned"
+    with conn.cursor() as cur:
+        cur.execute(f"ALTER TABLE {STATS_TABLE} RENAME TO {old}")
+        # Free the primary key's index name for the new table, whatever it is called
+        cur.execute("SELECT conname FROM pg_constraint WHERE conrelid = to_regclass(%s) AND contype = 'p'", (old,))
+        row = cur.fetchone()
+        if row is not None and row[0] != f"{old}_pkey":
+            cur.execute(f'ALTER TABLE {old} RENAME CONSTRAINT "{row[0]}" TO {old}_pkey')
+        for name, (table, _) in INDEXES.items():
+            if table == STATS_TABLE:
+                cur.execute(f"DROP INDEX IF EXISTS {name}")
+        cur.execute(STATS_DDL)
+        cur.execute(f"SELECT DISTINCT league_id FROM {old}")
+        for (league_id,) in cur.fetchall():
+            ensure_league_partition(conn, league_id)
+        cur.execute("""
+            SELECT string_agg(quote_ident(column_name), ', ' ORDER BY ordinal_position)
+            FROM information_schema.columns
+            WHERE table_schema = current_schema() AND table_name = %s
+        """, (old,))
+        columns = cur.fetchone()[0]
+        cur.execute(f"INSERT INTO {STATS_TABLE} ({columns}) SELECT {columns} FROM {old}")
+        moved = cur.rowcount
+        cur.execute(f"DROP TABLE {old}")
+        # Only the stats indexes dropped above; ensure_schema creates the rest
+        for name, (table, definition) in INDEXES.items():
+            if table == STATS_TABLE:
+                cur.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} {definition}")
+    return moved
+
+
+def detach_partition(conn, league_id: int, concurrently: bool = False) -> str:
+    """
+    Detach a league's partition; it stays as a standalone table. CONCURRENTLY
+    only takes a SHARE UPDATE EXCLUSIVE lock on the parent but needs an
+    autocommit connection.
+    """
+    name = partitions(conn).get(int(league_id))
+    if name is None:
+        raise ValueError(f"No partition for league_id={league_id}")
+    with conn.cursor() as cur:
+        cur.execute(f"ALTER TABLE {STATS_TABLE} DETACH PARTITION {name}"
+                    f"{' CONCURRENTLY' if concurrently else ''}")
+    return name
+
+
+def add_partition_check(conn, table: str, league_id: int) -> str:
+    """
+    Add (and validate) the CHECK matching the league's partition bound to
+    `table`. Only `table` is locked, so callers can do this before they take
+    locks on the parent. Returns the constraint name.
+    """
+    league_id = int(league_id)
+    check = f"{table}_league_check"
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT 1 FROM pg_constraint
+            WHERE conrelid = to_regclass(%s) AND conname = %s
+        """, (table, check))
+        if cur.fetchone() is None:
+            cur.execute(f"ALTER TABLE {table} ADD CONSTRAINT {check} CHECK (league_id IS NOT NULL AND league_id = {league_id})")
+    return check
+
+
+def attach_partition(conn, table: str, league_id: int) -> str:
+    """
+    Attach `table` as the league's partition and give it the standard name.
+    The matching CHECK (add_partition_check, added here if missing) lets
+    ATTACH skip its validation scan under lock; declared indexes are attached
+    or built to match the parent.
+    """
+    league_id = int(league_id)
+    check = add_partition_check(conn, table, league_id)
+    with conn.cursor() as cur:
+        cur.execute(f"ALTER TABLE {STATS_TABLE} ATTACH PARTITION {table} FOR VALUES IN ({league_id})")
+        cur.execute(f"ALTER TABLE {table} DROP CONSTRAINT {check}")
+        name = partition_name(league_id)
+        if table != name:
+            cur.execute(f"ALTER TABLE {table} RENAME TO {name}")
+    return name
+
+
+def migrate(conn):
+    """Create (or convert) every table the ETL uses."""
+    import career_stats
+    import stat_history
+    import job_queue
+    import api_quota
+    import dead_letters
+    import match_events
+
+    with conn.cursor() as cur:
+        cur.execute(CORE_DDL)
+    ensure_extensions(conn)
+    if conn_has_table(conn, STATS_TABLE) and not is_partitioned(conn):
+        ranks.ensure_rank_columns(conn)
+        moved = partition_existing(conn)
+        print(f"✅ Partitioned {STATS_TABLE} by league_id ({moved} rows moved)")
+    ensure_schema(conn)
+    if career_stats.ensure_career_table(conn):
+        career_stats.rebuild_career_stats(conn, LEAGUE_ID)
+    if stat_history.ensure_history_table(conn):
+        stat_history.record_changes(conn, LEAGUE_ID)
+    job_queue.ensure_jobs_table(conn)
+    match_events.ensure_events_tables(conn)
+    with conn.cursor() as cur:
+        cur.execute(api_quota.USAGE_DDL)
+        cur.execute(dead_letters.DEAD_LETTER_DDL)
+    conn.commit()
+
+
+def print_status(conn):
+    print(f"\n{'='*60}")
+    print("  SCHEMA STATUS")
+    print(f"{'='*60}")
+    if not conn_has_table(conn, STATS_TABLE):
+        print(f"  {STATS_TABLE} missing (run: python etl schema migrate)")
+    elif not is_partitioned(conn):
+        print(f"  {STATS_TABLE} is not partitioned (run: python etl schema migrate)")
+    else:
+        with conn.cursor() as cur:
+            for league_id, name in sorted(partitions(conn).items()):
+                cur.execute(f"SELECT COUNT(*), pg_total_relation_size(%s) FROM {name}", (name,))
+                rows, size = cur.fetchone()
+                print(f"  league {league_id:<8} {name:<34} {rows:>8} rows {size / 1024:>9.0f} KB")
+
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT tablename, indexname FROM pg_indexes
+            WHERE schemaname = current_schema() AND tablename = ANY(%s)
+        """, (list(MANAGED_TABLES),))
+        present = dict((name, table) for table, name in cur.fetchall())
+    extensions = installed_extensions(conn)
+    print()
+    for name, (table, _) in INDEXES.items():
+        print(f"  {'✅' if name in present else '❌ missing'} {name} ON {table}")
+    for name, (extension, table, _) in EXTENSION_INDEXES.items():
+        if extension not in extensions:
+            print(f"  ⚠️  {name} ON {table} skipped ({extension} not installed)")
+        else:
+            print(f"  {'✅' if name in present else '❌ missing'} {name} ON {table}")
+    for name, table in sorted(present.items()):
+        if name not in INDEXES and name not in EXTENSION_INDEXES and not name.endswith("_pkey"):
+            print(f"  ⚠️  undeclared index {name} ON {table}")
+    conn.rollback()
+    print(f"{'='*60}\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the warehouse schema.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("migrate", help="Create or convert every table the ETL uses")
+    sub.add_parser("status", help="Partitions and declared indexes")
+    p_detach = sub.add_parser("detach", help="Detach a league's partition")
+    p_detach.add_argument("league_id", type=int)
+    p_detach.add_argument("--concurrently", action="store_true")
+    p_attach = sub.add_parser("attach", help="Attach a table as a league's partition")
+    p_attach.add_argument("table")
+    p_attach.add_argument("league_id", type=int)
+    args = parser.parse_args()
+
+    conn = get_conn()
+    try:
+        if args.command == "migrate":
+            migrate(conn)
+            print_status(conn)
+        elif args.command == "status":
+            print_status(conn)
+        elif args.command == "detach":
+            conn.autocommit = args.concurrently
+            name = detach_partition(conn, args.league_id, args.concurrently)
+            if not args.concurrently:
+                conn.commit()
+            print(f"✅ Detached {name} (league {args.league_id})")
+        else:
+            name = attach_partition(conn, args.table, args.league_id)
+            conn.commit()
+            print(f"✅ Attached {name} (league {args.league_id})")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
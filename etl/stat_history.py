@@ -0,0 +1,192 @@
+"""
+Type-2 history of player season stats (player_season_stats_history).
+
+player_season_stats only holds the latest goals/assists; reloading an
+in-season topscorer list overwrites them. After writing a season, the loader
+compares its rows with the open history versions and, only for players whose
+team/goals/assists actually changed (or who are new), closes the open version
+(valid_to = load time) and appends a new one. Unchanged reloads add nothing.
+
+As-of reads ("leaderboard on date X", per-player trend lines) are index range
+scans on (league_id, season_id, valid_from) and (player_id, league_id, valid_from).
+
+Usage:
+  python etl/stat_history.py asof <season_id> <goals|assists> <YYYY-MM-DD[THH:MM]> [limit]
+  python etl/stat_history.py trend <player_id> <season_id>
+"""
+
+import os
+import sys
+from datetime import datetime
+import psycopg2
+from dotenv import load_dotenv
+
+HERE = os.path.dirname(__file__)
+load_dotenv(os.path.join(HERE, ".env"))
+
+LEAGUE_ID = 8  # Premier League
+
+HISTORY_DDL = """
+CREATE TABLE IF NOT EXISTS player_season_stats_history (
+  player_id   bigint      NOT NULL,
+  league_id   int         NOT NULL,
+  season      int         NOT NULL,
+  season_id   bigint      NOT NULL,
+  team_name   text,
+  goals       int,
+  assists     int,
+  valid_from  timestamptz NOT NULL,
+  valid_to    timestamptz,
+  PRIMARY KEY (player_id, league_id, season, valid_from)
+);
+CREATE UNIQUE INDEX IF NOT EXISTS player_season_stats_history_open_idx
+  ON player_season_stats_history (player_id, league_id, season) WHERE valid_to IS NULL;
+CREATE INDEX IF NOT EXISTS player_season_stats_history_asof_idx
+  ON player_season_stats_history (league_id, season_id, valid_from)
+  INCLUDE (valid_to, player_id, team_name, goals, assists);
+CREATE INDEX IF NOT EXISTS player_season_stats_history_player_idx
+  ON player_season_stats_history (player_id, league_id, valid_from)
+  INCLUDE (valid_to, season_id, goals, assists);
+"""
+
+# Per-connection scratch table for the rows whose value changed in this load
+CHANGED_DDL = """
+CREATE TEMP TABLE IF NOT EXISTS history_changed (
+  player_id bigint, league_id int, season int, season_id bigint,
+  team_name text, goals int, assists int
+) ON COMMIT DELETE ROWS
+"""
+
+
+def get_conn():
+    return psycopg2.connect(
+        host=os.getenv("DB_HOST"),
+        port=os.getenv("DB_PORT", "5432"),
+        dbname=os.getenv("DB_NAME"),
+        user=os.getenv("DB_USER"),
+        password=os.getenv("DB_PASS"),
+    )
+
+
+def ensure_history_table(conn) -> bool:
+    """Create player_season_stats_history if missing. Returns True if it was just created."""
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT to_regclass('player_season_stats_history') IS NULL,
+                   to_regclass('player_season_stats_history_open_idx') IS NULL
+                   OR to_regclass('player_season_stats_history_asof_idx') IS NULL
+                   OR to_regclass('player_season_stats_history_player_idx') IS NULL
+        """)
+        missing, incomplete = cur.fetchone()
+        # CREATE INDEX IF NOT EXISTS takes a SHARE lock before it finds the index
+        if missing or incomplete:
+            cur.execute(HISTORY_DDL)
+    return missing
+
+
+def record_changes(conn, league_id: int, season_ids=None, source: str = "player_season_stats") -> int:
+    """
+    Version the given seasons' current rows (all seasons when None), in the
+    caller's transaction. `source` may name a shadow partition holding the
+    rows about to go live. Returns the number of new versions.
+    """
+    season_filter = "" if season_ids is None else "AND s.season_id = ANY(%(seasons)s)"
+    params = {"league": league_id, "seasons": list(season_ids or [])}
+    with conn.cursor() as cur:
+        cur.execute(CHANGED_DDL)
+        cur.execute("TRUNCATE history_changed")
+        cur.execute(f"""
+            INSERT INTO history_changed
+            SELECT s.player_id, s.league_id, s.season, s.season_id, s.team_name, s.goals, s.assists
+            FROM {source} s
+            LEFT JOIN player_season_stats_history h
+              ON h.player_id = s.player_id AND h.league_id = s.league_id
+             AND h.season = s.season AND h.valid_to IS NULL
+            WHERE s.league_id = %(league)s {season_filter}
+              AND (h.player_id IS NULL
+                   OR (h.team_name, h.goals, h.assists) IS DISTINCT FROM (s.team_name, s.goals, s.assists))
+        """, params)
+        changed = cur.rowcount
+        if not changed:
+            return 0
+
+        # A version opened earlier in this same transaction is replaced, not closed
+        cur.execute("""
+            DELETE FROM player_season_stats_history h
+            USING history_changed c
+            WHERE h.player_id = c.player_id AND h.league_id = c.league_id AND h.season = c.season
+              AND h.valid_to IS NULL AND h.valid_from = now()
+        """)
+        cur.execute("""
+            UPDATE player_season_stats_history h
+            SET valid_to = now()
+            FROM history_changed c
+            WHERE h.player_id = c.player_id AND h.league_id = c.league_id AND h.season = c.season
+              AND h.valid_to IS NULL
+        """)
+        cur.execute("""
+            INSERT INTO player_season_stats_history
+              (player_id, league_id, season, season_id, team_name, goals, assists, valid_from)
+            SELECT player_id, league_id, season, season_id, team_name, goals, assists, now()
+            FROM history_changed
+        """)
+    return changed
+
+
+def leaderboard_as_of(conn, season_id: int, stat: str, at: datetime,
+                      league_id: int = LEAGUE_ID, limit: int = 25) -> list[tuple]:
+    """Season leaderboard as it stood at `at`: (player_id, name, team_name, goals, assists)."""
+    if stat not in ("goals", "assists"):
+        raise ValueError("stat must be 'goals' or 'assists'")
+    with conn.cursor() as cur:
+        cur.execute(f"""
+            SELECT h.player_id, p.name, h.team_name, h.goals, h.assists
+            FROM player_season_stats_history h
+            JOIN players p ON p.player_id = h.player_id
+            WHERE h.league_id = %s AND h.season_id = %s
+              AND h.valid_from <= %s AND (h.valid_to IS NULL OR h.valid_to > %s)
+              AND h.{stat} > 0
+            ORDER BY h.{stat} DESC, p.name
+            LIMIT %s
+        """, (league_id, season_id, at, at, limit))
+        return cur.fetchall()
+
+
+def player_trend(conn, player_id: int, season_id: int, league_id: int = LEAGUE_ID) -> list[tuple]:
+    """Every version of one player's season line: (valid_from, valid_to, goals, assists)."""
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT valid_from, valid_to, goals, assists
+            FROM player_season_stats_history
+            WHERE player_id = %s AND league_id = %s AND season_id = %s
+            ORDER BY valid_from
+        """, (player_id, league_id, season_id))
+        return cur.fetchall()
+
+
+def main():
+    args = sys.argv[1:]
+    conn = get_conn()
+    try:
+        ensure_history_table(conn)
+        conn.commit()
+        if len(args) >= 4 and args[0] == "asof":
+            season_id, stat, at = int(args[1]), args[2], datetime.fromisoformat(args[3])
+            limit = int(args[4]) if len(args) > 4 else 25
+            print(f"\nTop {stat} for season_id={season_id} as of {at}:")
+            for i, (_, name, team, goals, assists) in enumerate(leaderboard_as_of(conn, season_id, stat, at, limit=limit), 1):
+                print(f"{i:>3}. {name} ({team}) — goals={goals} assists={assists}")
+        elif len(args) == 3 and args[0] == "trend":
+            player_id, season_id = int(args[1]), int(args[2])
+            print(f"\nplayer_id={player_id} season_id={season_id}:")
+            for valid_from, valid_to, goals, assists in player_trend(conn, player_id, season_id):
+                until = f"{valid_to:%Y-%m-%d %H:%M}" if valid_to else "now"
+                print(f"  {valid_from:%Y-%m-%d %H:%M} → {until}  goals={goals} assists={assists}")
+        else:
+            raise SystemExit("Usage: stat_history.py [asof <season_id> <goals|assists> <date> [limit] | trend <player_id> <season_id>]")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
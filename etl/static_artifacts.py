@@ -0,0 +1,188 @@
+"""
+Pre-rendered leaderboard artifacts written after each load.
+
+For every season a load touched, one compact JSON file is written per
+leaderboard (goals, assists) and one for the season totals, under
+ETL_ARTIFACT_DIR (default dashboard/artifacts/leaderboards):
+
+  <league_id>/<season_id>/<name>.<hash>.json   (+ .json.gz, + .json.br if brotli is installed)
+  manifest.json   {"8/23614/goals": {"path": ..., "sha256": ..., "bytes": ..., "updated_at": ...}}
+
+File names carry the content hash, so they can be served with immutable
+caching; only manifest.json needs revalidation. Unchanged content keeps its
+file (nothing is rewritten). Superseded versions are removed after one more
+run, so clients holding the previous manifest can still fetch them.
+
+The dashboard serves the directory at /leaderboards/ from a route handler
+(dashboard/app/leaderboards/[...path]/route.ts), reading it per request, so
+files written after the dashboard was built are served too. It picks the
+.br/.gz sibling when the client accepts it and sets the cache headers. Set
+ETL_ARTIFACT_DIR to the same path in both environments. A static server or
+CDN can serve the directory instead (e.g. nginx gzip_static/brotli_static).
+Don't point it into dashboard/public: `next start` only serves the files
+that existed there at build time.
+
+Disable with ETL_ARTIFACTS=0.
+
+Usage:
+  python etl/static_artifacts.py [--all]   # rebuild every season that has data
+"""
+
+import os
+import gzip
+import hashlib
+import argparse
+from datetime import datetime, timezone
+
+import json_codec
+import load_all_seasons as las
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+REPO = os.path.abspath(os.path.join(las.HERE, ".."))
+ARTIFACT_DIR = os.getenv("ETL_ARTIFACT_DIR", os.path.join(REPO, "dashboard", "artifacts", "leaderboards"))
+MANIFEST = "manifest.json"
+
+LEADERBOARD_COLUMNS = ["rank", "player_id", "name", "team_name", "goals", "assists"]
+
+
+def enabled() -> bool:
+    return os.getenv("ETL_ARTIFACTS", "1") != "0"
+
+
+def leaderboard(conn, league_id: int, season_id: int, stat: str) -> dict:
+    with conn.cursor() as cur:
+        cur.execute(f"""
+            SELECT s.{stat}_rank, p.player_id, p.name, s.team_name,
+                   COALESCE(s.goals, 0), COALESCE(s.assists, 0)
+            FROM player_season_stats s
+            JOIN players p ON p.player_id = s.player_id
+            WHERE s.league_id = %s AND s.season_id = %s AND s.{stat} > 0
+            ORDER BY s.{stat}_rank ASC NULLS LAST, s.{stat} DESC, p.name ASC
+        """, (league_id, season_id))
+        rows = [list(r) for r in cur.fetchall()]
+    return {"league_id": league_id, "season_id": season_id, "stat": stat,
+            "columns": LEADERBOARD_COLUMNS, "rows": rows}
+
+
+def season_totals(conn, league_id: int, season_id: int) -> dict:
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT COALESCE(SUM(goals), 0), COALESCE(SUM(assists), 0), COUNT(*)
+            FROM player_season_stats WHERE league_id = %s AND season_id = %s
+        """, (league_id, season_id))
+        goals, assists, players = cur.fetchone()
+    return {"league_id": league_id, "season_id": season_id,
+            "totalGoals": int(goals), "totalAssists": int(assists), "players": int(players)}
+
+
+def load_manifest(out_dir: str) -> dict:
+    path = os.path.join(out_dir, MANIFEST)
+    if not os.path.exists(path):
+        return {"artifacts": {}, "superseded": []}
+    return json_codec.load_json(path)
+
+
+def write_atomic(path: str, data: bytes):
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def write_artifact(out_dir: str, key: str, payload: dict, manifest: dict) -> bool:
+    """Write one artifact (+ compressed siblings) unless its content is unchanged. Returns True if written."""
+    body = json_codec.dumps(payload, compact=True)
+    digest = hashlib.sha256(body).hexdigest()
+    current = manifest["artifacts"].get(key)
+    if current and current["sha256"] == digest and os.path.exists(os.path.join(out_dir, current["path"])):
+        return False
+
+    rel = f"{key}.{digest[:12]}.json"
+    path = os.path.join(out_dir, rel)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    write_atomic(path, body)
+    write_atomic(path + ".gz", gzip.compress(body, compresslevel=9, mtime=0))
+    if brotli is not None:
+        write_atomic(path + ".br", brotli.compress(body, quality=11))
+
+    if current:
+        manifest["superseded"].append(current["path"])
+    manifest["artifacts"][key] = {
+        "path": rel,
+        "sha256": digest,
+        "bytes": len(body),
+        "updated_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+    return True
+
+
+def prune(out_dir: str, paths: list[str]):
+    for rel in paths:
+        for suffix in ("", ".gz", ".br"):
+            try:
+                os.remove(os.path.join(out_dir, rel + suffix))
+            except FileNotFoundError:
+                pass
+
+
+def write_seasons(conn, season_ids, league_id: int = las.LEAGUE_ID, out_dir: str = ARTIFACT_DIR) -> tuple[int, int]:
+    """Render artifacts for the given seasons. Returns (written, unchanged)."""
+    os.makedirs(out_dir, exist_ok=True)
+    manifest = load_manifest(out_dir)
+    # Files superseded by the previous run are no longer in any published manifest
+    prune(out_dir, manifest.get("superseded", []))
+    manifest["superseded"] = []
+
+    written = unchanged = 0
+    for season_id in sorted(season_ids):
+        base = f"{league_id}/{season_id}"
+        payloads = {
+            f"{base}/goals": leaderboard(conn, league_id, season_id, "goals"),
+            f"{base}/assists": leaderboard(conn, league_id, season_id, "assists"),
+            f"{base}/totals": season_totals(conn, league_id, season_id),
+        }
+        for key, payload in payloads.items():
+            if write_artifact(out_dir, key, payload, manifest):
+                written += 1
+            else:
+                unchanged += 1
+    conn.rollback()
+
+    manifest["generated_at"] = datetime.now(timezone.utc).isoformat(timespec="seconds")
+    write_atomic(os.path.join(out_dir, MANIFEST), json_codec.dumps(manifest, compact=False))
+    return written, unchanged
+
+
+def publish(conn, season_ids):
+    """Post-load stage used by the loaders; no-op when disabled or nothing was loaded."""
+    if not enabled() or not season_ids:
+        return
+    written, unchanged = write_seasons(conn, season_ids)
+    print(f"Static artifacts: {written} written, {unchanged} unchanged -> {ARTIFACT_DIR}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render static leaderboard artifacts.")
+    parser.add_argument("--all", action="store_true", help="Every season with data (default: latest raw batch)")
+    args = parser.parse_args()
+
+    conn = las.get_conn()
+    try:
+        if args.all:
+            with conn.cursor() as cur:
+                cur.execute("SELECT DISTINCT season_id FROM player_season_stats WHERE league_id = %s", (las.LEAGUE_ID,))
+                season_ids = [r[0] for r in cur.fetchall()]
+        else:
+            season_ids = las.unit_season_ids(las.list_batch_files(las.get_latest_batch()))
+        written, unchanged = write_seasons(conn, season_ids)
+        print(f"✅ {len(season_ids)} seasons: {written} artifacts written, {unchanged} unchanged -> {ARTIFACT_DIR}")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""
+Full reload of a league by building a shadow partition and swapping it in.
+
+The regular load upserts file by file into the live partition, so readers
+can see a season with goals loaded but not yet assists, and every index is
+maintained row by row. In swap mode (ETL_LOAD_MODE=swap) the whole batch is
+loaded as one transaction:
+
+  1. COPY every file's stat rows into an unindexed scratch table
+     (transforms run on ETL_WORKERS processes as usual).
+  2. Build player_season_stats_l<league>_shadow with no indexes: the live
+     rows of seasons not in the batch, plus one merged row per player for
+     each reloaded season (same merge as the columnar engine: the goals file
+     wins for the team name).
+  3. Add the primary key, the declared indexes and the CHECK matching the
+     partition bound (validated here, on the shadow only), then ANALYZE.
+  4. Recompute career stats and record history from the shadow's rows, and
+     queue the notifications.
+  5. Detach and drop the live partition, then attach the shadow in its place.
+     Readers see the old partition or the new one, never a mix.
+
+Everything runs in one transaction. Only seasons with both a goals and an
+assists file are replaced; others keep their live rows, and their files
+count as errors (dead letters). Before step 2 copies the live partition the
+reload takes the league's advisory lock exclusively (schema.lock_league):
+it waits for upsert loaders of that league to commit and holds them off
+until the swap commits. The detach takes an
+ACCESS EXCLUSIVE lock on player_season_stats and holds it until commit, so
+step 5 is last and only does catalog work: the attach skips its validation
+scan thanks to the CHECK, and index renames touch no data. The detach waits
+at most ETL_SWAP_LOCK_TIMEOUT (default 10s) for that lock, then fails and
+rolls back.
+
+Needs the partitioned schema (python etl schema migrate).
+"""
+
+import io
+import os
+
+import career_stats
+import dead_letters
+import load_all_seasons as las
+import parallel_transform as pt
+import player_hashes
+import schema
+import stat_history
+
+LOCK_TIMEOUT = os.getenv("ETL_SWAP_LOCK_TIMEOUT", "10s")
+
+COLUMNS = ", ".join(las.STATS_COLUMNS)
+
+# One row per player and season from the goals/assists stat rows of a season
+MERGE_SQL = """
+SELECT player_id, league_id, season, MAX(season_id),
+       COALESCE(MAX(team_name) FILTER (WHERE goals_rank IS NOT NULL), MAX(team_name)),
+       COALESCE(MAX(goals), 0), COALESCE(MAX(assists), 0), COALESCE(MAX(minutes), 0),
+       MAX(goals_rank), MAX(goals_dense_rank), MAX(assists_rank), MAX(assists_dense_rank)
+FROM shadow_raw
+WHERE season_id = ANY(%s)
+GROUP BY player_id, league_id, season
+"""
+
+
+def shadow_name(league_id: int) -> str:
+    return f"{schema.partition_name(league_id)}_shadow"
+
+
+def build_indexes(cur, table: str):
+    """Primary key + the parent's declared indexes, named after `table` so they can be renamed on swap."""
+    cur.execute(f"ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY (player_id, league_id, season)")
+    for name, (parent, definition) in schema.INDEXES.items():
+        if parent == schema.STATS_TABLE:
+            suffix = name[len(schema.STATS_TABLE) + 1:]
+            cur.execute(f"CREATE INDEX {table}_{suffix} ON {table} {definition}")
+    cur.execute(f"ANALYZE {table}")
+
+
+def swap_in(cur, conn, league_id: int, shadow: str) -> str:
+    """
+    Replace the league's live partition with `shadow` (CHECK already added).
+    Holds ACCESS EXCLUSIVE on the parent until the caller commits. Returns the
+    partition name.
+    """
+    cur.execute("SELECT set_config('lock_timeout', %s, true)", (LOCK_TIMEOUT,))
+    live = schema.partitions(conn).get(league_id)
+    if live is not None:
+        cur.execute(f"ALTER TABLE {schema.STATS_TABLE} DETACH PARTITION {live}")
+        cur.execute(f"DROP TABLE {live}")
+    name = schema.attach_partition(conn, shadow, league_id)
+    cur.execute("""
+        SELECT indexname FROM pg_indexes
+        WHERE schemaname = current_schema() AND tablename = %s AND indexname LIKE %s
+    """, (name, shadow.replace("_", r"\_") + "%"))
+    for (index,) in cur.fetchall():
+        cur.execute(f"ALTER INDEX {index} RENAME TO {name}{index[len(shadow):]}")
+    cur.execute("SELECT set_config('lock_timeout', '0', true)")
+    return name
+
+
+def reload_league(conn, files: list[str], workers: int = 1,
+                  league_id: int = las.LEAGUE_ID) -> tuple[int, int, int, int, list[int]]:
+    """
+    Reload the batch via a shadow partition in one transaction. Call it
+    through las.run_load, which validates the files first.
+    Returns (files loaded, errors, player rows, stat rows, seasons replaced).
+    """
+    if not schema.is_partitioned(conn):
+        raise SystemExit("ETL_LOAD_MODE=swap needs a partitioned player_season_stats. Run: python etl schema migrate")
+
+    shadow = shadow_name(league_id)
+    tasks, skipped = pt.plan_tasks(files, las._batch_season_years(conn, files))
+    errors = 0
+    for path, reason in skipped:
+        errors += 1
+        print(f"❌ {os.path.basename(path)} | Error: {reason}")
+        dead_letters.record_load([path], reason)
+
+    loaded_stats: dict[int, set[str]] = {}
+    staged_paths: dict[int, list[str]] = {}
+    total_players = 0
+    try:
+        with conn.cursor() as cur:
+            cur.execute(f"DROP TABLE IF EXISTS {shadow}")
+            cur.execute(f"CREATE TABLE {shadow} (LIKE {schema.STATS_TABLE} INCLUDING DEFAULTS)")
+            cur.execute(f"CREATE TEMP TABLE shadow_raw (LIKE {schema.STATS_TABLE}) ON COMMIT DROP")
+
+            for batch in pt.transform_files(tasks, workers):
+                name = os.path.basename(batch.path)
+                if batch.error:
+                    errors += 1
+                    print(f"❌ {name} | Error: {batch.error}")
+                    dead_letters.record_load([batch.path], batch.error)
+                    continue
+                pt.write_players(conn, batch)
+                if batch.stats:
+                    cur.copy_expert(f"COPY shadow_raw ({COLUMNS}) FROM STDIN",
+                                    io.BytesIO(pt.encode_copy_rows(batch.stats)))
+                loaded_stats.setdefault(batch.season_id, set()).add(batch.stat)
+                staged_paths.setdefault(batch.season_id, []).append(batch.path)
+                total_players += batch.player_count
+                print(f"✅ {name} | season={batch.season_id} {batch.stat}={batch.stat_count} (staged)")
+
+            seasons = sorted(s for s, stats in loaded_stats.items() if stats == {"goals", "assists"})
+            for season_id in sorted(set(loaded_stats) - set(seasons)):
+                reason = f"season={season_id}: only {', '.join(loaded_stats[season_id])} in the batch, keeping live rows"
+                for path in staged_paths[season_id]:
+                    errors += 1
+                    print(f"❌ {os.path.basename(path)} | Error: {reason}")
+                    dead_letters.record_load([path], reason)
+
+            # Waits for in-flight upserts of this league and keeps new ones
+            # out until commit, so the copy below can't miss their rows
+            schema.lock_league(conn, league_id, exclusive=True)
+            live = schema.partitions(conn).get(league_id)
+            if live is not None:
+                cur.execute(f"""
+                    INSERT INTO {shadow} ({COLUMNS})
+                    SELECT {COLUMNS} FROM {live}
+                    WHERE season_id IS NULL OR season_id <> ALL(%s)
+                """, (seasons,))
+            cur.execute(f"INSERT INTO {shadow} ({COLUMNS}) {MERGE_SQL}", (seasons,))
+            total_rows = cur.rowcount
+
+            build_indexes(cur, shadow)
+            schema.add_partition_check(conn, shadow, league_id)
+
+            # The shadow already holds the league's final rows, so this work
+            # happens before the swap takes its lock
+            career_stats.rebuild_career_stats(conn, league_id, source=shadow)
+            stat_history.record_changes(conn, league_id, seasons, source=shadow)
+            las.notify_seasons(conn, seasons, league_id)
+
+            name = swap_in(cur, conn, league_id, shadow)
+            print(f"\n🔁 Swapped in {name}: {len(seasons)} seasons replaced, {total_rows} rows")
+        conn.commit()
+        player_hashes.CACHE.commit()
+        dead_letters.resolve_load([t[0] for t in tasks if t[1] in seasons])
+    except Exception:
+        conn.rollback()
+        player_hashes.CACHE.rollback()
+        raise
+
+    loaded = sum(len(stats) for s, stats in loaded_stats.items() if s in seasons)
+    return loaded, errors, total_players, total_rows, seasons
@@ -1,10 +1,11 @@
 import os
 import re
-import requests
 import psycopg2
 from psycopg2.extras import execute_values
 from dotenv import load_dotenv
 
+import api_replay
+
 HERE = os.path.dirname(__file__)
 load_dotenv(os.path.join(HERE, ".env"))
 
@@ -38,22 +39,25 @@ def parse_start_year(season_name: str):
     return int(m.group(1))
 
 
-def main():
+def fetch_league_seasons(league_id: int = LEAGUE_ID) -> tuple[str | None, list[dict]]:
+    """
+    League name and its seasons from MIN_START_YEAR onward (newest first),
+    as returned by /leagues/{id}?include=seasons.
+    """
     if not TOKEN:
         raise SystemExit("Missing SPORTMONKS_API_TOKEN in etl/.env")
 
     # Fetch league with seasons included
-    url = f"{BASE}/leagues/{LEAGUE_ID}"
+    url = f"{BASE}/leagues/{league_id}"
     params = {"api_token": TOKEN, "include": "seasons"}
 
-    r = requests.get(url, params=params, timeout=30)
+    r = api_replay.get(url, params=params, timeout=30)
     print("Status:", r.status_code)
     if r.status_code >= 400:
         print("Error body:", r.text[:1500])
     r.raise_for_status()
 
     league = r.json().get("data", {})
-    league_name = league.get("name") or "Premier League"
     seasons = league.get("seasons") or []
 
     # Filter seasons by start year from name (fallback), or by starting_at year if present
@@ -72,13 +76,17 @@ def main():
 
     # Sort by ending_at desc for nicer logs
     filtered.sort(key=lambda s: s.get("ending_at") or "", reverse=True)
+    return league.get("name"), filtered
+
 
+def upsert_seasons(conn, league_id: int, league_name: str, seasons: list[dict]) -> list[tuple]:
+    """Upsert the league and its seasons (caller commits). Returns the season rows written."""
     season_rows = []
-    for s in filtered:
+    for s in seasons:
         season_rows.append(
             (
                 s.get("id"),
-                LEAGUE_ID,
+                league_id,
                 s.get("name"),
                 s.get("starting_at"),  # 'YYYY-MM-DD' or None
                 s.get("ending_at"),
@@ -86,20 +94,19 @@ def main():
             )
         )
 
-    conn = get_conn()
-    try:
-        with conn.cursor() as cur:
-            # Upsert league
-            cur.execute(
-                """
-                INSERT INTO leagues (league_id, name)
-                VALUES (%s, %s)
-                ON CONFLICT (league_id) DO UPDATE SET name = EXCLUDED.name
-                """,
-                (LEAGUE_ID, league_name),
-            )
+    with conn.cursor() as cur:
+        # Upsert league
+        cur.execute(
+            """
+            INSERT INTO leagues (league_id, name)
+            VALUES (%s, %s)
+            ON CONFLICT (league_id) DO UPDATE SET name = EXCLUDED.name
+            """,
+            (league_id, league_name),
+        )
 
-            # Upsert seasons
+        # Upsert seasons
+        if season_rows:
             execute_values(
                 cur,
                 """
@@ -114,7 +121,15 @@ def main():
                 """,
                 season_rows,
             )
+    return season_rows
+
 
+def main():
+    league_name, seasons = fetch_league_seasons(LEAGUE_ID)
+
+    conn = get_conn()
+    try:
+        season_rows = upsert_seasons(conn, LEAGUE_ID, league_name or "Premier League", seasons)
         conn.commit()
         print(f"✅ Upserted {len(season_rows)} EPL seasons from {MIN_START_YEAR}/{MIN_START_YEAR+1} onward.")
         if season_rows:
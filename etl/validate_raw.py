@@ -0,0 +1,190 @@
+"""
+Pre-load validation of raw topscorer files.
+
+Checks a batch before any database writes, so bad input is rejected up front
+instead of being rolled back mid-transaction:
+
+  per file (on ETL_WORKERS processes)
+    - file name parses, payload decodes with the topscorers shape
+    - player_id and total are integers, totals are non-negative
+    - no duplicate player_id (a malformed list; unvalidated, the loaders
+      keep each player's first row)
+    - rows without player_id / empty files (warnings: they load as nothing)
+  per batch (one query)
+    - season ids exist in `seasons` with a starting_at
+    - goals and assists files are paired per season (warning)
+
+Files with errors are left out of the load (and recorded as dead letters).
+Warnings are reported but not blocking. Every load path runs this pass
+unless ETL_VALIDATE=0: load_all_seasons.run_load (python etl load, the
+daemon's refreshes, dead-letter retries, swap mode), the asyncpg backend and
+job_queue load jobs. load_from_raw.py does not.
+
+Usage:
+  python etl/validate_raw.py [batch]   # exits 1 if any file has errors
+"""
+
+import os
+import sys
+import time
+from typing import NamedTuple
+from concurrent.futures import ProcessPoolExecutor
+import psycopg2
+
+import json_codec
+import load_all_seasons as las
+import parallel_transform
+
+
+class Issue(NamedTuple):
+    path: str
+    severity: str  # "error" | "warning"
+    message: str
+
+
+class FileCheck(NamedTuple):
+    path: str
+    season_id: int | None
+    stat: str | None
+    rows: int
+    issues: tuple[Issue, ...]
+
+
+class Report(NamedTuple):
+    files: int
+    rows: int
+    issues: list[Issue]
+    seconds: float
+
+    @property
+    def bad_paths(self) -> set[str]:
+        return {i.path for i in self.issues if i.severity == "error"}
+
+    def print(self):
+        errors = [i for i in self.issues if i.severity == "error"]
+        warnings = [i for i in self.issues if i.severity == "warning"]
+        print(f"Validation: {self.files} files, {self.rows} rows in {self.seconds:.2f}s | "
+              f"{len(errors)} errors in {len(self.bad_paths)} files, {len(warnings)} warnings")
+        for issue in errors + warnings:
+            icon = "❌" if issue.severity == "error" else "⚠️ "
+            print(f"  {icon} {os.path.basename(issue.path)} | {issue.message}")
+        print()
+
+
+def enabled() -> bool:
+    return os.getenv("ETL_VALIDATE", "1") != "0"
+
+
+def check_file(path: str) -> FileCheck:
+    """Worker entry point: every per-file check, returned rather than raised."""
+    def fail(message: str, season_id=None, stat=None) -> FileCheck:
+        return FileCheck(path, season_id, stat, 0, (Issue(path, "error", message),))
+
+    try:
+        season_id, stat = las.parse_filename(path)
+    except ValueError as e:
+        return fail(str(e))
+    try:
+        rows = json_codec.load_topscorer_rows(path)
+    except (OSError, ValueError) as e:
+        return fail(str(e), season_id, stat)
+
+    issues = []
+    missing_id = bad_id = bad_total = negative = 0
+    seen = set()
+    duplicates = set()
+    for player_id, _name, _team_id, _team, total, _position in rows:
+        if player_id is None:
+            missing_id += 1
+            continue
+        if not isinstance(player_id, int):
+            bad_id += 1
+            continue
+        if player_id in seen:
+            duplicates.add(player_id)
+        seen.add(player_id)
+        if total is not None and not isinstance(total, int):
+            bad_total += 1
+        elif total is not None and total < 0:
+            negative += 1
+
+    if bad_id:
+        issues.append(Issue(path, "error", f"{bad_id} rows with a non-integer player_id"))
+    if bad_total:
+        issues.append(Issue(path, "error", f"{bad_total} rows with a non-integer total"))
+    if negative:
+        issues.append(Issue(path, "error", f"{negative} rows with a negative total"))
+    if duplicates:
+        sample = ", ".join(str(p) for p in sorted(duplicates)[:5])
+        issues.append(Issue(path, "error", f"{len(duplicates)} duplicate player_id(s): {sample}"))
+    if missing_id:
+        issues.append(Issue(path, "warning", f"{missing_id} rows without player_id (skipped on load)"))
+    if not rows:
+        issues.append(Issue(path, "warning", "no rows"))
+    return FileCheck(path, season_id, stat, len(rows), tuple(issues))
+
+
+def check_files(files: list[str], workers: int) -> list[FileCheck]:
+    if workers <= 1 or len(files) < 2:
+        return [check_file(p) for p in files]
+    chunksize = max(1, len(files) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(check_file, files, chunksize=chunksize))
+
+
+def check_batch(conn, checks: list[FileCheck]) -> list[Issue]:
+    """Cross-file checks: known seasons and goals/assists pairing."""
+    issues = []
+    by_season: dict[int, dict[str, str]] = {}
+    for c in checks:
+        if c.season_id is not None:
+            by_season.setdefault(c.season_id, {})[c.stat] = c.path
+
+    try:
+        known = las.season_start_years(conn, by_season)
+    except psycopg2.errors.UndefinedTable:
+        known = {}  # fresh database: every season is unknown
+    conn.rollback()
+    for season_id, paths in sorted(by_season.items()):
+        if season_id not in known:
+            for path in paths.values():
+                issues.append(Issue(path, "error", f"season_id={season_id} not in seasons (or no starting_at). "
+                                                   "Run upsert_epl_seasons_from_2000.py first."))
+            continue
+        for stat, other in (("goals", "assists"), ("assists", "goals")):
+            if stat in paths and other not in paths:
+                issues.append(Issue(paths[stat], "warning", f"no {other} file for season_id={season_id} in this batch"))
+    return issues
+
+
+def validate(files: list[str], conn=None, workers: int | None = None) -> Report:
+    started = time.perf_counter()
+    workers = parallel_transform.default_workers() if workers is None else workers
+    checks = check_files(files, workers)
+    issues = [i for c in checks for i in c.issues]
+
+    own_conn = conn is None
+    conn = conn or las.get_conn()
+    try:
+        issues += check_batch(conn, checks)
+    finally:
+        if own_conn:
+            conn.close()
+
+    return Report(len(files), sum(c.rows for c in checks), issues, time.perf_counter() - started)
+
+
+def main():
+    batch = sys.argv[1] if len(sys.argv) > 1 else las.get_latest_batch()
+    files = las.list_batch_files(batch)
+    if not files:
+        raise SystemExit(f"No files for batch {batch}.")
+    print(f"Batch: {batch}")
+    report = validate(files)
+    report.print()
+    if report.bad_paths:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()